@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+
+class RegistroMetricas:
+    """Métricas de um ativo com __slots__ (aceita também acesso como dicionário)"""
+
+    __slots__ = ('retorno_total', 'volatilidade', 'preco_atual', 'preco_min', 'preco_max', 'volume_medio')
+
+    def __init__(self, retorno_total, volatilidade, preco_atual, preco_min, preco_max, volume_medio):
+        self.retorno_total = retorno_total
+        self.volatilidade = volatilidade
+        self.preco_atual = preco_atual
+        self.preco_min = preco_min
+        self.preco_max = preco_max
+        self.volume_medio = volume_medio
+
+    def __getitem__(self, chave):
+        return getattr(self, chave)
+
+    def __repr__(self):
+        campos = ', '.join(f"{campo}={getattr(self, campo):.4g}" for campo in self.__slots__)
+        return f"RegistroMetricas({campos})"
+
+    @classmethod
+    def de_tabela(cls, tabela):
+        """Cria um registro por linha da tabela de metricas.calcular_metricas"""
+        colunas = tabela[list(cls.__slots__)].to_numpy(dtype=np.float64)
+        return {ativo: cls(*map(float, linha)) for ativo, linha in zip(tabela.index, colunas)}
+
+
+class ArmazemPrecos:
+    """Armazenamento compacto dos históricos: um bloco contíguo por ativo
+
+    Os pregões de todos os ativos ficam concatenados em arrays únicos (datas em
+    datetime64[D], preços e volumes em float32 por padrão); `offsets[i]:offsets[i + 1]` delimita
+    o bloco do ativo de código `i`. Os ativos são codificados como inteiros.
+    """
+
+    def __init__(self, ativos, datas, precos, volumes, offsets):
+        self.ativos = list(ativos)
+        self.codigos = {ativo: codigo for codigo, ativo in enumerate(self.ativos)}
+        self.datas = datas
+        self.precos = precos
+        self.volumes = volumes
+        self.offsets = offsets
+
+    @classmethod
+    def de_download(cls, dados, tipo=np.float32):
+        """Monta o armazém a partir do formato do yf.download (colunas Close/Volume × ativo)"""
+        precos = dados['Close']
+        volumes = dados['Volume'].reindex(columns=precos.columns)
+        matriz = precos.to_numpy(dtype=np.float64)
+        validos = ~np.isnan(matriz)
+
+        # ordem coluna-major: os pregões de cada ativo ficam contíguos
+        posicao_ativo, posicao_data = np.nonzero(validos.T)
+        contagens = validos.sum(axis=0)
+        offsets = np.zeros(len(precos.columns) + 1, dtype=np.int64)
+        np.cumsum(contagens, out=offsets[1:])
+
+        datas = precos.index.values.astype('datetime64[D]')[posicao_data]
+        return cls(
+            precos.columns,
+            datas,
+            matriz[posicao_data, posicao_ativo].astype(tipo),
+            np.nan_to_num(volumes.to_numpy(dtype=np.float64)[posicao_data, posicao_ativo]).astype(tipo),
+            offsets,
+        )
+
+    def com_pregoes(self, dados):
+        """Novo armazém com os pregões de `dados` anexados ao fim de cada bloco (sem alterar este)"""
+        colunas = pd.MultiIndex.from_product([['Close', 'Volume'], self.ativos])
+        novos = ArmazemPrecos.de_download(dados.reindex(columns=colunas), self.precos.dtype)
+        codigos = np.concatenate([self.codigos_por_linha(), novos.codigos_por_linha()])
+        ordem = np.argsort(codigos, kind='stable')
+        return ArmazemPrecos(
+            self.ativos,
+            np.concatenate([self.datas, novos.datas])[ordem],
+            np.concatenate([self.precos, novos.precos])[ordem],
+            np.concatenate([self.volumes, novos.volumes])[ordem],
+            self.offsets + novos.offsets,
+        )
+
+    def __len__(self):
+        return len(self.ativos)
+
+    def __contains__(self, ativo):
+        return ativo in self.codigos
+
+    def fatia(self, ativo):
+        """Intervalo [inicio, fim) do bloco do ativo nos arrays concatenados"""
+        codigo = self.codigos[ativo]
+        return self.offsets[codigo], self.offsets[codigo + 1]
+
+    def serie(self, ativo):
+        """Views (sem cópia) das datas, preços e volumes de um ativo"""
+        inicio, fim = self.fatia(ativo)
+        return self.datas[inicio:fim], self.precos[inicio:fim], self.volumes[inicio:fim]
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos arrays do armazém"""
+        return self.datas.nbytes + self.precos.nbytes + self.volumes.nbytes + self.offsets.nbytes
+
+    def codigos_por_linha(self):
+        """Código inteiro do ativo de cada posição dos arrays concatenados"""
+        return np.repeat(np.arange(len(self.ativos), dtype=np.int32), np.diff(self.offsets))
+
+    def para_longo(self, coluna_preco='Preço'):
+        """DataFrame no formato longo com Ativo categórico e valores float32"""
+        ativo = pd.Categorical.from_codes(self.codigos_por_linha(), categories=self.ativos)
+        dados = pd.DataFrame({
+            'Data': self.datas.astype('datetime64[ns]'),
+            'Ativo': ativo,
+            coluna_preco: self.precos,
+            'Volume': self.volumes,
+        })
+        return dados.sort_values(['Data', 'Ativo'], kind='stable', ignore_index=True)
+
+    def matriz(self, campo='precos'):
+        """Matriz larga (data × ativo) de preços ou volumes"""
+        valores = getattr(self, campo)
+        datas, posicao = np.unique(self.datas, return_inverse=True)
+        matriz = np.full((len(datas), len(self.ativos)), np.nan, dtype=np.float32)
+        matriz[posicao, self.codigos_por_linha()] = valores
+        return pd.DataFrame(matriz, index=pd.DatetimeIndex(datas.astype('datetime64[ns]'), name='Data'),
+                            columns=pd.Index(self.ativos, name='Ativo'))
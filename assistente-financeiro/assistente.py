@@ -1,171 +1,674 @@
-import yfinance as yf
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-from datetime import datetime, timedelta
-import re
+import copy
+import threading
+
+from armazem import ArmazemPrecos, RegistroMetricas
+from atualizacao import AtualizadorEmSegundoPlano, EstatisticasAcumuladas
+from backtest import Backtest, melhores_parametros
+from cache_precos import CachePrecos
+from cache_respostas import CacheRespostas
+from correlacao import MatrizCorrelacao, interpretar_correlacao
+from fontes_dados import carregar_universo
+from indicadores import INDICE_REFERENCIA, Indicadores
+from indice_datas import IndiceDatas
+from instrumentacao import instrumentacao
+from intradiario import INTERVALO_BARRA, IngestaoIntradiaria
+from janelas import JanelasMetricas, intervalo_do_periodo
+from metricas import adicionar_retorno_diario, calcular_metricas, calcular_metricas_longo
+from otimizacao import OtimizadorCarteira
+from risco import CARTEIRA, MINIMO_OBSERVACOES, NIVEL_PADRAO, tabela_risco
+from rankings import IndiceRanking, IndicesRanking
+from roteador import RoteadorIntencoes
+from snapshot import DIRETORIO_SNAPSHOT, carregar_snapshot, salvar_snapshot
+
+# respostas que mudam a cada negócio do fluxo intradiário (o cache também considera o nº de eventos)
+INTENCOES_AO_VIVO = {'intradiario', 'preco'}
+SEM_PREGOES = "⚠️  Sem pregões no período\n"
 
 class AssistenteAtivos:
-    def __init__(self, ativos=None):
+    def __init__(self, ativos=None, fonte=None, compacto=False, orcamento_mb=None):
         if ativos is None:
             self.ativos = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA', 'ABEV3.SA']
+        elif ativos == 'B3':
+            self.ativos = carregar_universo()
         else:
             self.ativos = ativos
         
+        self.fonte = fonte if fonte is not None else CachePrecos()
+        self.compacto = compacto
+        self.orcamento_mb = orcamento_mb
+        self.armazem = None
         self.dados = None
+        self._correlacoes = {}
+        self._riscos = {}
+        self._varreduras = {}
+        self._indicadores = {}
+        self._otimizador = None
+        self._acumulados = None
+        self._janelas = None
+        self._indice_datas = None
+        self.versao_dados = 0
+        self.cache_respostas = CacheRespostas()
+        self._trava = threading.RLock()
+        self.intradiario = None
         self.carregar_dados()
         self.processar_metricas()
     
+    @classmethod
+    def de_snapshot(cls, diretorio=DIRETORIO_SNAPSHOT, fonte=None):
+        """Instância pronta a partir de um snapshot em disco, sem acessar a rede
+        
+        Devolve None se não houver snapshot. Os dados podem estar defasados; use
+        `atualizado()` para buscar só os pregões que faltam.
+        """
+        with instrumentacao.etapa('snapshot'):
+            carregado = carregar_snapshot(diretorio)
+        if carregado is None:
+            return None
+        meta, dados, metricas, armazem = carregado
+        
+        assistente = cls.__new__(cls)
+        assistente.ativos = meta['ativos']
+        assistente.fonte = fonte if fonte is not None else CachePrecos()
+        assistente.compacto = meta['compacto']
+        assistente.orcamento_mb = None
+        assistente.armazem = armazem
+        assistente.dados = dados
+        assistente._correlacoes = {}
+        assistente._riscos = {}
+        assistente._varreduras = {}
+        assistente._indicadores = {}
+        assistente._otimizador = None
+        assistente._acumulados = None
+        assistente._janelas = None
+        assistente._indice_datas = None
+        assistente.versao_dados = 0
+        assistente.cache_respostas = CacheRespostas()
+        assistente._trava = threading.RLock()
+        assistente.intradiario = None
+        assistente.roteador = RoteadorIntencoes(assistente.ativos)
+        assistente.metricas = metricas
+        assistente.rankings = IndicesRanking(metricas)
+        assistente.nova_versao_dados()
+        return assistente
+    
+    def salvar_snapshot(self, diretorio=DIRETORIO_SNAPSHOT):
+        """Grava dados e métricas para um próximo início sem rede (de_snapshot)"""
+        salvar_snapshot(self, diretorio)
+    
     def carregar_dados(self):
         """Carrega e processa os dados dos ativos"""
         print("📥 Carregando dados dos ativos...")
-        dados_brutos = yf.download(self.ativos, period='2y')[['Close', 'Volume']]
+        self._correlacoes = {}
+        self._riscos = {}
+        self._varreduras = {}
+        self._indicadores = {}
+        self._otimizador = None
+        self._acumulados = None
+        self._janelas = None
+        self._indice_datas = None
+        with instrumentacao.etapa('busca'):
+            dados_brutos = self.fonte.baixar(self.ativos, periodo='2y')[['Close', 'Volume']]
         
-        self.dados = dados_brutos.stack(level=1).reset_index()
-        self.dados.rename(columns={
-            'Date': 'Data',
-            'Ticker': 'Ativo',
-            'Close': 'Preço',
-            'Volume': 'Volume'
-        }, inplace=True)
+        carregados = set(dados_brutos['Close'].dropna(axis=1, how='all').columns)
+        sem_dados = [ativo for ativo in self.ativos if ativo not in carregados]
+        if sem_dados:
+            print(f"⚠️  Sem dados para: {', '.join(sem_dados)}")
+            self.ativos = [ativo for ativo in self.ativos if ativo in carregados]
         
-        for ativo in self.ativos:
-            mask = self.dados['Ativo'] == ativo
-            self.dados.loc[mask, 'Retorno_Diario'] = self.dados.loc[mask, 'Preço'].pct_change()
+        with instrumentacao.etapa('reformatacao'):
+            if self.compacto:
+                self.armazem = ArmazemPrecos.de_download(dados_brutos[['Close', 'Volume']].reindex(columns=self.ativos, level=1))
+                self.dados = self.armazem.para_longo()
+            else:
+                self.dados = dados_brutos.stack(level=1).reset_index()
+                self.dados.rename(columns={
+                    'Date': 'Data',
+                    'Ticker': 'Ativo',
+                    'Close': 'Preço',
+                    'Volume': 'Volume'
+                }, inplace=True)
+            
+            adicionar_retorno_diario(self.dados, 'Preço', 'Retorno_Diario')
+        self.roteador = RoteadorIntencoes(self.ativos)
+        self.nova_versao_dados()
+        if self.compacto:
+            self.dados['Retorno_Diario'] = self.dados['Retorno_Diario'].astype(np.float32)
+            self.verificar_orcamento()
+    
+    def memoria_utilizada(self):
+        """Bytes ocupados pelos dados carregados (DataFrame + armazém compacto)"""
+        total = int(self.dados.memory_usage(deep=True).sum()) if self.dados is not None else 0
+        if self.armazem is not None:
+            total += self.armazem.nbytes
+        return total
+    
+    def verificar_orcamento(self):
+        """Falha se os dados carregados passarem do orçamento de memória configurado"""
+        if self.orcamento_mb is None:
+            return
+        usado_mb = self.memoria_utilizada() / 1024 ** 2
+        if usado_mb > self.orcamento_mb:
+            raise MemoryError(f"Dados ocupam {usado_mb:.1f} MB, acima do orçamento de {self.orcamento_mb} MB")
+    
+    def matrizes(self):
+        """Preços e volumes em formato largo (data × ativo), colunas na ordem de self.ativos"""
+        if self.armazem is not None:
+            precos = self.armazem.matriz('precos').astype(np.float64)
+            volumes = self.armazem.matriz('volumes').astype(np.float64)
+        else:
+            precos = self.dados.pivot(index='Data', columns='Ativo', values='Preço')
+            volumes = self.dados.pivot(index='Data', columns='Ativo', values='Volume')
+        return precos.reindex(columns=self.ativos), volumes.reindex(columns=self.ativos)
     
     def processar_metricas(self):
         """Calcula métricas principais para consultas rápidas"""
-        self.metricas = {}
+        self._acumulados = None
+        with instrumentacao.etapa('metricas'):
+            if self.armazem is not None:
+                tabela = calcular_metricas(*self.matrizes())
+            else:
+                tabela = calcular_metricas_longo(self.dados, 'Preço')
+            self.metricas = RegistroMetricas.de_tabela(tabela.reindex(self.ativos))
+            self.rankings = IndicesRanking(self.metricas)
+        self.nova_versao_dados()
+    
+    def atualizado(self):
+        """Nova instância com os pregões posteriores à última data carregada
         
-        for ativo in self.ativos:
-            df_ativo = self.dados[self.dados['Ativo'] == ativo].copy()
-            
-            self.metricas[ativo] = {
-                'retorno_total': (df_ativo['Preço'].iloc[-1] / df_ativo['Preço'].iloc[0] - 1) * 100,
-                'volatilidade': df_ativo['Retorno_Diario'].std() * 100,
-                'preco_atual': df_ativo['Preço'].iloc[-1],
-                'preco_min': df_ativo['Preço'].min(),
-                'preco_max': df_ativo['Preço'].max(),
-                'volume_medio': df_ativo['Volume'].mean()
-            }
-    
-    def consultar_volatilidade(self, periodo=None):
+        Só o intervalo novo é buscado na fonte; métricas, rankings e correlações são
+        atualizados a partir dos acumulados, sem reprocessar o histórico. Esta
+        instância não é alterada, então pode seguir respondendo durante a troca.
+        Devolve a própria instância se não houver pregões novos.
+        """
+        ultima = self.dados['Data'].max()
+        with instrumentacao.etapa('busca', incremental=True):
+            novos = self.fonte.baixar_novos(self.ativos, ultima + pd.Timedelta(days=1))
+        novos = novos[novos.index > ultima].reindex(columns=pd.MultiIndex.from_product([['Close', 'Volume'], self.ativos]))
+        novos = novos.dropna(how='all')
+        if novos.empty:
+            return self
+        
+        acumulados = self._acumulados
+        if acumulados is None:
+            acumulados = EstatisticasAcumuladas.de_matrizes(*self.matrizes())
+        precos = novos['Close'].to_numpy(dtype=np.float64)
+        volumes = novos['Volume'].to_numpy(dtype=np.float64)
+        
+        novo = copy.copy(self)
+        novo._janelas = None
+        novo._indice_datas = None
+        novo._acumulados = acumulados.com_pregoes(precos, volumes)
+        
+        retornos = pd.DataFrame(acumulados.retornos_novos(precos), index=novos.index, columns=self.ativos)
+        linhas = pd.concat({'Preço': novos['Close'], 'Volume': novos['Volume'], 'Retorno_Diario': retornos}, axis=1)
+        linhas = linhas.stack(level=1).reset_index()
+        linhas.columns = ['Data', 'Ativo'] + list(linhas.columns[2:])
+        linhas = linhas.dropna(subset=['Preço'])[self.dados.columns]
+        if self.armazem is not None:
+            novo.armazem = self.armazem.com_pregoes(novos)
+            linhas = linhas.astype({'Ativo': self.dados['Ativo'].dtype, 'Preço': np.float32,
+                                    'Volume': np.float32, 'Retorno_Diario': np.float32})
+        novo.dados = pd.concat([self.dados, linhas], ignore_index=True)
+        
+        novo.metricas = RegistroMetricas.de_tabela(novo._acumulados.tabela().reindex(self.ativos))
+        novo.rankings = self.rankings.com_metricas(novo.metricas)
+        novo._correlacoes = {}
+        novo._riscos = {}
+        novo._varreduras = {}
+        novo._indicadores = {}
+        novo._otimizador = None
+        for usar_retornos, correlacoes in self._correlacoes.items():
+            novo._correlacoes[usar_retornos] = correlacoes.com_pregoes(
+                novos['Close'].reindex(columns=correlacoes.ativos).to_numpy(dtype=np.float64))
+        
+        novo.versao_dados = self.versao_dados + 1
+        novo.cache_respostas = CacheRespostas(self.cache_respostas.capacidade_bytes)
+        novo._trava = threading.RLock()
+        return novo
+    
+    def nova_versao_dados(self):
+        """Marca que os dados mudaram: respostas em cache deixam de valer"""
+        self.versao_dados += 1
+        self.cache_respostas.limpar()
+    
+    def _sob_demanda(self, cache, chave, calcular):
+        """Valor guardado num dos caches da carga, calculado uma só vez mesmo com perguntas simultâneas"""
+        if chave not in cache:
+            with self._trava:
+                if chave not in cache:
+                    cache[chave] = calcular()
+        return cache[chave]
+    
+    def precos_periodo(self, periodo=None):
+        """Matriz larga de preços (data × ativo) restrita ao período"""
+        precos, _ = self.matrizes()
+        if periodo is None:
+            return precos
+        inicio, fim, _ = intervalo_do_periodo(periodo, self.dados['Data'].max())
+        return precos.loc[inicio:fim]
+    
+    def janelas(self):
+        """Somas acumuladas para métricas de qualquer período (construídas uma vez por carga)"""
+        if self._janelas is None:
+            with self._trava:
+                if self._janelas is None:
+                    self._janelas = JanelasMetricas(*self.matrizes())
+        return self._janelas
+    
+    def metricas_periodo(self, periodo):
+        """Métricas de todos os ativos num período, com a descrição do período"""
+        if periodo is None:
+            return self.metricas, ""
+        inicio, fim, descricao = intervalo_do_periodo(periodo, self.dados['Data'].max())
+        tabela = self.janelas().metricas(inicio, fim).reindex(self.ativos)
+        return RegistroMetricas.de_tabela(tabela.dropna(subset=['preco_atual'])), f" ({descricao})"
+    
+    def ranking(self, metrica, periodo=None):
+        """Índice ordenado da métrica: o pré-calculado ou um montado para o período"""
+        if periodo is None:
+            return self.rankings[metrica], ""
+        metricas, descricao = self.metricas_periodo(periodo)
+        return IndiceRanking({ativo: info[metrica] for ativo, info in metricas.items()}), descricao
+    
+    def indice_datas(self):
+        """Índice de consultas por data (usa o armazém compacto quando existe)"""
+        if self._indice_datas is None:
+            with self._trava:
+                if self._indice_datas is None and self.armazem is not None:
+                    self._indice_datas = IndiceDatas(self.armazem)
+                elif self._indice_datas is None:
+                    self._indice_datas = IndiceDatas.de_matrizes(*self.matrizes())
+        return self._indice_datas
+    
+    def precos_entre(self, ativo, inicio=None, fim=None):
+        """Datas, preços e volumes do ativo em [inicio, fim], como views sem cópia"""
+        return self.indice_datas().entre(ativo, inicio, fim)
+    
+    def volatilidade_movel(self, janela=21):
+        """Série de volatilidade móvel (%) de todos os ativos"""
+        return self.janelas().volatilidade_movel(janela)
+    
+    def consultar_volatilidade(self, periodo=None, limite=None, pagina=1):
         """Retorna ativos ordenados por volatilidade"""
-        volatilidades = {ativo: info['volatilidade'] for ativo, info in self.metricas.items()}
-        sorted_vol = sorted(volatilidades.items(), key=lambda x: x[1], reverse=True)
+        inicio = (pagina - 1) * limite if limite else 0
+        indice, descricao = self.ranking('volatilidade', periodo)
+        sorted_vol = indice.maiores(limite, inicio)
         
-        resultado = "📊 RANKING DE VOLATILIDADE:\n"
-        for i, (ativo, vol) in enumerate(sorted_vol, 1):
+        resultado = f"📊 RANKING DE VOLATILIDADE{descricao}:\n"
+        if len(indice) == 0:
+            return resultado + SEM_PREGOES
+        for i, (ativo, vol) in enumerate(sorted_vol, inicio + 1):
             resultado += f"{i}º {ativo}: {vol:.2f}%\n"
         
         return resultado
     
-    def consultar_retorno_total(self):
+    def consultar_retorno_total(self, limite=None, pagina=1, menores=False, periodo=None):
         """Retorna ativos ordenados por retorno total"""
-        retornos = {ativo: info['retorno_total'] for ativo, info in self.metricas.items()}
-        sorted_ret = sorted(retornos.items(), key=lambda x: x[1], reverse=True)
+        inicio = (pagina - 1) * limite if limite else 0
+        indice, descricao = self.ranking('retorno_total', periodo)
+        sorted_ret = indice.menores(limite, inicio) if menores else indice.maiores(limite, inicio)
         
-        resultado = "📈 RANKING DE RETORNO TOTAL:\n"
-        for i, (ativo, ret) in enumerate(sorted_ret, 1):
+        resultado = f"📈 RANKING DE RETORNO TOTAL{descricao}:\n"
+        if len(indice) == 0:
+            return resultado + SEM_PREGOES
+        for i, (ativo, ret) in enumerate(sorted_ret, inicio + 1):
+            posicao = len(indice) - i + 1 if menores else i
             sinal = "📈" if ret > 0 else "📉"
-            resultado += f"{i}º {ativo}: {ret:.2f}% {sinal}\n"
+            resultado += f"{posicao}º {ativo}: {ret:.2f}% {sinal}\n"
         
         return resultado
     
-    def consultar_precos(self, tipo='atual'):
+    def consultar_precos(self, tipo='atual', periodo=None):
         """Consulta preços atual, mínimo ou máximo"""
+        metricas, descricao = self.metricas_periodo(periodo)
+        
         if tipo == 'atual':
-            resultado = "💰 PREÇOS ATUAIS:\n"
-            for ativo, info in self.metricas.items():
-                resultado += f"{ativo}: R$ {info['preco_atual']:.2f}\n"
+            ao_vivo = self.intradiario if periodo is None else None
+            resultado = f"💰 PREÇOS ATUAIS{descricao}:\n"
+            for ativo, info in metricas.items():
+                if ao_vivo is not None and ativo in ao_vivo:
+                    resultado += f"{ativo}: R$ {ao_vivo.estado(ativo).preco_atual:.2f} ⚡\n"
+                else:
+                    resultado += f"{ativo}: R$ {info['preco_atual']:.2f}\n"
         
         elif tipo == 'minimo':
-            resultado = "📉 PREÇOS MÍNIMOS:\n"
-            for ativo, info in self.metricas.items():
+            resultado = f"📉 PREÇOS MÍNIMOS{descricao}:\n"
+            for ativo, info in metricas.items():
                 resultado += f"{ativo}: R$ {info['preco_min']:.2f}\n"
         
         elif tipo == 'maximo':
-            resultado = "📈 PREÇOS MÁXIMOS:\n"
-            for ativo, info in self.metricas.items():
+            resultado = f"📈 PREÇOS MÁXIMOS{descricao}:\n"
+            for ativo, info in metricas.items():
                 resultado += f"{ativo}: R$ {info['preco_max']:.2f}\n"
         
+        if not metricas:
+            resultado += SEM_PREGOES
+        return resultado
+    
+    def consultar_preco_em_data(self, data, ativos=None):
+        """Preço de fechamento numa data (ou no pregão anterior mais próximo)"""
+        indice = self.indice_datas()
+        data = pd.Timestamp(data)
+        
+        resultado = f"📅 PREÇOS EM {data:%d/%m/%Y}:\n"
+        for ativo in ativos or self.ativos:
+            pregao = indice.no_dia(ativo, data) if ativo in indice else None
+            if pregao is None:
+                resultado += f"{ativo}: sem pregão até essa data\n"
+                continue
+            dia, preco, _ = pregao
+            aviso = f" (pregão de {dia:%d/%m/%Y})" if dia != data else ""
+            resultado += f"{ativo}: R$ {preco:.2f}{aviso}\n"
+        
         return resultado
     
-    def consultar_volume(self):
+    def consultar_precos_entre(self, ativo, inicio, fim, max_linhas=31):
+        """Preços de um ativo entre duas datas, com os pregões listados se couberem"""
+        datas, precos, _ = self.precos_entre(ativo, inicio, fim)
+        inicio, fim = pd.Timestamp(inicio), pd.Timestamp(fim)
+        
+        resultado = f"📅 PREÇOS {ativo} DE {inicio:%d/%m/%Y} A {fim:%d/%m/%Y}:\n"
+        if len(datas) == 0:
+            return resultado + "Nenhum pregão no intervalo\n"
+        
+        resultado += f"Pregões: {len(datas)}\n"
+        resultado += f"Primeiro: R$ {precos[0]:.2f} ({pd.Timestamp(datas[0]):%d/%m/%Y})\n"
+        resultado += f"Último: R$ {precos[-1]:.2f} ({pd.Timestamp(datas[-1]):%d/%m/%Y})\n"
+        resultado += f"Variação: {(precos[-1] / precos[0] - 1) * 100:.2f}%\n"
+        resultado += f"⬆️  Máximo: R$ {precos.max():.2f} | ⬇️  Mínimo: R$ {precos.min():.2f}\n"
+        if len(datas) <= max_linhas:
+            for dia, preco in zip(datas, precos):
+                resultado += f"  {pd.Timestamp(dia):%d/%m/%Y}: R$ {preco:.2f}\n"
+        
+        return resultado
+    
+    def consultar_volume(self, limite=None, pagina=1, periodo=None):
         """Consulta volumes médios"""
-        volumes = {ativo: info['volume_medio'] for ativo, info in self.metricas.items()}
-        sorted_vol = sorted(volumes.items(), key=lambda x: x[1], reverse=True)
+        inicio = (pagina - 1) * limite if limite else 0
+        indice, descricao = self.ranking('volume_medio', periodo)
+        sorted_vol = indice.maiores(limite, inicio)
         
-        resultado = "🔄 VOLUMES MÉDIOS DIÁRIOS:\n"
-        for i, (ativo, vol) in enumerate(sorted_vol, 1):
+        resultado = f"🔄 VOLUMES MÉDIOS DIÁRIOS{descricao}:\n"
+        if len(indice) == 0:
+            return resultado + SEM_PREGOES
+        for i, (ativo, vol) in enumerate(sorted_vol, inicio + 1):
             vol_milhoes = vol / 1_000_000
             resultado += f"{i}º {ativo}: {vol_milhoes:.1f}M ações\n"
         
         return resultado
     
-    def consultar_melhor_pior(self, metrica='retorno'):
+    def consultar_melhor_pior(self, metrica='retorno', periodo=None):
         """Retorna melhor e pior ativo por métrica"""
         if metrica == 'retorno':
-            valores = {ativo: info['retorno_total'] for ativo, info in self.metricas.items()}
-            melhor = max(valores.items(), key=lambda x: x[1])
-            pior = min(valores.items(), key=lambda x: x[1])
+            indice, descricao = self.ranking('retorno_total', periodo)
             desc = "retorno"
         
         elif metrica == 'volatilidade':
-            valores = {ativo: info['volatilidade'] for ativo, info in self.metricas.items()}
-            melhor = min(valores.items(), key=lambda x: x[1])
-            pior = max(valores.items(), key=lambda x: x[1])
+            indice, descricao = self.ranking('volatilidade', periodo)
             desc = "volatilidade"
         
-        resultado = f"🏆 MELHOR E PIOR POR {desc.upper()}:\n"
+        resultado = f"🏆 MELHOR E PIOR POR {desc.upper()}{descricao}:\n"
+        if len(indice) == 0:
+            return resultado + SEM_PREGOES
+        if metrica == 'retorno':
+            melhor, pior = indice.maiores(1)[0], indice.menores(1)[0]
+        else:
+            melhor, pior = indice.menores(1)[0], indice.maiores(1)[0]
         resultado += f"🥇 Melhor: {melhor[0]} ({melhor[1]:.2f}%)\n"
         resultado += f"📉 Pior: {pior[0]} ({pior[1]:.2f}%)\n"
         
         return resultado
     
-    def consultar_correlacao(self, ativo1=None, ativo2=None):
+    def consultar_posicao(self, ativo, metrica='retorno_total'):
+        """Posição de um ativo no ranking de uma métrica"""
+        posicao = self.rankings[metrica].posicao(ativo)
+        if posicao is None:
+            return f"❌ Ativo {ativo} não encontrado"
+        
+        valor = self.metricas[ativo][metrica]
+        return f"🏅 {ativo} está em {posicao}º de {len(self.rankings[metrica])} em {metrica} ({valor:.2f})\n"
+    
+    def atualizar_metricas_ativo(self, ativo, registro):
+        """Substitui as métricas de um ativo e reposiciona-o nos rankings"""
+        self.metricas[ativo] = registro
+        self.rankings.atualizar_ativo(ativo, registro)
+        self.nova_versao_dados()
+    
+    def matriz_correlacao(self, usar_retornos=False):
+        """Matriz de correlação em cache (construída uma vez por carga de dados)"""
+        return self._sob_demanda(self._correlacoes, usar_retornos,
+                                 lambda: MatrizCorrelacao.de_precos(self.matrizes()[0], usar_retornos))
+    
+    def consultar_correlacao(self, ativo1=None, ativo2=None, usar_retornos=False):
         """Calcula correlação entre ativos"""
+        correlacoes = self.matriz_correlacao(usar_retornos)
+        base = " (RETORNOS)" if usar_retornos else ""
+        
         if ativo1 is None or ativo2 is None:
-            df_pivot = self.dados.pivot(index='Data', columns='Ativo', values='Preço')
-            correl_matrix = df_pivot.corr()
-            
-            resultado = "🔗 MATRIZ DE CORRELAÇÃO:\n"
-            for i, ativo_i in enumerate(self.ativos):
+            resultado = f"🔗 MATRIZ DE CORRELAÇÃO{base}:\n"
+            for ativo_i in self.ativos:
                 linha = f"{ativo_i}: "
-                correlacoes = []
-                for j, ativo_j in enumerate(self.ativos):
-                    if i != j:
-                        correl = correl_matrix.loc[ativo_i, ativo_j]
-                        correlacoes.append(f"{ativo_j}({correl:.2f})")
-                resultado += linha + " | ".join(correlacoes) + "\n"
+                correlacoes_ativo = []
+                for ativo_j in self.ativos:
+                    if ativo_i != ativo_j:
+                        correl = correlacoes.par(ativo_i, ativo_j)
+                        correlacoes_ativo.append(f"{ativo_j}({correl:.2f})")
+                resultado += linha + " | ".join(correlacoes_ativo) + "\n"
         else:
-            df_pivot = self.dados.pivot(index='Data', columns='Ativo', values='Preço')
-            correl = df_pivot[ativo1].corr(df_pivot[ativo2])
+            correl = correlacoes.par(ativo1, ativo2)
             
-            if correl > 0.7:
-                intensidade = "FORTE POSITIVA"
-            elif correl > 0.3:
-                intensidade = "MODERADA POSITIVA" 
-            elif correl > -0.3:
-                intensidade = "FRACA"
-            elif correl > -0.7:
-                intensidade = "MODERADA NEGATIVA"
-            else:
-                intensidade = "FORTE NEGATIVA"
-                
-            resultado = f"🔗 CORRELAÇÃO {ativo1} × {ativo2}:\n"
+            resultado = f"🔗 CORRELAÇÃO {ativo1} × {ativo2}{base}:\n"
             resultado += f"Valor: {correl:.2f}\n"
-            resultado += f"Intensidade: {intensidade}\n"
+            resultado += f"Intensidade: {interpretar_correlacao(correl)}\n"
+        
+        return resultado
+    
+    def consultar_mais_correlacionados(self, ativo, k=5, menos=False, usar_retornos=False):
+        """Ativos mais (ou menos) correlacionados com um ativo"""
+        pares = self.matriz_correlacao(usar_retornos).mais_correlacionados(ativo, k, menos)
+        
+        titulo = "MENOS" if menos else "MAIS"
+        resultado = f"🔗 {titulo} CORRELACIONADOS COM {ativo}:\n"
+        for i, (outro, correl) in enumerate(pares, 1):
+            resultado += f"{i}º {outro}: {correl:.2f} ({interpretar_correlacao(correl)})\n"
         
         return resultado
     
-    def consultar_resumo_ativo(self, ativo):
+    def tabela_risco(self, periodo=None):
+        """VaR/CVaR (histórico, paramétrico e Monte Carlo) por ativo e da carteira igualitária"""
+        return self._sob_demanda(self._riscos, periodo, lambda: tabela_risco(self.precos_periodo(periodo)))
+    
+    def consultar_var(self, ativos=(), periodo=None, limite=10):
+        """VaR e CVaR de 1 dia (95%) da carteira e dos ativos citados (ou dos mais arriscados)"""
+        tabela = self.tabela_risco(periodo)
+        descricao = f" ({intervalo_do_periodo(periodo, self.dados['Data'].max())[2]})" if periodo else ""
+        
+        def linha(nome, valores):
+            return (f"{nome}: VaR {valores['var_monte_carlo']:.2f}% | CVaR {valores['cvar_monte_carlo']:.2f}% "
+                    f"(histórico {valores['var_historico']:.2f}% / {valores['cvar_historico']:.2f}%, "
+                    f"paramétrico {valores['var_parametrico']:.2f}% / {valores['cvar_parametrico']:.2f}%)\n")
+        
+        resultado = f"🛡️  VALOR EM RISCO - 1 DIA, {NIVEL_PADRAO:.0%}{descricao}:\n"
+        if tabela['var_historico'].isna().all():
+            return resultado + f"⚠️  Menos de {MINIMO_OBSERVACOES} retornos no período, risco não estimado\n"
+        if not np.isnan(tabela.loc[CARTEIRA, 'var_historico']):
+            resultado += linha("💼 Carteira (pesos iguais)", tabela.loc[CARTEIRA])
+        estimados = tabela.dropna(subset=['var_historico'])
+        selecionados = [ativo for ativo in ativos if ativo in estimados.index]
+        if not selecionados:
+            selecionados = estimados.drop(CARTEIRA, errors='ignore')['var_monte_carlo'].nlargest(limite).index
+        for ativo in selecionados:
+            resultado += linha(ativo, tabela.loc[ativo])
+        
+        return resultado
+    
+    def precos_indice(self, datas):
+        """Fechamentos do IBOVESPA no intervalo das datas (None se a fonte não tiver o índice ou não houver datas)"""
+        if len(datas) == 0:
+            return None
+        dados = self.fonte.baixar([INDICE_REFERENCIA], inicio=datas.min(), fim=datas.max() + pd.Timedelta(days=1))
+        if INDICE_REFERENCIA not in dados['Close'].columns:
+            return None
+        return dados['Close'][INDICE_REFERENCIA]
+    
+    def indicadores(self, periodo=None):
+        """Indicadores técnicos de todos os ativos no período (calculados sob demanda)"""
+        def calcular():
+            precos = self.precos_periodo(periodo)
+            return Indicadores(precos, self.precos_indice(precos.index), self.versao_dados)
+        return self._sob_demanda(self._indicadores, periodo, calcular)
+    
+    def consultar_drawdown(self, ativos=(), periodo=None, limite=10):
+        """Maior queda desde um topo, quanto tempo durou e a queda atual"""
+        tabela = self.indicadores(periodo).tabela()
+        descricao = f" ({intervalo_do_periodo(periodo, self.dados['Data'].max())[2]})" if periodo else ""
+        
+        selecionados = [ativo for ativo in ativos if ativo in tabela.index]
+        if not selecionados:
+            selecionados = tabela['max_drawdown'].nsmallest(limite).index
+        
+        resultado = f"📉 DRAWDOWN MÁXIMO{descricao}:\n"
+        if tabela.empty:
+            return resultado + SEM_PREGOES
+        for ativo in selecionados:
+            info = tabela.loc[ativo]
+            resultado += (f"{ativo}: {info['max_drawdown']:.2f}% | Maior período abaixo do topo: "
+                          f"{info['duracao_drawdown']:.0f} pregões | Atual: {info['drawdown_atual']:.2f}%\n")
+        
+        return resultado
+    
+    def consultar_indicadores(self, ativos=(), periodo=None, limite=10):
+        """Médias móveis, RSI, bandas de Bollinger e beta contra o IBOVESPA"""
+        tabela = self.indicadores(periodo).tabela()
+        descricao = f" ({intervalo_do_periodo(periodo, self.dados['Data'].max())[2]})" if periodo else ""
+        
+        selecionados = [ativo for ativo in ativos if ativo in tabela.index]
+        if not selecionados:
+            selecionados = tabela['rsi_14'].dropna().nlargest(limite).index
+        
+        resultado = f"📐 INDICADORES TÉCNICOS{descricao}:\n"
+        if tabela.empty:
+            return resultado + SEM_PREGOES
+        for ativo in selecionados:
+            info = tabela.loc[ativo]
+            leitura = " (sobrecomprado)" if info['rsi_14'] >= 70 else " (sobrevendido)" if info['rsi_14'] <= 30 else ""
+            resultado += (f"{ativo}: MM20 R$ {info['mm_20']:.2f} | MM50 R$ {info['mm_50']:.2f} | "
+                          f"MME20 R$ {info['mme_20']:.2f} | RSI(14) {info['rsi_14']:.1f}{leitura} | "
+                          f"Bollinger R$ {info['bollinger_inferior']:.2f} – R$ {info['bollinger_superior']:.2f} | "
+                          f"Beta {info['beta']:.2f}\n")
+        
+        return resultado
+    
+    def otimizador(self):
+        """Otimizador de média-variância sobre o histórico carregado (criado na primeira consulta)"""
+        if self._otimizador is None:
+            with self._trava:
+                if self._otimizador is None:
+                    self._otimizador = OtimizadorCarteira.de_precos(self.matrizes()[0])
+        return self._otimizador
+    
+    def consultar_carteira(self, modificadores=(), peso_minimo=0.005):
+        """Carteiras só compradas de máximo Sharpe e de mínima variância"""
+        otimizador = self.otimizador()
+        carteiras = [("MÍNIMA VARIÂNCIA", otimizador.minima_variancia())]
+        if 'minimo' not in modificadores and 'menos' not in modificadores:
+            carteiras.insert(0, ("MÁXIMO SHARPE", otimizador.maximo_sharpe()))
+        
+        resultado = ""
+        for titulo, carteira in carteiras:
+            resultado += f"💼 CARTEIRA DE {titulo}:\n"
+            resultado += (f"📈 Retorno esperado: {carteira.retorno * 100:.2f}% a.a. | "
+                          f"📊 Volatilidade: {carteira.volatilidade * 100:.2f}% a.a. | Sharpe: {carteira.sharpe:.2f}\n")
+            pesos = carteira.pesos[carteira.pesos >= peso_minimo].sort_values(ascending=False)
+            for ativo, peso in pesos.items():
+                resultado += f"   {ativo}: {peso * 100:.1f}%\n"
+        
+        return resultado
+    
+    def backtest(self, periodo=None):
+        """Backtest vetorizado sobre os preços do período (todos os ativos)"""
+        return Backtest(self.precos_periodo(periodo))
+    
+    def melhores_medias(self, periodo=None):
+        """Melhor par de médias de cada ativo na grade padrão (varredura feita uma vez por período)"""
+        return self._sob_demanda(self._varreduras, periodo,
+                                 lambda: melhores_parametros(self.backtest(periodo).varrer()))
+    
+    def consultar_backtest(self, ativos=(), periodo=None, curta=20, longa=50, limite=10):
+        """Quanto teria rendido o cruzamento de médias móveis, comparado a comprar e manter"""
+        backtest = self.backtest(periodo)
+        estrategia = backtest.cruzamento_medias(curta, longa)
+        referencia = backtest.comprar_e_manter()
+        descricao = f" ({intervalo_do_periodo(periodo, self.dados['Data'].max())[2]})" if periodo else ""
+        
+        selecionados = [ativo for ativo in ativos if ativo in estrategia.index]
+        if not selecionados:
+            selecionados = estrategia['retorno_total'].dropna().nlargest(limite).index
+        
+        resultado = f"🧪 CRUZAMENTO DE MÉDIAS {curta}/{longa}{descricao}:\n"
+        if backtest.pregoes == 0:
+            return resultado + SEM_PREGOES
+        melhores = self.melhores_medias(periodo) if ativos else None
+        for ativo in selecionados:
+            info = estrategia.loc[ativo]
+            resultado += (f"{ativo}: {info['retorno_total']:.2f}% (comprar e manter: "
+                          f"{referencia.loc[ativo, 'retorno_total']:.2f}%) | Drawdown máx.: {info['max_drawdown']:.2f}% | "
+                          f"Volatilidade: {info['volatilidade']:.2f}% | Giro: {info['giro']:.0f}\n")
+            if melhores is not None and ativo in melhores.index:
+                melhor = melhores.loc[ativo]
+                resultado += (f"   🏆 Melhores médias: {melhor['curta']:.0f}/{melhor['longa']:.0f} "
+                              f"→ {melhor['retorno_total']:.2f}%\n")
+        
+        return resultado
+    
+    def conectar_intradiario(self, fonte_eventos, intervalo_barra=INTERVALO_BARRA, iniciar=True):
+        """Passa a acompanhar um fluxo de negócios (consumido numa thread de fundo)
+        
+        O último fechamento carregado serve de referência para o retorno do dia; os
+        preços atuais passam a vir do fluxo para os ativos que já tiveram negócios.
+        """
+        if self.intradiario is not None:
+            self.intradiario.parar()
+        referencias = {ativo: info['preco_atual'] for ativo, info in self.metricas.items()}
+        self.intradiario = IngestaoIntradiaria(fonte_eventos, referencias, intervalo_barra)
+        if iniciar:
+            self.intradiario.iniciar()
+        return self.intradiario
+    
+    def consultar_intradiario(self, ativos=(), limite=10):
+        """Preço, variação do dia, volatilidade por barra e volume dos negócios recebidos"""
+        if self.intradiario is None:
+            return "⚠️  Nenhum fluxo intradiário conectado; mostrando o último fechamento.\n" + \
+                self.consultar_precos('atual')
+        painel = self.intradiario.painel()
+        if painel.empty:
+            return "⏳ Aguardando os primeiros negócios do fluxo intradiário."
+        
+        selecionados = [ativo for ativo in ativos if ativo in painel.index]
+        if not selecionados:
+            selecionados = painel['retorno_dia'].abs().nlargest(limite).index
+        
+        resultado = (f"⚡ INTRADIÁRIO ({self.intradiario.eventos} negócios, "
+                     f"barras de {self.intradiario.intervalo_barra:.0f}s):\n")
+        for ativo in selecionados:
+            info = painel.loc[ativo]
+            sinal = "📈" if info['retorno_dia'] > 0 else "📉"
+            resultado += (f"{ativo}: R$ {info['preco_atual']:.2f} ({info['retorno_dia']:+.2f}% {sinal}) | "
+                          f"Volatilidade: {info['volatilidade_barras']:.3f}% por barra | "
+                          f"Volume: {info['volume']/1_000_000:.1f}M | {info['negocios']:.0f} negócios\n")
+        
+        return resultado
+    
+    def consultar_resumo_ativo(self, ativo, periodo=None):
         """Resumo completo de um ativo específico"""
-        if ativo not in self.metricas:
+        metricas, descricao = self.metricas_periodo(periodo)
+        if ativo not in metricas:
             return f"❌ Ativo {ativo} não encontrado"
         
-        info = self.metricas[ativo]
-        resultado = f"📋 RESUMO {ativo}:\n"
+        info = metricas[ativo]
+        resultado = f"📋 RESUMO {ativo}{descricao}:\n"
         resultado += f"💰 Preço Atual: R$ {info['preco_atual']:.2f}\n"
         resultado += f"📈 Retorno Total: {info['retorno_total']:.2f}%\n"
         resultado += f"📊 Volatilidade: {info['volatilidade']:.2f}%\n"
@@ -177,49 +680,101 @@ class AssistenteAtivos:
     
     def processar_pergunta(self, pergunta):
         """Processa perguntas em linguagem natural"""
-        pergunta = pergunta.lower().strip()
+        if instrumentacao.ativa:
+            return self._processar_instrumentado(pergunta)
+        return self.responder_com_cache(self.roteador.rotear(pergunta))
+    
+    def _processar_instrumentado(self, pergunta):
+        """processar_pergunta com o rastro da pergunta (fora do caminho sem instrumentação)"""
+        with instrumentacao.rastro('pergunta', pergunta=pergunta):
+            with instrumentacao.etapa('roteamento'):
+                intencao = self.roteador.rotear(pergunta)
+            return self.responder_com_cache(intencao)
+    
+    def responder_com_cache(self, intencao, formato=None):
+        """Resposta da intenção, reaproveitada do cache enquanto os dados não mudarem
+        
+        `formato(assistente, intencao)` troca o texto por outra forma da resposta (ex.: os
+        dados estruturados do servidor), guardada no mesmo cache com o formato na chave.
+        """
+        chave = (intencao, self.versao_dados)
+        if self.intradiario is not None and intencao.nome in INTENCOES_AO_VIVO:
+            chave += (self.intradiario.eventos,)
+        if formato is not None:
+            chave += (formato,)
         
-        if any(palavra in pergunta for palavra in ['volatil', 'risco', 'oscila']):
-            return self.consultar_volatilidade()
+        resposta = self.cache_respostas.obter(chave)
+        if instrumentacao.ativa:
+            cache = 'acerto' if resposta is not None else 'falha'
+            instrumentacao.contar('respostas', intencao=intencao.nome, cache=cache)
+            instrumentacao.anotar(intencao=intencao.nome, cache=cache)
+        if resposta is None:
+            with instrumentacao.etapa('consulta', intencao=intencao.nome):
+                resposta = self.responder(intencao) if formato is None else formato(self, intencao)
+            self.cache_respostas.guardar(chave, resposta)
+        return resposta
+    
+    def responder(self, intencao):
+        """Executa a consulta correspondente a uma intenção já identificada"""
+        nome, ativos, modificadores, periodo = intencao
+        
+        if nome == 'backtest':
+            return self.consultar_backtest(ativos, periodo)
+        
+        elif nome == 'var':
+            return self.consultar_var(ativos, periodo)
+        
+        elif nome == 'carteira':
+            return self.consultar_carteira(modificadores)
+        
+        elif nome == 'drawdown':
+            return self.consultar_drawdown(ativos, periodo)
+        
+        elif nome == 'indicadores':
+            return self.consultar_indicadores(ativos, periodo)
+        
+        elif nome == 'intradiario':
+            return self.consultar_intradiario(ativos)
         
-        elif any(palavra in pergunta for palavra in ['retorno', 'desempenho', 'lucro', 'rendimento']):
-            if 'melhor' in pergunta or 'pior' in pergunta:
-                return self.consultar_melhor_pior('retorno')
-            return self.consultar_retorno_total()
+        elif nome == 'volatilidade':
+            return self.consultar_volatilidade(periodo)
         
-        elif any(palavra in pergunta for palavra in ['preço', 'valor', 'cotação']):
-            if 'mínimo' in pergunta or 'menor' in pergunta:
-                return self.consultar_precos('minimo')
-            elif 'máximo' in pergunta or 'maior' in pergunta:
-                return self.consultar_precos('maximo')
+        elif nome == 'retorno':
+            if 'melhor' in modificadores or 'pior' in modificadores:
+                return self.consultar_melhor_pior('retorno', periodo)
+            return self.consultar_retorno_total(periodo=periodo)
+        
+        elif nome == 'preco':
+            if periodo is not None and periodo[0] == 'data':
+                return self.consultar_preco_em_data(periodo[1], ativos)
+            if periodo is not None and periodo[0] == 'intervalo' and ativos:
+                return ''.join(self.consultar_precos_entre(ativo, periodo[1], periodo[2]) for ativo in ativos)
+            if 'minimo' in modificadores:
+                return self.consultar_precos('minimo', periodo)
+            elif 'maximo' in modificadores:
+                return self.consultar_precos('maximo', periodo)
             else:
-                return self.consultar_precos('atual')
+                return self.consultar_precos('atual', periodo)
         
-        elif any(palavra in pergunta for palavra in ['volume', 'negocia']):
-            return self.consultar_volume()
+        elif nome == 'volume':
+            return self.consultar_volume(periodo=periodo)
         
-        elif any(palavra in pergunta for palavra in ['correlação', 'relação', 'diversificação']):
-            ativos_encontrados = []
-            for ativo in self.ativos:
-                if ativo.lower() in pergunta:
-                    ativos_encontrados.append(ativo)
-            
-            if len(ativos_encontrados) >= 2:
-                return self.consultar_correlacao(ativos_encontrados[0], ativos_encontrados[1])
+        elif nome == 'correlacao':
+            if len(ativos) >= 2:
+                return self.consultar_correlacao(ativos[0], ativos[1])
+            elif len(ativos) == 1:
+                menos = 'menos' in modificadores or 'minimo' in modificadores
+                return self.consultar_mais_correlacionados(ativos[0], menos=menos)
             else:
                 return self.consultar_correlacao()
         
-        elif any(palavra in pergunta for palavra in ['resumo', 'info', 'detalhe']):
-            for ativo in self.ativos:
-                if ativo.lower() in pergunta:
-                    return self.consultar_resumo_ativo(ativo)
+        elif nome == 'resumo':
+            if ativos:
+                return self.consultar_resumo_ativo(ativos[0], periodo)
             return "❌ Especifique qual ativo deseja o resumo (ex: 'resumo PETR4.SA')"
         
-        elif 'melhor' in pergunta and 'pior' in pergunta:
-            if 'volatilidade' in pergunta:
-                return self.consultar_melhor_pior('volatilidade')
-            else:
-                return self.consultar_melhor_pior('retorno')
+        elif nome == 'melhor_pior':
+            return self.consultar_melhor_pior('retorno', periodo)
         
         else:
             return self.mostrar_ajuda()
@@ -232,17 +787,30 @@ class AssistenteAtivos:
 📊 **Desempenho e Risco:**
 • "Qual ativo teve maior retorno?"
 • "Qual a volatilidade dos ativos?" 
+• "Volatilidade nos últimos 30 dias"
+• "Retorno em 2024"
 • "Melhor e pior desempenho"
 • "Qual ativo é mais arriscado?"
+• "Qual o VaR da carteira?"
+• "Qual o drawdown máximo da ITUB4?"
+• "RSI e bandas de Bollinger da PETR4"
+• "Beta da VALE3 contra o IBOVESPA"
+• "Monte uma carteira de menor risco"
+• "Carteira de maior Sharpe"
+• "Quanto teria rendido comprar PETR4 com cruzamento de médias?"
+• "Como está a PETR4 hoje?" (com fluxo intradiário conectado)
 
 💰 **Preços:**
 • "Quais os preços atuais?"
 • "Preços mínimos dos ativos"
 • "Preços máximos históricos"
+• "Preço da VALE3 em 2024-03-01"
+• "Preço da PETR4 entre 01/02/2024 e 01/03/2024"
 
 🔗 **Relações:**
 • "Correlação entre os ativos"
 • "Correlação PETR4 e VALE3"
+• "Mais correlacionados com PETR4.SA"
 • "Diversificação da carteira"
 
 📈 **Resumos:**
@@ -263,15 +831,25 @@ class AssistenteAtivos:
 """
         return ajuda
 
-def executar_assistente():
-    """Loop interativo do assistente"""
+def executar_assistente(snapshot=DIRETORIO_SNAPSHOT):
+    """Loop interativo do assistente
+    
+    Com um snapshot salvo, responde na hora com os dados dele e busca os pregões
+    novos em segundo plano; o snapshot é regravado ao sair.
+    """
     print("🚀 INICIANDO ASSISTENTE DE ATIVOS...")
-    assistente = AssistenteAtivos()
+    assistente = AssistenteAtivos.de_snapshot(snapshot)
+    atualizador = AtualizadorEmSegundoPlano(assistente or AssistenteAtivos())
+    if assistente is not None:
+        print("⚡ Dados do último snapshot carregados; buscando pregões novos em segundo plano...")
+        atualizador.iniciar(imediato=True)
+    else:
+        atualizador.iniciar()
     
     print("\n" + "="*60)
     print("🤖 ASSISTENTE FINANCEIRO PRONTO!")
     print("="*60)
-    print(assistente.mostrar_ajuda())
+    print(atualizador.atual.mostrar_ajuda())
     
     while True:
         print("\n" + "-"*40)
@@ -284,8 +862,11 @@ def executar_assistente():
         if pergunta == '':
             continue
             
-        resposta = assistente.processar_pergunta(pergunta)
+        resposta = atualizador.processar_pergunta(pergunta)
         print(f"\n{resposta}")
+    
+    atualizador.parar()
+    atualizador.atual.salvar_snapshot(snapshot)
 
 def demonstracao_rapida():
     """Mostra exemplos rápidos do assistente"""
@@ -0,0 +1,155 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from metricas import COLUNAS_METRICAS, retornos_diarios
+
+
+def _primeiro_valido(matriz):
+    validos = ~np.isnan(matriz)
+    linhas = validos.argmax(axis=0)
+    return np.where(validos.any(axis=0), matriz[linhas, np.arange(matriz.shape[1])], np.nan)
+
+
+def _ultimo_valido(matriz):
+    return _primeiro_valido(matriz[::-1])
+
+
+class EstatisticasAcumuladas:
+    """Somas acumuladas por ativo que permitem atualizar as métricas em O(1) por pregão
+
+    Guarda primeiro/último preço, mínimo, máximo, contagens e somas de retornos,
+    retornos ao quadrado e volumes. `com_pregoes` devolve uma cópia nova com os
+    pregões adicionados (a instância original não muda), então quem ainda lê a
+    versão antiga não é afetado.
+    """
+
+    CAMPOS = ('preco_inicial', 'preco_final', 'preco_min', 'preco_max', 'n_retornos', 'soma_retornos',
+              'soma_quadrados', 'melhor_dia', 'pior_dia', 'n_volumes', 'soma_volumes')
+
+    def __init__(self, ativos, **campos):
+        self.ativos = list(ativos)
+        for campo in self.CAMPOS:
+            setattr(self, campo, campos[campo])
+
+    @classmethod
+    def de_matrizes(cls, precos, volumes):
+        """Constrói os acumulados a partir das matrizes largas (data × ativo)"""
+        matriz = precos.to_numpy(dtype=np.float64)
+        retornos = retornos_diarios(precos).to_numpy(dtype=np.float64)
+        volumes = volumes.reindex(columns=precos.columns).to_numpy(dtype=np.float64)
+        return cls(
+            precos.columns,
+            preco_inicial=_primeiro_valido(matriz),
+            preco_final=_ultimo_valido(matriz),
+            preco_min=np.fmin.reduce(matriz, axis=0),
+            preco_max=np.fmax.reduce(matriz, axis=0),
+            n_retornos=(~np.isnan(retornos)).sum(axis=0),
+            soma_retornos=np.nansum(retornos, axis=0),
+            soma_quadrados=np.nansum(retornos ** 2, axis=0),
+            melhor_dia=np.fmax.reduce(retornos, axis=0),
+            pior_dia=np.fmin.reduce(retornos, axis=0),
+            n_volumes=(~np.isnan(volumes)).sum(axis=0),
+            soma_volumes=np.nansum(volumes, axis=0),
+        )
+
+    def retornos_novos(self, precos):
+        """Retornos dos novos pregões encadeados com o último preço conhecido"""
+        preenchidos = pd.DataFrame(np.vstack([self.preco_final, precos])).ffill().to_numpy()
+        return precos / preenchidos[:-1] - 1
+
+    def com_pregoes(self, precos, volumes):
+        """Cópia com os novos pregões (arrays k × ativos, na ordem de self.ativos)"""
+        precos = np.asarray(precos, dtype=np.float64)
+        volumes = np.asarray(volumes, dtype=np.float64)
+        retornos = self.retornos_novos(precos)
+        ultimo = _ultimo_valido(precos)
+        return EstatisticasAcumuladas(
+            self.ativos,
+            preco_inicial=np.where(np.isnan(self.preco_inicial), _primeiro_valido(precos), self.preco_inicial),
+            preco_final=np.where(np.isnan(ultimo), self.preco_final, ultimo),
+            preco_min=np.fmin(self.preco_min, np.fmin.reduce(precos, axis=0)),
+            preco_max=np.fmax(self.preco_max, np.fmax.reduce(precos, axis=0)),
+            n_retornos=self.n_retornos + (~np.isnan(retornos)).sum(axis=0),
+            soma_retornos=self.soma_retornos + np.nansum(retornos, axis=0),
+            soma_quadrados=self.soma_quadrados + np.nansum(retornos ** 2, axis=0),
+            melhor_dia=np.fmax(self.melhor_dia, np.fmax.reduce(retornos, axis=0)),
+            pior_dia=np.fmin(self.pior_dia, np.fmin.reduce(retornos, axis=0)),
+            n_volumes=self.n_volumes + (~np.isnan(volumes)).sum(axis=0),
+            soma_volumes=self.soma_volumes + np.nansum(volumes, axis=0),
+        )
+
+    def tabela(self):
+        """Métricas no mesmo formato de metricas.calcular_metricas"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            n = self.n_retornos.astype(np.float64)
+            media = self.soma_retornos / n
+            desvios = np.maximum(self.soma_quadrados - n * media ** 2, 0.0)
+            tabela = pd.DataFrame({
+                'retorno_total': (self.preco_final / self.preco_inicial - 1) * 100,
+                'volatilidade': np.sqrt(desvios / (n - 1)) * 100,
+                'volatilidade_populacional': np.sqrt(desvios / n) * 100,
+                'retorno_medio': media * 100,
+                'melhor_dia': self.melhor_dia * 100,
+                'pior_dia': self.pior_dia * 100,
+                'preco_inicial': self.preco_inicial,
+                'preco_atual': self.preco_final,
+                'preco_min': self.preco_min,
+                'preco_max': self.preco_max,
+                'volume_medio': self.soma_volumes / self.n_volumes,
+            }, index=pd.Index(self.ativos, name='Ativo'))
+        return tabela[COLUNAS_METRICAS]
+
+
+class AtualizadorEmSegundoPlano:
+    """Atualiza o assistente periodicamente numa thread, trocando o snapshot inteiro
+
+    `atual` sempre aponta para uma instância completa e imutável do ponto de vista
+    de quem lê; a atualização monta a próxima (AssistenteAtivos.atualizado) e troca
+    a referência numa única atribuição. Leitores não usam trava nenhuma.
+    """
+
+    def __init__(self, assistente, intervalo=15 * 60):
+        self.atual = assistente
+        self.intervalo = intervalo
+        self.falhas = 0
+        self.ultimo_erro = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def processar_pergunta(self, pergunta):
+        return self.atual.processar_pergunta(pergunta)
+
+    def atualizar_agora(self):
+        """Busca os pregões novos e publica o snapshot resultante"""
+        self.atual = self.atual.atualizado()
+        return self.atual
+
+    def _tentar_atualizar(self):
+        try:
+            self.atualizar_agora()
+        except Exception as erro:
+            # uma falha de rede não pode derrubar o serviço: segue com o snapshot atual
+            self.falhas += 1
+            self.ultimo_erro = repr(erro)
+
+    def _executar(self, imediato):
+        if imediato:
+            self._tentar_atualizar()
+        while not self._parar.wait(self.intervalo):
+            self._tentar_atualizar()
+
+    def iniciar(self, imediato=False):
+        """Começa a atualizar periodicamente (com `imediato`, já busca uma vez ao iniciar)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, args=(imediato,), name='atualizador',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
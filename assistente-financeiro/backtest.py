@@ -0,0 +1,196 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_BACKTEST = ['retorno_total', 'volatilidade', 'max_drawdown', 'giro', 'exposicao']
+CURTAS_PADRAO = [5, 10, 20, 50]
+LONGAS_PADRAO = [50, 100, 150, 200]
+
+# estado de cada processo filho da varredura: matrizes compartilhadas e custo por operação.
+# Só os processos do pool usam; no processo principal as matrizes vão como argumentos,
+# porque o servidor roda backtests de perguntas diferentes em threads ao mesmo tempo.
+_ESTADO = {}
+
+
+class MatrizesCompartilhadas:
+    """Matrizes float64 num único bloco de memória compartilhada
+
+    O processo principal copia as matrizes uma vez; os processos da varredura
+    recebem só o `descritor` (nome do bloco e posição de cada matriz) e leem as
+    mesmas páginas, sem serializar os dados a cada tarefa.
+    """
+
+    def __init__(self, **matrizes):
+        tamanho = sum(matriz.nbytes for matriz in matrizes.values())
+        self.bloco = shared_memory.SharedMemory(create=True, size=max(tamanho, 1))
+        posicoes, inicio = {}, 0
+        for nome, matriz in matrizes.items():
+            destino = np.ndarray(matriz.shape, dtype=np.float64, buffer=self.bloco.buf, offset=inicio)
+            destino[...] = matriz
+            posicoes[nome] = (inicio, matriz.shape)
+            inicio += destino.nbytes
+        self.descritor = (self.bloco.name, posicoes)
+
+    @staticmethod
+    def anexar(descritor):
+        """(bloco, {nome: matriz}) com visões sobre o bloco já criado"""
+        nome, posicoes = descritor
+        bloco = shared_memory.SharedMemory(name=nome)
+        matrizes = {chave: np.ndarray(forma, dtype=np.float64, buffer=bloco.buf, offset=inicio)
+                    for chave, (inicio, forma) in posicoes.items()}
+        return bloco, matrizes
+
+    def fechar(self):
+        self.bloco.close()
+        self.bloco.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+
+def preparar(precos):
+    """Matrizes usadas pelos backtests: retornos diários e somas acumuladas dos preços
+
+    Os preços são propagados nos buracos (posição mantida, retorno zero). As somas e
+    contagens acumuladas têm uma linha inicial de zeros, então a média móvel de
+    qualquer janela sai de uma subtração, sem recalcular nada por parâmetro.
+    """
+    valores = pd.DataFrame(precos).ffill().to_numpy(dtype=np.float64)
+    validos = ~np.isnan(valores)
+    retornos = np.full_like(valores, np.nan)
+    retornos[1:] = valores[1:] / valores[:-1] - 1
+    zeros = np.zeros((1, valores.shape[1]))
+    somas = np.vstack([zeros, np.cumsum(np.where(validos, valores, 0.0), axis=0)])
+    contagens = np.vstack([zeros, np.cumsum(validos, axis=0, dtype=np.float64)])
+    return {'retornos': retornos, 'somas': somas, 'contagens': contagens}
+
+
+def media_movel(somas, contagens, janela):
+    """Média móvel simples de todas as colunas (NaN enquanto não houver `janela` preços)"""
+    media = np.full((len(somas) - 1, somas.shape[1]), np.nan)
+    if janela <= len(media):
+        completas = contagens[janela:] - contagens[:-janela] == janela
+        media[janela - 1:] = np.where(completas, (somas[janela:] - somas[:-janela]) / janela, np.nan)
+    return media
+
+
+def sinal_cruzamento(somas, contagens, curta, longa):
+    """Posição de cada pregão: comprado (1) no dia seguinte ao da média curta acima da longa"""
+    with np.errstate(invalid='ignore'):
+        acima = media_movel(somas, contagens, curta) > media_movel(somas, contagens, longa)
+    posicoes = np.zeros(acima.shape)
+    posicoes[1:] = acima[:-1]
+    return posicoes
+
+
+def avaliar_posicoes(posicoes, retornos, custo=0.0):
+    """Métricas de COLUNAS_BACKTEST (ativos × métricas) das posições sobre os retornos
+
+    `custo` é a fração do capital paga a cada compra ou venda. Retorno total, volatilidade
+    (diária), máximo drawdown (negativo, como em indicadores.drawdowns) e exposição (fração
+    dos pregões comprado) em %; giro é a soma das variações de posição (2 = uma compra e
+    uma venda do capital inteiro). Sem pregões todas as métricas são NaN.
+    """
+    if len(posicoes) == 0:
+        return np.full((posicoes.shape[1], len(COLUNAS_BACKTEST)), np.nan)
+    validos = ~np.isnan(retornos)
+    variacoes = np.abs(np.diff(posicoes, axis=0, prepend=0.0))
+    estrategia = posicoes * np.where(validos, retornos, 0.0) - custo * variacoes
+
+    patrimonio = np.cumprod(1 + estrategia, axis=0)
+    drawdown = patrimonio / np.maximum.accumulate(patrimonio, axis=0) - 1
+    pregoes = validos.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volatilidade = np.nanstd(np.where(validos, estrategia, np.nan), axis=0, ddof=1)
+        exposicao = (posicoes * validos).sum(axis=0) / pregoes
+
+    return np.column_stack([
+        (patrimonio[-1] - 1) * 100,
+        volatilidade * 100,
+        drawdown.min(axis=0) * 100,
+        variacoes.sum(axis=0),
+        exposicao * 100,
+    ])
+
+
+def avaliar_cruzamentos(parametros, somas, contagens, retornos, custo=0.0):
+    """Métricas (parâmetros × ativos × métricas) de um lote de pares (curta, longa)"""
+    return np.stack([avaliar_posicoes(sinal_cruzamento(somas, contagens, curta, longa), retornos, custo)
+                     for curta, longa in parametros])
+
+
+def _iniciar_trabalhador(descritor, custo):
+    bloco, matrizes = MatrizesCompartilhadas.anexar(descritor)
+    _ESTADO.update(bloco=bloco, custo=custo, **matrizes)
+
+
+def _avaliar_lote(parametros):
+    """avaliar_cruzamentos num processo da varredura, sobre as matrizes do _ESTADO"""
+    return avaliar_cruzamentos(parametros, _ESTADO['somas'], _ESTADO['contagens'], _ESTADO['retornos'],
+                               _ESTADO['custo'])
+
+
+class Backtest:
+    """Backtests vetorizados sobre a matriz larga de preços (data × ativo)
+
+    Sinais, posições e métricas são operações sobre a matriz inteira, todos os ativos
+    de uma vez; as grades de parâmetros são divididas entre processos que leem as
+    matrizes de memória compartilhada.
+    """
+
+    def __init__(self, precos, custo=0.0):
+        self.ativos = list(precos.columns)
+        self.custo = custo
+        self.matrizes = preparar(precos)
+        self.pregoes = len(precos)
+
+    def _tabela(self, valores):
+        return pd.DataFrame(valores, index=pd.Index(self.ativos, name='Ativo'), columns=COLUNAS_BACKTEST)
+
+    def _avaliar(self, parametros):
+        return avaliar_cruzamentos(parametros, self.matrizes['somas'], self.matrizes['contagens'],
+                                   self.matrizes['retornos'], self.custo)
+
+    def comprar_e_manter(self):
+        """Métricas de ficar comprado o período todo (a referência das estratégias)"""
+        posicoes = (self.matrizes['contagens'][1:] > 0).astype(np.float64)
+        return self._tabela(avaliar_posicoes(posicoes, self.matrizes['retornos'], self.custo))
+
+    def cruzamento_medias(self, curta=20, longa=50):
+        """Métricas da estratégia de cruzamento de médias móveis (comprado com a curta acima da longa)"""
+        return self._tabela(self._avaliar([(curta, longa)])[0])
+
+    def varrer(self, curtas=CURTAS_PADRAO, longas=LONGAS_PADRAO, trabalhadores=1):
+        """Métricas do cruzamento para cada par curta < longa da grade
+
+        Devolve um DataFrame indexado por (curta, longa, Ativo). Com `trabalhadores` > 1
+        os pares são divididos entre processos sobre as mesmas matrizes compartilhadas.
+        """
+        parametros = [(curta, longa) for curta in curtas for longa in longas if curta < longa]
+        if not parametros:
+            raise ValueError("A grade não tem nenhum par com a média curta menor que a longa")
+        if trabalhadores == 1 or len(parametros) <= 1:
+            valores = self._avaliar(parametros)
+        else:
+            lote = max(1, -(-len(parametros) // (trabalhadores * 4)))
+            lotes = [parametros[i:i + lote] for i in range(0, len(parametros), lote)]
+            with MatrizesCompartilhadas(**self.matrizes) as compartilhadas:
+                with ProcessPoolExecutor(trabalhadores, initializer=_iniciar_trabalhador,
+                                         initargs=(compartilhadas.descritor, self.custo)) as executor:
+                    valores = np.concatenate(list(executor.map(_avaliar_lote, lotes)))
+
+        indice = pd.MultiIndex.from_tuples([(curta, longa, ativo) for curta, longa in parametros for ativo in self.ativos],
+                                           names=['curta', 'longa', 'Ativo'])
+        return pd.DataFrame(valores.reshape(-1, len(COLUNAS_BACKTEST)), index=indice, columns=COLUNAS_BACKTEST)
+
+
+def melhores_parametros(varredura, metrica='retorno_total'):
+    """Linha da varredura com a maior `metrica` para cada ativo (curta e longa como colunas)"""
+    tabela = varredura.reset_index()
+    melhores = tabela.loc[tabela.groupby('Ativo', sort=False)[metrica].idxmax().dropna()]
+    return melhores.set_index('Ativo')
@@ -0,0 +1,66 @@
+"""Benchmark do backtest de cruzamento de médias: laço por pregão × vetorizado × processos
+
+500 ativos sintéticos com 10 anos de pregões e uma grade de 8 × 8 médias. O laço por
+pregão (um ativo e um par de médias por vez, como um backtest escrito à mão) é medido
+numa amostra e extrapolado para a grade inteira.
+
+    python benchmarks/bench_backtest.py
+"""
+import os
+import sys
+import time
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO)
+
+import numpy as np
+
+from backtest import Backtest
+from fontes_dados import FonteSintetica, universo_sintetico
+
+ATIVOS = 500
+CURTAS = [5, 10, 15, 20, 30, 40, 50, 60]
+LONGAS = [70, 80, 100, 120, 150, 180, 200, 250]
+AMOSTRA_LACO = 5
+
+
+def cruzamento_laco(serie, curta, longa, custo):
+    """Retorno total (%) do cruzamento com um laço Python por pregão"""
+    patrimonio, posicao = 1.0, 0.0
+    for t in range(longa + 1, len(serie)):
+        nova = 1.0 if serie[t - curta - 1:t - 1].mean() > serie[t - longa - 1:t - 1].mean() else 0.0
+        patrimonio *= 1 + nova * (serie[t] / serie[t - 1] - 1) - custo * abs(nova - posicao)
+        posicao = nova
+    return (patrimonio - 1) * 100
+
+
+def main():
+    dados = FonteSintetica().baixar(universo_sintetico(ATIVOS), periodo='10y')
+    precos = dados['Close']
+    combinacoes = len(CURTAS) * len(LONGAS)
+    execucoes = combinacoes * ATIVOS
+    print(f"{ATIVOS} ativos × {len(precos)} pregões, grade {len(CURTAS)}×{len(LONGAS)} "
+          f"({execucoes} backtests), {os.cpu_count()} CPU(s)\n")
+    print(f"{'cenário':<44} {'total (s)':>10} {'backtests/s':>12}")
+
+    serie = precos.iloc[:, 0].to_numpy(dtype=np.float64)
+    inicio = time.perf_counter()
+    for curta, longa in zip(CURTAS[:AMOSTRA_LACO], LONGAS[:AMOSTRA_LACO]):
+        cruzamento_laco(serie, curta, longa, 0.001)
+    por_execucao = (time.perf_counter() - inicio) / AMOSTRA_LACO
+    print(f"{'laço por pregão (extrapolado)':<44} {por_execucao * execucoes:>10.1f} {1 / por_execucao:>12.0f}")
+
+    inicio = time.perf_counter()
+    backtest = Backtest(precos, custo=0.001)
+    preparo = time.perf_counter() - inicio
+    processos = max(os.cpu_count(), 2)
+    cenarios = [('vetorizado, 1 processo', 1), (f'vetorizado, {processos} processos (mem. compart.)', processos)]
+    for nome, trabalhadores in cenarios:
+        inicio = time.perf_counter()
+        backtest.varrer(CURTAS, LONGAS, trabalhadores=trabalhadores)
+        total = preparo + time.perf_counter() - inicio
+        print(f"{nome:<44} {total:>10.1f} {execucoes / total:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark da exportação: CSV único × partições .npy por ativo e ano
+
+500 ativos sintéticos com 5 anos de pregões no formato longo do main.py. Mede gravação
+completa, regravação com um pregão novo, leitura completa, leitura de um ativo (uma
+coluna) e de um mês de todos os ativos, além do tamanho em disco.
+
+    python benchmarks/bench_exportacao.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO)
+
+import pandas as pd
+
+from fontes_dados import FonteSintetica, universo_sintetico
+from particoes import exportar_particionado, ler_particionado
+
+ATIVOS = 500
+PERIODO = '5y'
+COLUNA_PRECO = 'Preço de Fechamento'
+
+
+def tamanho(caminho):
+    if os.path.isfile(caminho):
+        return os.path.getsize(caminho)
+    return sum(os.path.getsize(os.path.join(raiz, nome)) for raiz, _, nomes in os.walk(caminho) for nome in nomes)
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def main():
+    ativos = universo_sintetico(ATIVOS)
+    download = FonteSintetica().baixar(ativos, periodo=PERIODO)
+    dados = download.stack(level=1).reset_index()
+    dados.columns = ['Data', 'Ativo', COLUNA_PRECO, 'Volume']
+    ultimo = dados['Data'].max()
+    anterior = dados[dados['Data'] < ultimo]
+    ativo = ativos[len(ativos) // 2]
+    inicio_mes = ultimo - pd.DateOffset(months=1)
+    print(f"{len(dados)} linhas ({ATIVOS} ativos, {PERIODO})\n")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        csv = os.path.join(diretorio, 'dados_ativos.csv')
+        particoes = os.path.join(diretorio, 'dados_ativos')
+
+        def ler_csv():
+            return pd.read_csv(csv, parse_dates=['Data'])
+
+        cronometrar(lambda: anterior.to_csv(csv, index=False))
+        exportar_particionado(anterior, particoes)
+        linhas = [
+            ('gravação completa', cronometrar(lambda: dados.to_csv(csv + '.novo', index=False)),
+             cronometrar(lambda: exportar_particionado(dados, particoes + '.novo'))),
+            ('regravação com 1 pregão novo', cronometrar(lambda: dados.to_csv(csv, index=False)),
+             cronometrar(lambda: exportar_particionado(dados, particoes))),
+            ('leitura completa', cronometrar(ler_csv),
+             cronometrar(lambda: ler_particionado(particoes))),
+            ('leitura completa (memória mapeada)', cronometrar(ler_csv),
+             cronometrar(lambda: ler_particionado(particoes, mmap=True))),
+            ('1 ativo, só o preço', cronometrar(
+                lambda: ler_csv().loc[lambda tabela: tabela['Ativo'] == ativo, ['Data', COLUNA_PRECO]]),
+             cronometrar(lambda: ler_particionado(particoes, [COLUNA_PRECO], [ativo]))),
+            ('último mês, todos os ativos', cronometrar(
+                lambda: ler_csv().loc[lambda tabela: tabela['Data'] >= inicio_mes]),
+             cronometrar(lambda: ler_particionado(particoes, inicio=inicio_mes))),
+        ]
+
+        print(f"{'operação':<36} {'CSV (s)':>9} {'partições (s)':>14} {'ganho':>7}")
+        for nome, tempo_csv, tempo_particoes in linhas:
+            print(f"{nome:<36} {tempo_csv:>9.3f} {tempo_particoes:>14.3f} {tempo_csv / tempo_particoes:>6.1f}×")
+        print(f"\ntamanho em disco: CSV {tamanho(csv) / 1024 ** 2:.1f} MB | "
+              f"partições {tamanho(particoes) / 1024 ** 2:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
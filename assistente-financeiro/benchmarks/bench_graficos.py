@@ -0,0 +1,84 @@
+"""Benchmark da renderização de gráficos: pyplot original × RenderizadorGraficos
+
+16 ativos sintéticos com 10 anos de pregões (~2.600 pontos por série): 120 gráficos de
+pares + 16 de ativos. O caminho original (pyplot, dpi 300, tight_layout, figura nova
+por gráfico) é medido numa amostra de pares e extrapolado por gráfico.
+
+    python benchmarks/bench_graficos.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO)
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+from correlacao import MatrizCorrelacao
+from fontes_dados import FonteSintetica, universo_sintetico
+from graficos import RenderizadorGraficos, resumir_tempos
+
+ATIVOS = 16
+AMOSTRA_PYPLOT = 6
+
+
+def par_pyplot(precos, ativo1, ativo2, correlacao, caminho):
+    """O gráfico de par como analisar_correlacao desenhava antes (sem o plt.show)"""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    ax1.scatter(precos[ativo1], precos[ativo2], alpha=0.6, color='blue')
+    ax1.set_title(f'Correlação: {ativo1} vs {ativo2}\n(r = {correlacao:.3f})')
+    ax1.grid(True, alpha=0.3)
+    validos = precos[[ativo1, ativo2]].dropna()
+    reta = np.poly1d(np.polyfit(validos[ativo1], validos[ativo2], 1))
+    ax1.plot(validos[ativo1], reta(validos[ativo1]), "r--", alpha=0.8)
+    ax2.plot(precos.index, precos[ativo1], label=ativo1, linewidth=2)
+    ax2.plot(precos.index, precos[ativo2], label=ativo2, linewidth=2)
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+    ax2.tick_params(axis='x', rotation=45)
+    plt.tight_layout()
+    plt.savefig(caminho, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+def main():
+    dados = FonteSintetica().baixar(universo_sintetico(ATIVOS), periodo='10y')
+    precos, volumes = dados['Close'], dados['Volume']
+    correlacoes = MatrizCorrelacao.de_precos(precos)
+    print(f"{ATIVOS} ativos × {len(precos)} pregões, {os.cpu_count()} CPU(s)\n")
+    print(f"{'cenário':<42} {'gráficos':>8} {'total (s)':>10} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        renderizador = RenderizadorGraficos(precos, volumes)
+        pares = [(a, b) for i, a in enumerate(renderizador.ativos) for b in renderizador.ativos[i + 1:]]
+
+        tempos = []
+        for ativo1, ativo2 in pares[:AMOSTRA_PYPLOT]:
+            inicio = time.perf_counter()
+            par_pyplot(precos, ativo1, ativo2, correlacoes.par(ativo1, ativo2), os.path.join(diretorio, 'x.png'))
+            tempos.append(('', time.perf_counter() - inicio))
+        resumo = resumir_tempos(tempos)
+        total = resumo['media'] * (len(pares) + ATIVOS)
+        print(f"{'pyplot, dpi 300 (extrapolado)':<42} {len(pares) + ATIVOS:>8} {total:>10.1f} "
+              f"{resumo['p50'] * 1000:>9.0f} {resumo['p95'] * 1000:>9.0f}")
+
+        cenarios = [('Figure reaproveitada, dpi 100, sem redução', 1, None),
+                    ('+ redução para 1.000 pontos', 1, 1000),
+                    (f'+ pool com {os.cpu_count()} processo(s)', os.cpu_count(), 1000)]
+        for nome, trabalhadores, max_pontos in cenarios:
+            renderizador = RenderizadorGraficos(precos, volumes, trabalhadores, max_pontos)
+            trabalhos = (renderizador.trabalhos_pares(correlacoes, os.path.join(diretorio, 'pares'))
+                         + renderizador.trabalhos_ativos(os.path.join(diretorio, 'ativos')))
+            inicio = time.perf_counter()
+            resumo = resumir_tempos(renderizador.renderizar(trabalhos))
+            print(f"{nome:<42} {resumo['graficos']:>8} {time.perf_counter() - inicio:>10.1f} "
+                  f"{resumo['p50'] * 1000:>9.0f} {resumo['p95'] * 1000:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark dos indicadores técnicos: laço por ativo (pandas) × matriz data × ativo
+
+500 ativos sintéticos com 10 anos de pregões. O laço por ativo calcula, para cada série,
+MM20, MM50, MME20, RSI(14), Bollinger, drawdown máximo com duração e beta, como um
+script escrito à mão; a versão vetorizada (Indicadores.tabela) faz cada indicador de uma
+vez sobre a matriz inteira. A segunda consulta sai do cache.
+
+    python benchmarks/bench_indicadores.py
+"""
+import os
+import sys
+import time
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO)
+
+import numpy as np
+import pandas as pd
+
+from fontes_dados import FonteSintetica, universo_sintetico
+from indicadores import INDICE_REFERENCIA, Indicadores
+
+ATIVOS = 500
+
+
+def laco_por_ativo(precos, indice):
+    retornos_indice = indice.pct_change()
+    linhas = {}
+    for ativo in precos.columns:
+        serie = precos[ativo].dropna()
+        variacoes = serie.diff()
+        ganhos = variacoes.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+        perdas = (-variacoes).clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+        media, desvio = serie.rolling(20).mean(), serie.rolling(20).std(ddof=0)
+        queda = serie / serie.cummax() - 1
+        submerso = (queda < 0).astype(int)
+        retornos = serie.pct_change()
+        pares = pd.concat([retornos, retornos_indice], axis=1).dropna()
+        linhas[ativo] = {
+            'mm_20': media.iloc[-1],
+            'mm_50': serie.rolling(50).mean().iloc[-1],
+            'mme_20': serie.ewm(span=20, adjust=False).mean().iloc[-1],
+            'rsi_14': (100 - 100 / (1 + ganhos / perdas)).iloc[-1],
+            'bollinger_inferior': (media - 2 * desvio).iloc[-1],
+            'bollinger_superior': (media + 2 * desvio).iloc[-1],
+            'max_drawdown': queda.min() * 100,
+            'duracao_drawdown': submerso.groupby((submerso == 0).cumsum()).sum().max(),
+            'beta': np.cov(pares.iloc[:, 0], pares.iloc[:, 1])[0, 1] / pares.iloc[:, 1].var(),
+        }
+    return pd.DataFrame.from_dict(linhas, orient='index')
+
+
+def main():
+    fonte = FonteSintetica()
+    precos = fonte.baixar(universo_sintetico(ATIVOS), periodo='10y')['Close']
+    indice = fonte.baixar([INDICE_REFERENCIA], periodo='10y')['Close'][INDICE_REFERENCIA]
+    print(f"{ATIVOS} ativos × {len(precos)} pregões\n")
+    print(f"{'cenário':<36} {'tempo (s)':>10}")
+
+    inicio = time.perf_counter()
+    referencia = laco_por_ativo(precos, indice)
+    print(f"{'laço por ativo (pandas)':<36} {time.perf_counter() - inicio:>10.3f}")
+
+    inicio = time.perf_counter()
+    indicadores = Indicadores(precos, indice)
+    tabela = indicadores.tabela()
+    print(f"{'matriz data × ativo':<36} {time.perf_counter() - inicio:>10.3f}")
+
+    inicio = time.perf_counter()
+    indicadores.tabela()
+    print(f"{'segunda consulta (cache)':<36} {time.perf_counter() - inicio:>10.6f}")
+
+    diferenca = (tabela[referencia.columns] - referencia).abs().max().max()
+    print(f"\nmaior diferença para o laço: {diferenca:.2e}")
+
+
+if __name__ == "__main__":
+    main()
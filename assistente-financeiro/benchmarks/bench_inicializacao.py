@@ -0,0 +1,99 @@
+"""Benchmark de inicialização: tempo de importação e tempo até a primeira resposta
+
+1. `python -X importtime -c "import assistente"`: total e os pacotes mais caros, comparado
+   com a importação antiga (que também carregava yfinance e matplotlib.pyplot).
+2. Tempo até a primeira resposta num processo novo, partindo do zero (carga pela
+   FonteSintetica, sem rede) e de um snapshot em disco (AssistenteAtivos.de_snapshot).
+
+    python benchmarks/bench_inicializacao.py
+"""
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+INICIO_PROCESSO = time.perf_counter()
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO)
+
+TAMANHOS = [4, 100, 500]
+PERGUNTA = "Qual a volatilidade dos ativos?"
+REPETICOES = 3
+
+
+def tempos_de_importacao(codigo):
+    """(total em ms, {pacote: ms acumulado}) de `python -X importtime -c codigo`
+
+    O total soma as importações de primeiro nível; cada pacote (nome antes do primeiro
+    ponto) fica com o maior tempo acumulado em que aparece.
+    """
+    saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], cwd=DIRETORIO,
+                           capture_output=True, text=True, check=True)
+    total, pacotes = 0.0, {}
+    for linha in saida.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, acumulado, nome = linha[len('import time:'):].split('|')
+        acumulado = int(acumulado) / 1000
+        if not nome.startswith('  '):
+            total += acumulado
+        pacote = nome.strip().split('.')[0]
+        pacotes[pacote] = max(pacotes.get(pacote, 0.0), acumulado)
+    return total, pacotes
+
+
+def primeira_resposta(quantidade, snapshot):
+    """Executado no subprocesso: carrega o assistente e responde uma pergunta"""
+    from assistente import AssistenteAtivos
+    from fontes_dados import FonteSintetica, universo_sintetico
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if snapshot:
+            assistente = AssistenteAtivos.de_snapshot(snapshot, fonte=FonteSintetica())
+        else:
+            assistente = AssistenteAtivos(universo_sintetico(quantidade), fonte=FonteSintetica())
+        assistente.processar_pergunta(PERGUNTA)
+    return time.perf_counter() - INICIO_PROCESSO
+
+
+def medir(quantidade, snapshot=''):
+    melhores = []
+    for _ in range(REPETICOES):
+        saida = subprocess.run([sys.executable, __file__, str(quantidade), snapshot],
+                               capture_output=True, text=True, check=True)
+        melhores.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return min(melhores)
+
+
+def main():
+    if len(sys.argv) == 3:
+        print(json.dumps(primeira_resposta(int(sys.argv[1]), sys.argv[2] or None)))
+        return
+
+    total, pacotes = tempos_de_importacao("import assistente")
+    total_antigo, _ = tempos_de_importacao("import yfinance, matplotlib.pyplot, assistente")
+    print(f"import assistente: {total:.0f} ms (com yfinance + matplotlib.pyplot: {total_antigo:.0f} ms)")
+    pacotes.pop('assistente')
+    for nome, ms in sorted(pacotes.items(), key=lambda item: -item[1])[:8]:
+        print(f"  {nome:<20} {ms:>8.1f} ms")
+
+    from assistente import AssistenteAtivos
+    from fontes_dados import FonteSintetica, universo_sintetico
+
+    print(f"\n{'ativos':>7} {'do zero (s)':>12} {'snapshot (s)':>13}")
+    for quantidade in TAMANHOS:
+        with tempfile.TemporaryDirectory() as diretorio:
+            with contextlib.redirect_stdout(io.StringIO()):
+                AssistenteAtivos(universo_sintetico(quantidade), fonte=FonteSintetica()).salvar_snapshot(diretorio)
+            frio = medir(quantidade)
+            quente = medir(quantidade, diretorio)
+        print(f"{quantidade:>7} {frio:>12.3f} {quente:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
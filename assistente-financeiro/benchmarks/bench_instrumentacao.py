@@ -0,0 +1,64 @@
+"""Benchmark do custo da instrumentação no caminho mais curto (pergunta já no cache de respostas)
+
+Com a instrumentação desligada cada pergunta passa por um rastro e duas etapas que
+devolvem o gerenciador vazio; ligada, elas cronometram, contam e escrevem a linha JSON
+do log (aqui num StringIO). Também mede o perfilador por amostragem ligado.
+
+    python benchmarks/bench_instrumentacao.py
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO)
+
+from assistente import AssistenteAtivos
+from fontes_dados import FonteSintetica
+from instrumentacao import instrumentacao
+
+PERGUNTAS = ["Qual a volatilidade dos ativos?", "Preços mínimos dos ativos", "Resumo do PETR4.SA"]
+REPETICOES = 20_000
+
+
+def por_pergunta(assistente):
+    """Microssegundos por pergunta (melhor de 3 rodadas)"""
+    melhores = []
+    for _ in range(3):
+        inicio = time.perf_counter()
+        for i in range(REPETICOES):
+            assistente.processar_pergunta(PERGUNTAS[i % len(PERGUNTAS)])
+        melhores.append((time.perf_counter() - inicio) / REPETICOES * 1e6)
+    return min(melhores)
+
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        assistente = AssistenteAtivos(fonte=FonteSintetica())
+    for pergunta in PERGUNTAS:
+        assistente.processar_pergunta(pergunta)
+
+    inicio = time.perf_counter()
+    for _ in range(1_000_000):
+        with instrumentacao.etapa('x'):
+            pass
+    vazia = (time.perf_counter() - inicio) * 1000
+
+    desligada = por_pergunta(assistente)
+    instrumentacao.ativar(io.StringIO())
+    ligada = por_pergunta(assistente)
+    instrumentacao.perfilar()
+    perfilando = por_pergunta(assistente)
+    instrumentacao.desativar()
+
+    print(f"etapa desligada: {vazia:.0f} ns por `with`\n")
+    print(f"{'cenário':<36} {'µs/pergunta':>12} {'custo':>8}")
+    for nome, valor in [('desligada', desligada), ('ligada (log JSON)', ligada),
+                        ('ligada + perfilador (5 ms)', perfilando)]:
+        print(f"{nome:<36} {valor:>12.2f} {valor / desligada - 1:>+8.0%}")
+
+
+if __name__ == "__main__":
+    main()
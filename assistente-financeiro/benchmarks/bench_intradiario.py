@@ -0,0 +1,90 @@
+"""Benchmark da ingestão intradiária: eventos por segundo e custo de leitura do painel
+
+1 milhão de negócios sintéticos de 500 ativos. Compara a atualização O(1) por negócio
+(IngestaoIntradiaria) com o caminho ingênuo de acumular os negócios e refazer as
+métricas com pandas (groupby) a cada lote, e mede a reprodução por arquivo e por socket.
+
+    python benchmarks/bench_intradiario.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO)
+
+import numpy as np
+import pandas as pd
+
+from fontes_dados import universo_sintetico
+from intradiario import (FonteNegociosSintetica, IngestaoIntradiaria, ReprodutorArquivo, ReprodutorSocket,
+                         gravar_negocios, transmitir_arquivo)
+
+ATIVOS = 500
+NEGOCIOS = 1_000_000
+AMOSTRA_INGENUA = 50_000
+LOTE_INGENUO = 1_000
+
+
+def ingenuo(negocios, lote):
+    """Acumula os negócios e refaz preço, volume e volatilidade por barra com pandas a cada `lote`"""
+    acumulados = []
+    for i, negocio in enumerate(negocios, 1):
+        acumulados.append(negocio)
+        if i % lote == 0:
+            tabela = pd.DataFrame(acumulados, columns=['instante', 'ativo', 'preco', 'quantidade'])
+            tabela['barra'] = tabela['instante'] // 60
+            fechamentos = tabela.groupby(['ativo', 'barra'])['preco'].last()
+            volatilidade = np.log(fechamentos).groupby(level=0).diff().groupby(level=0).std()
+            painel = tabela.groupby('ativo').agg(preco_atual=('preco', 'last'), volume=('quantidade', 'sum'))
+            painel['volatilidade'] = volatilidade
+
+
+def main():
+    ativos = universo_sintetico(ATIVOS)
+    inicio = time.perf_counter()
+    negocios = list(FonteNegociosSintetica(ativos, NEGOCIOS, espacamento=0.02))
+    print(f"{NEGOCIOS} negócios de {ATIVOS} ativos gerados em {time.perf_counter() - inicio:.1f} s\n")
+    print(f"{'cenário':<44} {'total (s)':>10} {'eventos/s':>12}")
+
+    amostra = negocios[:AMOSTRA_INGENUA]
+    inicio = time.perf_counter()
+    ingenuo(amostra, LOTE_INGENUO)
+    total = time.perf_counter() - inicio
+    print(f"{f'pandas a cada {LOTE_INGENUO} negócios ({AMOSTRA_INGENUA} negócios)':<44} "
+          f"{total:>10.2f} {AMOSTRA_INGENUA / total:>12.0f}")
+
+    ingestao = IngestaoIntradiaria()
+    inicio = time.perf_counter()
+    ingestao.consumir(negocios)
+    total = time.perf_counter() - inicio
+    print(f"{'O(1) por negócio, em memória':<44} {total:>10.2f} {NEGOCIOS / total:>12.0f}")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'negocios.csv')
+        gravar_negocios(caminho, negocios)
+
+        inicio = time.perf_counter()
+        IngestaoIntradiaria().consumir(ReprodutorArquivo(caminho))
+        total = time.perf_counter() - inicio
+        print(f"{'O(1) por negócio, reprodução de arquivo':<44} {total:>10.2f} {NEGOCIOS / total:>12.0f}")
+
+        servidor, porta = transmitir_arquivo(caminho)
+        try:
+            inicio = time.perf_counter()
+            IngestaoIntradiaria().consumir(ReprodutorSocket('127.0.0.1', porta))
+            total = time.perf_counter() - inicio
+        finally:
+            servidor.shutdown()
+        print(f"{'O(1) por negócio, socket TCP local':<44} {total:>10.2f} {NEGOCIOS / total:>12.0f}")
+
+    repeticoes = 20
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        ingestao.painel()
+    print(f"\npainel de {ATIVOS} ativos (montado na leitura): {(time.perf_counter() - inicio) / repeticoes * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
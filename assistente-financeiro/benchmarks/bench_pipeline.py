@@ -0,0 +1,58 @@
+"""Benchmark do pipeline da análise completa: sequencial × paralelo, frio × checkpoints
+
+Roda `executar_analise` do main.py num diretório temporário com a FonteSintetica: sem
+checkpoints uma etapa por vez, sem checkpoints em paralelo, de novo com tudo guardado e
+depois de apagar a fronteira eficiente (só a otimização é refeita).
+
+    python benchmarks/bench_pipeline.py
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO)
+
+import matplotlib
+matplotlib.use('Agg')
+
+from fontes_dados import FonteSintetica
+import main as analise
+
+
+def rodar(fonte, trabalhadores=None, refazer=False):
+    os.environ['ASSISTENTE_REFAZER'] = '1' if refazer else '0'
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as saida:
+        analise.executar_analise(trabalhadores, fonte)
+    acertos = saida.getvalue().rsplit('|', 1)[-1].strip()
+    return time.perf_counter() - inicio, acertos
+
+
+def main():
+    fonte = FonteSintetica()
+    original = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            rodar(fonte, refazer=True)
+            cenarios = [
+                ('sem checkpoints, 1 etapa por vez', rodar(fonte, trabalhadores=1, refazer=True)),
+                ('sem checkpoints, em paralelo', rodar(fonte, refazer=True)),
+                ('com checkpoints', rodar(fonte)),
+            ]
+            os.remove('fronteira_eficiente.png')
+            cenarios.append(('sem a fronteira eficiente', rodar(fonte)))
+        finally:
+            os.chdir(original)
+
+    print(f"{'cenário':<36} {'tempo (s)':>10}  cache")
+    for nome, (segundos, acertos) in cenarios:
+        print(f"{nome:<36} {segundos:>10.3f}  {acertos}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Micro-benchmark do roteamento de perguntas (perguntas por segundo)
+
+Compara o RoteadorIntencoes com a cascata de testes por substring que o
+processar_pergunta usava, num universo sintético de 500 ativos.
+
+    python benchmarks/bench_roteador.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fontes_dados import universo_sintetico
+from roteador import RoteadorIntencoes
+
+PERGUNTAS = [
+    "Qual ativo teve maior volatilidade?",
+    "Melhor e pior desempenho",
+    "Preços atuais dos ativos",
+    "Preços mínimos dos ativos",
+    "Correlação entre S01003.SA e S02003.SA",
+    "Correlação S01003 e S02003",
+    "Resumo do S04993.SA",
+    "Informações da S00103",
+    "Volume de negociação",
+    "Qual ativo é mais arriscado?",
+    "Mais correlacionados com S03003.SA",
+    "Qual a cotação máxima histórica?",
+    "Bom dia, tudo bem?",
+]
+
+
+def cascata(pergunta, ativos):
+    """Reprodução da cascata original (substrings + laço sobre todos os ativos)"""
+    pergunta = pergunta.lower().strip()
+    grupos = [['volatil', 'risco', 'oscila'], ['retorno', 'desempenho', 'lucro', 'rendimento'],
+              ['preço', 'valor', 'cotação'], ['volume', 'negocia'],
+              ['correlação', 'relação', 'diversificação'], ['resumo', 'info', 'detalhe']]
+    for indice, palavras in enumerate(grupos):
+        if any(palavra in pergunta for palavra in palavras):
+            if indice >= 4:
+                return indice, [ativo for ativo in ativos if ativo.lower() in pergunta]
+            return indice, []
+    return None, []
+
+
+def medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for pergunta in PERGUNTAS:
+            funcao(pergunta)
+    return repeticoes * len(PERGUNTAS) / (time.perf_counter() - inicio)
+
+
+def main(quantidade=500, repeticoes=2000):
+    ativos = universo_sintetico(quantidade)
+    inicio = time.perf_counter()
+    roteador = RoteadorIntencoes(ativos)
+    compilacao = time.perf_counter() - inicio
+
+    print(f"Universo: {quantidade} ativos, corpus de {len(PERGUNTAS)} perguntas")
+    print(f"Compilação do roteador: {compilacao * 1000:.1f} ms")
+    print(f"Cascata original: {medir(lambda p: cascata(p, ativos), repeticoes // 10):>10,.0f} perguntas/s")
+    print(f"RoteadorIntencoes: {medir(roteador.rotear, repeticoes):>9,.0f} perguntas/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark de carga do AssistenteAtivos para universos de 4, 100 e 500 ativos
+
+Usa a FonteSintetica (sem rede) e roda cada cenário num subprocesso separado para
+que o pico de memória (RSS) de um não contamine o outro.
+
+    python benchmarks/bench_universo.py
+"""
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO)
+
+TAMANHOS = [4, 100, 500]
+
+
+def medir(quantidade, compacto):
+    """Carrega o universo sintético e devolve tempo, RSS de pico e memória dos dados"""
+    from assistente import AssistenteAtivos
+    from fontes_dados import FonteSintetica, universo_sintetico
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        assistente = AssistenteAtivos(universo_sintetico(quantidade), fonte=FonteSintetica(),
+                                      compacto=compacto)
+    return {
+        'ativos': quantidade,
+        'compacto': compacto,
+        'carga_s': time.perf_counter() - inicio,
+        'rss_pico_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'dados_mb': assistente.memoria_utilizada() / 1024 ** 2,
+    }
+
+
+def main():
+    if len(sys.argv) == 3:
+        print(json.dumps(medir(int(sys.argv[1]), sys.argv[2] == '1')))
+        return
+
+    print(f"{'ativos':>7} {'modo':>9} {'carga (s)':>10} {'RSS pico (MB)':>14} {'dados (MB)':>11}")
+    for quantidade in TAMANHOS:
+        for compacto in (False, True):
+            saida = subprocess.run([sys.executable, __file__, str(quantidade), str(int(compacto))],
+                                   capture_output=True, text=True, check=True)
+            resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+            modo = 'compacto' if compacto else 'padrão'
+            print(f"{quantidade:>7} {modo:>9} {resultado['carga_s']:>10.3f} "
+                  f"{resultado['rss_pico_mb']:>14.1f} {resultado['dados_mb']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Teste de carga do servidor HTTP com a fonte sintética local
+
+Sobe o ServidorAssistente numa thread (porta livre) e dispara requisições
+concorrentes com conexões keep-alive, reportando p50/p99 e requisições/s.
+
+    python benchmarks/carga_servidor.py [--ativos 100] [--conexoes 32] [--requisicoes 5000]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistente import AssistenteAtivos
+from fontes_dados import FonteSintetica, universo_sintetico
+from servidor import ServidorAssistente
+
+PERGUNTAS = [
+    "Qual ativo teve maior volatilidade?",
+    "Melhor e pior desempenho",
+    "Preços atuais dos ativos",
+    "Correlação entre S00003 e S00013",
+    "Resumo do S00023.SA",
+    "Volume de negociação",
+    "Mais correlacionados com S00033",
+]
+
+
+def iniciar_servidor(quantidade):
+    """Sobe o servidor numa thread daemon e devolve a porta escolhida"""
+    def criar_assistente():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return AssistenteAtivos(universo_sintetico(quantidade), fonte=FonteSintetica())
+
+    servidor = ServidorAssistente(criar_assistente)
+    porta = []
+    pronto = threading.Event()
+
+    def rodar():
+        asyncio.run(servidor.servir(porta=0, pronto=lambda p: (porta.append(p), pronto.set())))
+
+    threading.Thread(target=rodar, daemon=True).start()
+    pronto.wait()
+    return porta[0]
+
+
+async def cliente(porta, fila, latencias):
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    while True:
+        try:
+            indice = fila.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        corpo = json.dumps({'pergunta': PERGUNTAS[indice % len(PERGUNTAS)]}).encode('utf-8')
+        inicio = time.perf_counter()
+        escritor.write(b"POST /perguntar HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                       + f"Content-Length: {len(corpo)}\r\n\r\n".encode() + corpo)
+        await escritor.drain()
+        cabecalho = await leitor.readuntil(b'\r\n\r\n')
+        tamanho = next(int(linha.split(b':')[1]) for linha in cabecalho.split(b'\r\n')
+                       if linha.lower().startswith(b'content-length'))
+        await leitor.readexactly(tamanho)
+        latencias.append(time.perf_counter() - inicio)
+    escritor.close()
+
+
+async def disparar(porta, conexoes, requisicoes):
+    fila = asyncio.Queue()
+    for indice in range(requisicoes):
+        fila.put_nowait(indice)
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(porta, fila, latencias) for _ in range(conexoes)))
+    return latencias, time.perf_counter() - inicio
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p / 100), len(ordenados) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ativos', type=int, default=100)
+    parser.add_argument('--conexoes', type=int, default=32)
+    parser.add_argument('--requisicoes', type=int, default=5000)
+    argumentos = parser.parse_args()
+
+    porta = iniciar_servidor(argumentos.ativos)
+    latencias, duracao = asyncio.run(disparar(porta, argumentos.conexoes, argumentos.requisicoes))
+
+    print(f"Ativos: {argumentos.ativos} | conexões: {argumentos.conexoes} | requisições: {len(latencias)}")
+    print(f"p50: {percentil(latencias, 50) * 1000:.2f} ms")
+    print(f"p99: {percentil(latencias, 99) * 1000:.2f} ms")
+    print(f"Vazão: {len(latencias) / duracao:,.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
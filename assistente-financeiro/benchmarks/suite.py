@@ -0,0 +1,237 @@
+"""Suíte de benchmarks com linha de base: tempo e pico de memória por caso, com alerta de regressão
+
+Cada caso roda sobre dados da FonteSintetica (OHLCV, semente fixa, sem rede) numa escala
+(número de ativos × anos de pregões). O tempo é o menor de `--repeticoes` execuções (o mais
+estável entre rodadas); a memória é o pico alocado numa execução à parte (tracemalloc, que
+também enxerga os arrays do NumPy). Os tempos são comparados relativos a uma carga de
+referência fixa medida na mesma rodada, então a velocidade da máquina se cancela.
+
+A linha de base não é versionada: com `--salvar` os resultados viram a base local da escala
+em `linha_de_base.json`; sem ele, são comparados com ela e a saída é 1 se algum caso piorar
+mais que o limite, ou 2 se a escala (ou algum caso) ainda não tiver base.
+
+    python benchmarks/suite.py --salvar                 # no commit de referência: grava a base
+    python benchmarks/suite.py                          # escala pequena, compara com a base
+    python benchmarks/suite.py -k graficos              # só os casos com 'graficos' no nome
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DIRETORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DIRETORIO)
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pandas as pd
+
+from assistente import AssistenteAtivos
+from cache_respostas import CacheRespostas
+from correlacao import MatrizCorrelacao
+from fontes_dados import FonteDados, FonteSintetica, universo_sintetico
+import main as relatorio
+
+ARQUIVO_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linha_de_base.json')
+ESCALAS = {
+    'pequena': (4, '2y'),
+    'media': (100, '2y'),
+    'grande': (500, '5y'),
+}
+PERGUNTAS = [
+    "Qual a volatilidade dos ativos?",
+    "Qual ativo teve maior retorno nos últimos 90 dias?",
+    "Preços mínimos dos ativos",
+    "Resumo do S00003.SA",
+    "Mais correlacionados com S00013.SA",
+]
+# gráficos ficam limitados aos primeiros ativos: todos os pares de 500 ativos seriam 125 mil arquivos
+ATIVOS_GRAFICOS = 4
+
+
+class FonteFixa(FonteDados):
+    """Devolve sempre o mesmo download já gerado (a carga não mede a geração sintética)"""
+
+    def __init__(self, dados):
+        self.dados = dados
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        return self.dados
+
+
+class Contexto:
+    """Dados de uma escala, gerados uma vez e compartilhados pelos casos"""
+
+    def __init__(self, ativos, periodo):
+        self.ativos = universo_sintetico(ativos)
+        self.download = FonteSintetica(ohlc=True).baixar(self.ativos, periodo=periodo)
+        self.fonte = FonteFixa(self.download)
+        self.assistente = AssistenteAtivos(self.ativos, fonte=self.fonte)
+
+        longo = self.download[['Close', 'Volume']].stack(level=1).reset_index()
+        self.dados = longo.rename(columns={'Date': 'Data', 'Ticker': 'Ativo', 'Close': 'Preço de Fechamento'})
+        self.resultados = relatorio.calcular_rentabilidade_volatilidade(self.dados, self.ativos)
+        self.ativos_graficos = self.ativos[:ATIVOS_GRAFICOS]
+        self.dados_graficos = self.dados[self.dados['Ativo'].isin(self.ativos_graficos)]
+        self.correlacoes_graficos = MatrizCorrelacao.de_precos(
+            self.dados_graficos.pivot(index='Data', columns='Ativo', values='Preço de Fechamento'))
+
+
+def caso_carregar_dados(contexto):
+    contexto.assistente.carregar_dados()
+
+
+def caso_processar_metricas(contexto):
+    contexto.assistente.processar_metricas()
+
+
+def caso_processar_pergunta(contexto):
+    contexto.assistente.cache_respostas = CacheRespostas()
+    contexto.assistente._correlacoes = {}
+    for pergunta in PERGUNTAS:
+        contexto.assistente.processar_pergunta(pergunta)
+
+
+def caso_consultar_correlacao(contexto):
+    contexto.assistente._correlacoes = {}
+    contexto.assistente.consultar_correlacao()
+
+
+def caso_calcular_rentabilidade_volatilidade(contexto):
+    relatorio.calcular_rentabilidade_volatilidade(contexto.dados, contexto.ativos)
+
+
+def caso_graficos_retorno_volatilidade(contexto):
+    relatorio.plotar_retorno_vs_volatilidade(contexto.resultados, 'retorno_vs_volatilidade.png')
+
+
+def caso_graficos_pares_e_ativos(contexto):
+    relatorio.renderizar_graficos(contexto.dados_graficos, contexto.correlacoes_graficos,
+                                  *contexto.ativos_graficos[:2], trabalhadores=1, diretorio='graficos')
+
+
+CASOS = {nome[len('caso_'):]: funcao for nome, funcao in globals().items() if nome.startswith('caso_')}
+
+
+def medir_referencia(repeticoes):
+    """Menor tempo (s) de uma carga fixa de NumPy/pandas: a unidade dos tempos relativos"""
+    valores = np.random.default_rng(0).normal(size=(2000, 200))
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        pd.DataFrame(valores).rolling(20).mean().corr()
+        np.sort(valores, axis=0).cumsum(axis=0)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def medir(funcao, contexto, repeticoes):
+    """(menor tempo em s, pico de memória em MB) de `funcao(contexto)`"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(contexto)
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    try:
+        funcao(contexto)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(tempos), pico / 1024 ** 2
+
+
+def comparar(resultado, base, limite_tempo, limite_memoria, folga_ms=5.0):
+    """Lista das métricas que pioraram além do limite
+
+    O tempo é comparado em unidades da referência (`relativo`); diferenças abaixo de
+    `folga_ms`, convertidas para a referência desta rodada, são ruído.
+    """
+    regressoes = []
+    folga = folga_ms / 1000 * resultado['relativo'] / resultado['tempo']
+    if resultado['relativo'] - base['relativo'] > folga and resultado['relativo'] > base['relativo'] * (1 + limite_tempo):
+        regressoes.append('tempo')
+    if resultado['memoria'] > base['memoria'] * (1 + limite_memoria) + 0.1:
+        regressoes.append('memoria')
+    return regressoes
+
+
+def variacao(atual, anterior):
+    return f"{(atual / anterior - 1) * 100:+.0f}%" if anterior else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks com linha de base")
+    parser.add_argument('--escala', choices=ESCALAS, default='pequena')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--limite-tempo', type=float, default=0.30, help="piora relativa tolerada no tempo")
+    parser.add_argument('--limite-memoria', type=float, default=0.20, help="piora relativa tolerada na memória")
+    parser.add_argument('--salvar', action='store_true', help="grava os resultados como linha de base")
+    parser.add_argument('-k', dest='filtro', default='', help="só os casos com este texto no nome")
+    argumentos = parser.parse_args()
+
+    bases = {}
+    if os.path.exists(ARQUIVO_BASE):
+        with open(ARQUIVO_BASE, encoding='utf-8') as arquivo:
+            bases = json.load(arquivo)
+    base = bases.get(argumentos.escala, {}).get('casos', {})
+
+    ativos, periodo = ESCALAS[argumentos.escala]
+    casos = {nome: funcao for nome, funcao in CASOS.items() if argumentos.filtro in nome}
+    resultados, regressoes = {}, []
+    with tempfile.TemporaryDirectory() as diretorio, contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(diretorio)
+        try:
+            contexto = Contexto(ativos, periodo)
+            referencia = medir_referencia(argumentos.repeticoes)
+            for nome, funcao in casos.items():
+                tempo, memoria = medir(funcao, contexto, argumentos.repeticoes)
+                resultados[nome] = {'tempo': tempo, 'memoria': memoria}
+            # de novo no fim: o menor dos dois é menos sensível a ruído no começo ou no fim da rodada
+            referencia = min(referencia, medir_referencia(argumentos.repeticoes))
+        finally:
+            os.chdir(DIRETORIO)
+    for resultado in resultados.values():
+        resultado['relativo'] = resultado['tempo'] / referencia
+
+    print(f"escala {argumentos.escala}: {ativos} ativos, {periodo} | melhor de {argumentos.repeticoes} execuções "
+          f"| referência {referencia * 1000:.1f} ms\n")
+    print(f"{'caso':<36} {'tempo (ms)':>11} {'Δ':>6} {'pico (MB)':>10} {'Δ':>6}")
+    for nome, resultado in resultados.items():
+        anterior = base.get(nome)
+        piorou = comparar(resultado, anterior, argumentos.limite_tempo, argumentos.limite_memoria) \
+            if anterior else []
+        regressoes += [(nome, metrica) for metrica in piorou]
+        print(f"{nome:<36} {resultado['tempo'] * 1000:>11.1f} "
+              f"{variacao(resultado['relativo'], anterior['relativo']) if anterior else '':>6} "
+              f"{resultado['memoria']:>10.1f} "
+              f"{variacao(resultado['memoria'], anterior['memoria']) if anterior else '':>6}"
+              f"{'  ❌ ' + ', '.join(piorou) if piorou else ''}")
+
+    sem_base = [nome for nome in resultados if nome not in base]
+    if argumentos.salvar:
+        bases[argumentos.escala] = {'referencia': referencia, 'casos': {**base, **resultados}}
+        with open(ARQUIVO_BASE, 'w', encoding='utf-8') as arquivo:
+            json.dump(bases, arquivo, indent=2, sort_keys=True)
+        print(f"\n💾 Linha de base da escala {argumentos.escala} gravada em {ARQUIVO_BASE}")
+    elif sem_base:
+        print(f"\n⚠️  Sem linha de base local para {', '.join(sem_base)} na escala {argumentos.escala}: "
+              f"rode antes com --salvar a partir do commit de referência")
+        sys.exit(2)
+    elif regressoes:
+        print(f"\n❌ {len(regressoes)} regressão(ões) além do limite "
+              f"(tempo +{argumentos.limite_tempo:.0%}, memória +{argumentos.limite_memoria:.0%})")
+        sys.exit(1)
+    else:
+        print("\n✅ Nenhuma regressão além do limite")
+
+
+if __name__ == "__main__":
+    main()
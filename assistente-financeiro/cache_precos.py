@@ -0,0 +1,221 @@
+import json
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from coletor import ColetorParalelo
+from fontes_dados import FonteDados, FonteYahoo, inicio_do_periodo, normalizar_download
+
+DIRETORIO_PADRAO = os.environ.get('ASSISTENTE_CACHE_DIR', '.cache_precos')
+
+
+class CachePrecos(FonteDados):
+    """Cache em disco (arrays NumPy por ativo) na frente de qualquer FonteDados
+
+    Cada ativo é guardado em três arquivos .npy (datas, fechamento e volume), lidos
+    com memória mapeada. Só o intervalo que falta é buscado na fonte: se o ativo foi
+    atualizado há menos de `validade` segundos a leitura sai direto do disco, senão
+    apenas os pregões a partir da última data guardada são baixados e anexados.
+    `baixar_novos` (a atualização incremental) ignora a validade.
+
+    Os fechamentos são ajustados (proventos e desdobramentos), então um evento novo
+    muda o histórico inteiro: se o fechamento do último pregão guardado não bate com o
+    que a fonte devolve agora, o ativo é baixado de novo desde o início do cache. Cada
+    gravação cria arquivos com uma versão nova no nome em vez de sobrescrever os que
+    podem estar mapeados; os antigos são apagados quando o sistema deixa.
+    """
+
+    def __init__(self, fonte=None, diretorio=DIRETORIO_PADRAO, validade=12 * 3600):
+        self.fonte = fonte if fonte is not None else ColetorParalelo(FonteYahoo())
+        self.diretorio = diretorio
+        self.validade = validade
+        self.acertos = 0
+        self.faltas = 0
+        self.parciais = 0
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._indice = self._ler_indice()
+
+    def estatisticas(self):
+        """Contadores de acerto/falta do cache"""
+        total = self.acertos + self.faltas + self.parciais
+        return {
+            'acertos': self.acertos,
+            'faltas': self.faltas,
+            'parciais': self.parciais,
+            'taxa_acerto': self.acertos / total if total else 0.0,
+        }
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y', validade=None):
+        ativos = list(ativos)
+        validade = self.validade if validade is None else validade
+        inicio = pd.Timestamp(inicio) if inicio is not None else inicio_do_periodo(periodo)
+        fim = pd.Timestamp(fim) if fim is not None else pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+
+        if hasattr(self.fonte, 'limpar_falhas'):
+            # uma busca pode ir à fonte uma vez por data de início; as falhas valem para todas
+            self.fonte.limpar_falhas()
+        pendentes = {}
+        for ativo in ativos:
+            desde = self._inicio_pendente(ativo, inicio, fim, validade)
+            if desde is not None:
+                pendentes.setdefault(desde, []).append(ativo)
+
+        reajustados = {}
+        for desde, grupo in pendentes.items():
+            for lote, novos in self._buscar(grupo, desde, fim):
+                for ativo in lote:
+                    if not self._anexar(ativo, novos, inicio if desde == inicio else None):
+                        reajustados.setdefault(pd.Timestamp(self._indice[ativo]['inicio']), []).append(ativo)
+                self._gravar_indice()
+
+        for desde, grupo in reajustados.items():
+            for lote, novos in self._buscar(grupo, desde, fim):
+                for ativo in lote:
+                    self._anexar(ativo, novos, desde)
+                self._gravar_indice()
+
+        return self._montar(ativos, inicio, fim)
+
+    def baixar_novos(self, ativos, inicio):
+        return self.baixar(ativos, inicio=inicio, validade=0)
+
+    @property
+    def falhas(self):
+        """Ativos que a fonte não conseguiu entregar na última busca (ativo -> erro)"""
+        return getattr(self.fonte, 'falhas', {})
+
+    def _buscar(self, ativos, inicio, fim):
+        """Gera (lote, dados) da fonte; lotes de um ColetorParalelo entram no cache assim que chegam"""
+        if hasattr(self.fonte, 'baixar_em_lotes'):
+            yield from self.fonte.baixar_em_lotes(ativos, inicio=inicio, fim=fim)
+        else:
+            yield ativos, self.fonte.baixar(ativos, inicio=inicio, fim=fim)
+
+    def _inicio_pendente(self, ativo, inicio, fim, validade):
+        """Data a partir da qual o ativo precisa ser buscado (None se o cache basta)"""
+        entrada = self._indice.get(ativo)
+        if entrada is None or pd.Timestamp(entrada['inicio']) > inicio:
+            self.faltas += 1
+            return inicio
+
+        ultima = pd.Timestamp(entrada['fim'])
+        if time.time() - entrada['atualizado_em'] < validade or ultima + pd.Timedelta(days=1) >= fim:
+            self.acertos += 1
+            return None
+
+        # o último pregão guardado volta junto, para conferir se o ajuste mudou
+        self.parciais += 1
+        return ultima
+
+    def _caminho(self, ativo, campo, versao=None):
+        if versao is None:
+            versao = self._indice[ativo].get('versao', 0)
+        sufixo = f".v{versao}" if versao else ""
+        return os.path.join(self.diretorio, f"{ativo}.{campo}{sufixo}.npy")
+
+    def _ler(self, ativo):
+        """Arrays (datas, fechamento, volume) do ativo, com memória mapeada"""
+        return tuple(np.load(self._caminho(ativo, campo), mmap_mode='r')
+                     for campo in ('datas', 'close', 'volume'))
+
+    def _salvar_array(self, ativo, campo, valores, versao):
+        """Grava num arquivo novo (da `versao`); o da versão anterior pode estar mapeado"""
+        caminho = self._caminho(ativo, campo, versao)
+        temporario = caminho + '.tmp'
+        with open(temporario, 'wb') as arquivo:
+            np.save(arquivo, valores)
+        os.replace(temporario, caminho)
+
+    def _apagar_versoes_antigas(self):
+        """Remove os arquivos de versões que o índice já não usa (os ainda mapeados ficam para depois)"""
+        padrao = re.compile(r"(.+)\.(?:datas|close|volume)(?:\.v(\d+))?\.npy")
+        for nome in os.listdir(self.diretorio):
+            encontrado = padrao.fullmatch(nome)
+            if encontrado is None or encontrado.group(1) not in self._indice:
+                continue
+            if int(encontrado.group(2) or 0) != self._indice[encontrado.group(1)].get('versao', 0):
+                try:
+                    os.remove(os.path.join(self.diretorio, nome))
+                except OSError:
+                    pass
+
+    def _anexar(self, ativo, novos, cobertura=None):
+        """Anexa ao cache os pregões novos do ativo (substitui tudo se `cobertura` vier)
+
+        Devolve False, sem gravar nada, se o fechamento do último pregão guardado mudou
+        na fonte (ajuste por provento ou desdobramento): o ativo precisa ser rebaixado.
+        """
+        if ativo in novos.columns.get_level_values('Ticker'):
+            serie = novos['Close'][ativo].dropna()
+            datas = serie.index.values.astype('datetime64[D]')
+            close = serie.to_numpy(dtype=np.float64)
+            volume = novos['Volume'][ativo].reindex(serie.index).fillna(0).to_numpy(dtype=np.float64)
+        else:
+            datas = np.array([], dtype='datetime64[D]')
+            close = volume = np.array([], dtype=np.float64)
+
+        entrada = self._indice.get(ativo)
+        if entrada is not None and cobertura is None:
+            antigas, close_antigo, volume_antigo = self._ler(ativo)
+            sobreposto = np.searchsorted(datas, antigas[-1]) if len(antigas) else len(datas)
+            if sobreposto < len(datas) and datas[sobreposto] == antigas[-1] and \
+                    not np.isclose(close[sobreposto], close_antigo[-1], rtol=1e-6):
+                return False
+            manter = datas > antigas[-1] if len(antigas) else np.ones(len(datas), dtype=bool)
+            if not manter.any():
+                entrada['atualizado_em'] = time.time()
+                return True
+            datas = np.concatenate([antigas, datas[manter]])
+            close = np.concatenate([close_antigo, close[manter]])
+            volume = np.concatenate([volume_antigo, volume[manter]])
+
+        if len(datas) == 0:
+            return True
+
+        versao = entrada.get('versao', 0) + 1 if entrada is not None else 1
+        self._salvar_array(ativo, 'datas', datas, versao)
+        self._salvar_array(ativo, 'close', close, versao)
+        self._salvar_array(ativo, 'volume', volume, versao)
+        self._indice[ativo] = {
+            'inicio': str(cobertura.date()) if cobertura is not None else entrada['inicio'],
+            'fim': str(datas[-1]),
+            'atualizado_em': time.time(),
+            'versao': versao,
+        }
+        return True
+
+    def _montar(self, ativos, inicio, fim):
+        """Recorta o intervalo pedido do cache no formato do yf.download"""
+        inicio, fim = np.datetime64(inicio.date()), np.datetime64(fim.date())
+        precos, volumes = {}, {}
+        for ativo in ativos:
+            if ativo not in self._indice:
+                continue
+            datas, close, volume = self._ler(ativo)
+            esquerda, direita = np.searchsorted(datas, [inicio, fim])
+            indice = pd.DatetimeIndex(datas[esquerda:direita].astype('datetime64[ns]'))
+            precos[ativo] = pd.Series(close[esquerda:direita], index=indice)
+            volumes[ativo] = pd.Series(volume[esquerda:direita], index=indice)
+
+        if not precos:
+            return normalizar_download(None, ativos)
+        dados = pd.concat({'Close': pd.DataFrame(precos), 'Volume': pd.DataFrame(volumes)}, axis=1)
+        return normalizar_download(dados, ativos)
+
+    def _ler_indice(self):
+        caminho = os.path.join(self.diretorio, 'indice.json')
+        if not os.path.exists(caminho):
+            return {}
+        with open(caminho, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+
+    def _gravar_indice(self):
+        caminho = os.path.join(self.diretorio, 'indice.json')
+        temporario = caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self._indice, arquivo, indent=2)
+        os.replace(temporario, caminho)
+        self._apagar_versoes_antigas()
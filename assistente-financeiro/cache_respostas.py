@@ -0,0 +1,68 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+class CacheRespostas:
+    """Cache LRU de respostas prontas, limitado pelo tamanho total em bytes
+
+    A chave inclui a versão dos dados, então respostas de uma carga anterior nunca
+    são servidas depois de uma atualização; elas só esperam ser descartadas.
+    """
+
+    def __init__(self, capacidade_bytes=4 * 1024 ** 2):
+        self.capacidade_bytes = capacidade_bytes
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+        self.descartes = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def obter(self, chave):
+        """Resposta guardada para a chave (ou None), marcando-a como usada recentemente"""
+        with self._trava:
+            resposta = self._itens.get(chave)
+            if resposta is None:
+                self.faltas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return resposta
+
+    def guardar(self, chave, resposta):
+        """Guarda uma resposta, descartando as menos usadas se passar da capacidade"""
+        tamanho = sys.getsizeof(resposta)
+        if tamanho > self.capacidade_bytes:
+            return
+        with self._trava:
+            antiga = self._itens.pop(chave, None)
+            if antiga is not None:
+                self.bytes -= sys.getsizeof(antiga)
+            self._itens[chave] = resposta
+            self.bytes += tamanho
+            while self.bytes > self.capacidade_bytes:
+                _, descartada = self._itens.popitem(last=False)
+                self.bytes -= sys.getsizeof(descartada)
+                self.descartes += 1
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        """Contadores de uso do cache, para dimensionar a capacidade"""
+        total = self.acertos + self.faltas
+        return {
+            'acertos': self.acertos,
+            'faltas': self.faltas,
+            'taxa_acerto': self.acertos / total if total else 0.0,
+            'itens': len(self._itens),
+            'bytes': self.bytes,
+            'capacidade_bytes': self.capacidade_bytes,
+            'descartes': self.descartes,
+        }
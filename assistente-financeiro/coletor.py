@@ -0,0 +1,149 @@
+import heapq
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from fontes_dados import FonteDados, FonteYahoo, normalizar_download
+
+
+class ColetorParalelo(FonteDados):
+    """Busca universos grandes em lotes paralelos, com novas tentativas e timeout
+
+    Os ativos são divididos em lotes de `tamanho_lote` buscados num pool de
+    `trabalhadores` threads. Um lote que falha (ou passa de `timeout` segundos) é
+    repetido com espera exponencial; se esgotar as tentativas, é quebrado em ativos
+    individuais para isolar o símbolo problemático. Um lote que volta sem alguns dos
+    ativos (o yfinance não levanta erro por um símbolo só) tem esses ativos buscados de
+    novo um a um, com as mesmas tentativas. Ativos que continuam falhando ficam em
+    `self.falhas` (ativo -> erro), acumulados desde a última `limpar_falhas()`, e o
+    resto da carga segue normalmente.
+    Uma busca que estoura o timeout continua ocupando sua thread até voltar, então só
+    se agenda trabalho novo quando há thread livre de fato.
+    """
+
+    def __init__(self, fonte=None, tamanho_lote=50, trabalhadores=4, tentativas=3,
+                 espera_inicial=1.0, timeout=60.0):
+        self.fonte = fonte if fonte is not None else FonteYahoo()
+        self.tamanho_lote = tamanho_lote
+        self.trabalhadores = trabalhadores
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.timeout = timeout
+        self.falhas = {}
+
+    def limpar_falhas(self):
+        self.falhas = {}
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        self.limpar_falhas()
+        partes = [dados for _, dados in self.baixar_em_lotes(ativos, inicio, fim, periodo)]
+        if not partes:
+            return normalizar_download(None, list(ativos))
+        return normalizar_download(pd.concat(partes, axis=1).sort_index(), list(ativos))
+
+    def baixar_em_lotes(self, ativos, inicio=None, fim=None, periodo='2y'):
+        """Gera (lote, dados) à medida que cada lote termina, na ordem de conclusão
+
+        O lote gerado traz só os ativos que vieram com dados; os que faltaram voltam
+        depois, sozinhos, se a nova tentativa der certo.
+        """
+        ativos = list(ativos)
+        lotes = [ativos[i:i + self.tamanho_lote] for i in range(0, len(ativos), self.tamanho_lote)]
+        # (quando, desempate, lote, tentativa, isolado): `isolado` marca o ativo que faltou
+        # num lote em que os outros vieram, então voltar vazio de novo é falha
+        agendados = [(0.0, indice, lote, 1, False) for indice, lote in enumerate(lotes)]
+        heapq.heapify(agendados)
+        proximo_indice = len(lotes)
+        em_andamento = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.trabalhadores)
+        # chamadas que estouraram o timeout mas seguem ocupando uma thread do pool
+        presos = set()
+
+        def buscar(lote, relogio):
+            relogio.append(time.monotonic())
+            return self.fonte.baixar(lote, inicio, fim, periodo)
+
+        try:
+            while agendados or em_andamento:
+                presos = {futuro for futuro in presos if not futuro.done()}
+                livres = self.trabalhadores - len(em_andamento) - len(presos)
+                agora = time.monotonic()
+                while agendados and agendados[0][0] <= agora and livres > 0:
+                    _, _, lote, tentativa, isolado = heapq.heappop(agendados)
+                    relogio = []
+                    futuro = executor.submit(buscar, lote, relogio)
+                    em_andamento[futuro] = (lote, tentativa, relogio, isolado)
+                    livres -= 1
+
+                if not em_andamento and livres <= 0:
+                    # todas as threads presas em chamadas abandonadas: espera uma liberar
+                    liberados, _ = wait(list(presos), timeout=self.timeout, return_when=FIRST_COMPLETED)
+                    if not liberados:
+                        for _, _, lote, _, _ in agendados:
+                            for ativo in lote:
+                                self.falhas[ativo] = repr(TimeoutError(
+                                    f"nenhuma thread livre: {len(presos)} buscas presas há mais de {self.timeout:g}s"))
+                        break
+                    continue
+
+                # o prazo conta de quando a busca começou numa thread, não de quando entrou na fila
+                prazos = [relogio[0] + self.timeout for _, _, relogio, _ in em_andamento.values() if relogio]
+                if agendados and livres > 0:
+                    prazos.append(agendados[0][0])
+                espera = max(min(prazos) - time.monotonic(), 0.0) if prazos else None
+                if not all(relogio for _, _, relogio, _ in em_andamento.values()):
+                    # alguma busca ainda não começou: volta logo para ler seu relógio
+                    espera = min(espera, 0.01) if espera is not None else 0.01
+                if not em_andamento:
+                    time.sleep(espera or 0.0)
+                    continue
+                concluidos, _ = wait(list(em_andamento) + list(presos), timeout=espera, return_when=FIRST_COMPLETED)
+                concluidos = [futuro for futuro in concluidos if futuro in em_andamento]
+
+                agora = time.monotonic()
+                expirados = [futuro for futuro, (_, _, relogio, _) in em_andamento.items()
+                             if futuro not in concluidos and relogio and agora - relogio[0] >= self.timeout]
+                presos.update(expirados)
+                for futuro in list(concluidos) + expirados:
+                    lote, tentativa, _, isolado = em_andamento.pop(futuro)
+                    if futuro in concluidos and futuro.exception() is None:
+                        dados = futuro.result()
+                        recebidos = set(dados.columns.get_level_values('Ticker'))
+                        com_dados = [ativo for ativo in lote
+                                     if ativo in recebidos and not dados['Close'][ativo].isna().all()]
+                        faltantes = [ativo for ativo in lote if ativo not in com_dados]
+                        if com_dados and len(lote) > 1:
+                            # os outros vieram: o intervalo tem pregões, então os que faltaram falharam
+                            for ativo in faltantes:
+                                heapq.heappush(agendados, (agora, proximo_indice, [ativo], 1, True))
+                                proximo_indice += 1
+                        elif not com_dados and isolado and tentativa < self.tentativas:
+                            espera_retry = self.espera_inicial * 2 ** (tentativa - 1)
+                            heapq.heappush(agendados, (agora + espera_retry, proximo_indice, lote, tentativa + 1, True))
+                            proximo_indice += 1
+                        elif not com_dados:
+                            for ativo in lote:
+                                self.falhas[ativo] = "sem dados"
+                        for ativo in com_dados:
+                            self.falhas.pop(ativo, None)
+                        if com_dados:
+                            yield com_dados, dados
+                        continue
+
+                    erro = futuro.exception() if futuro in concluidos else TimeoutError(
+                        f"lote sem resposta em {self.timeout:g}s")
+                    if tentativa < self.tentativas:
+                        espera_retry = self.espera_inicial * 2 ** (tentativa - 1)
+                        heapq.heappush(agendados, (agora + espera_retry, proximo_indice, lote, tentativa + 1, isolado))
+                        proximo_indice += 1
+                    elif len(lote) > 1:
+                        for ativo in lote:
+                            heapq.heappush(agendados, (agora, proximo_indice, [ativo], 1, isolado))
+                            proximo_indice += 1
+                    else:
+                        self.falhas[lote[0]] = repr(erro)
+        finally:
+            # lotes que estouraram o timeout podem continuar presos; não esperamos por eles
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,121 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+
+def interpretar_correlacao(correl):
+    """Classifica a intensidade de uma correlação"""
+    if correl > 0.7:
+        return "FORTE POSITIVA"
+    elif correl > 0.3:
+        return "MODERADA POSITIVA"
+    elif correl > -0.3:
+        return "FRACA"
+    elif correl > -0.7:
+        return "MODERADA NEGATIVA"
+    return "FORTE NEGATIVA"
+
+
+class MatrizCorrelacao:
+    """Matriz de correlação em cache, atualizável pregão a pregão
+
+    Guarda os co-momentos (contagens, somas, somas de quadrados e produtos cruzados)
+    de cada par considerando só as datas em que os dois ativos têm valor, como o
+    DataFrame.corr() do pandas. Novos pregões entram em O(k·N²) sem reprocessar o
+    histórico, e a consulta de um par é um acesso direto à matriz. Os co-momentos
+    são sempre trocados por arrays novos (nunca somados no lugar), então
+    `com_pregoes` só precisa de uma cópia rasa para deixar a original intacta.
+    """
+
+    def __init__(self, ativos, usar_retornos=False):
+        self.ativos = list(ativos)
+        self.codigos = {ativo: codigo for codigo, ativo in enumerate(self.ativos)}
+        self.usar_retornos = usar_retornos
+        tamanho = len(self.ativos)
+        self._contagem = np.zeros((tamanho, tamanho))
+        self._soma = np.zeros((tamanho, tamanho))
+        self._soma_quadrados = np.zeros((tamanho, tamanho))
+        self._produtos = np.zeros((tamanho, tamanho))
+        self._centro = None
+        self._ultimo_preco = np.full(tamanho, np.nan)
+        self.matriz = np.full((tamanho, tamanho), np.nan)
+
+    @classmethod
+    def de_precos(cls, precos, usar_retornos=False):
+        """Constrói a matriz a partir dos preços em formato largo (data × ativo)"""
+        correlacoes = cls(precos.columns, usar_retornos=usar_retornos)
+        correlacoes.atualizar(precos.to_numpy(dtype=np.float64))
+        return correlacoes
+
+    @classmethod
+    def de_longo(cls, dados, coluna_preco, usar_retornos=False):
+        """Constrói a matriz a partir do formato longo (Data, Ativo, preço)"""
+        precos = dados.pivot(index='Data', columns='Ativo', values=coluna_preco)
+        return cls.de_precos(precos, usar_retornos=usar_retornos)
+
+    def atualizar(self, precos):
+        """Acrescenta novos pregões (linhas data × ativo, na ordem de self.ativos)"""
+        precos = np.atleast_2d(np.asarray(precos, dtype=np.float64))
+        if len(precos) == 0:
+            return self
+        valores = self._para_retornos(precos) if self.usar_retornos else precos
+
+        if self._centro is None:
+            # deslocar pela média inicial evita cancelamento numérico nas somas
+            with np.errstate(invalid='ignore'):
+                self._centro = np.nan_to_num(np.nanmean(valores, axis=0))
+        valores = valores - self._centro
+
+        validos = (~np.isnan(valores)).astype(np.float64)
+        zerados = np.nan_to_num(valores)
+        self._contagem = self._contagem + validos.T @ validos
+        self._soma = self._soma + zerados.T @ validos
+        self._soma_quadrados = self._soma_quadrados + (zerados ** 2).T @ validos
+        self._produtos = self._produtos + zerados.T @ zerados
+        self._recalcular()
+        return self
+
+    def com_pregoes(self, precos):
+        """Nova matriz com os pregões acrescentados; esta instância não muda"""
+        return copy.copy(self).atualizar(precos)
+
+    def _para_retornos(self, precos):
+        """Retornos dos novos pregões, encadeados com o último preço já visto"""
+        preenchidos = pd.DataFrame(np.vstack([self._ultimo_preco, precos])).ffill().to_numpy()
+        self._ultimo_preco = preenchidos[-1]
+        return precos / preenchidos[:-1] - 1
+
+    def _recalcular(self):
+        n = self._contagem
+        soma_y = self._soma.T
+        covariancia = n * self._produtos - self._soma * soma_y
+        variancia_x = n * self._soma_quadrados - self._soma ** 2
+        variancia_y = variancia_x.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            matriz = covariancia / np.sqrt(variancia_x * variancia_y)
+        matriz[n < 2] = np.nan
+        np.clip(matriz, -1.0, 1.0, out=matriz)
+        np.fill_diagonal(matriz, np.where(np.diag(n) >= 2, 1.0, np.nan))
+        self.matriz = matriz
+
+    def par(self, ativo1, ativo2):
+        """Correlação entre dois ativos em O(1)"""
+        return float(self.matriz[self.codigos[ativo1], self.codigos[ativo2]])
+
+    def mais_correlacionados(self, ativo, k=5, menos=False):
+        """Os k ativos mais (ou menos) correlacionados com `ativo`, sem ordenar a linha toda"""
+        linha = self.matriz[self.codigos[ativo]].copy()
+        linha[self.codigos[ativo]] = np.nan
+        chave = linha if menos else -linha
+        chave = np.where(np.isnan(chave), np.inf, chave)
+        k = min(k, len(linha) - 1)
+        if k <= 0:
+            return []
+        candidatos = np.argpartition(chave, k - 1)[:k]
+        candidatos = candidatos[np.argsort(chave[candidatos], kind='stable')]
+        return [(self.ativos[i], float(linha[i])) for i in candidatos if not np.isnan(linha[i])]
+
+    def como_dataframe(self):
+        """Matriz completa como DataFrame (ativo × ativo)"""
+        return pd.DataFrame(self.matriz, index=self.ativos, columns=self.ativos)
@@ -0,0 +1,231 @@
+import os
+import re
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from particoes import ler_manifesto, ler_particionado
+
+COLUNAS = ['Close', 'Volume']
+COLUNAS_OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+ARQUIVO_UNIVERSO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ativos_b3.txt')
+
+
+def carregar_universo(caminho=ARQUIVO_UNIVERSO):
+    """Lê a lista de tickers da B3 (um por linha, '#' para comentários) com sufixo .SA"""
+    ativos = []
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            ticker = linha.split('#', 1)[0].strip().upper()
+            if ticker:
+                ativos.append(ticker if ticker.endswith('.SA') else f"{ticker}.SA")
+    return list(dict.fromkeys(ativos))
+
+
+def universo_sintetico(quantidade):
+    """Tickers fictícios no padrão da B3 para testes e benchmarks"""
+    return [f"S{indice:04d}3.SA" for indice in range(quantidade)]
+
+
+def inicio_do_periodo(periodo, hoje=None):
+    """Converte um período no formato do yfinance ('2y', '6mo', '30d') em data inicial"""
+    hoje = pd.Timestamp.today().normalize() if hoje is None else pd.Timestamp(hoje).normalize()
+    encontrado = re.fullmatch(r'(\d+)(d|wk|mo|y)', periodo)
+    if encontrado is None:
+        raise ValueError(f"Período inválido: {periodo}")
+
+    quantidade, unidade = int(encontrado.group(1)), encontrado.group(2)
+    deslocamentos = {
+        'd': pd.DateOffset(days=quantidade),
+        'wk': pd.DateOffset(weeks=quantidade),
+        'mo': pd.DateOffset(months=quantidade),
+        'y': pd.DateOffset(years=quantidade),
+    }
+    return hoje - deslocamentos[unidade]
+
+
+def normalizar_download(dados, ativos, colunas=COLUNAS):
+    """Padroniza o retorno do yf.download: colunas (Price, Ticker) com Close e Volume"""
+    if dados is None or len(dados) == 0:
+        colunas = pd.MultiIndex.from_product([colunas, []], names=['Price', 'Ticker'])
+        return pd.DataFrame(columns=colunas, index=pd.DatetimeIndex([], name='Date'))
+
+    if not isinstance(dados.columns, pd.MultiIndex):
+        dados = pd.concat({ativos[0]: dados}, axis=1).swaplevel(axis=1)
+
+    dados = dados[colunas]
+    dados.columns = dados.columns.set_names(['Price', 'Ticker'])
+    dados.index = pd.DatetimeIndex(dados.index).tz_localize(None).rename('Date')
+    return dados
+
+
+class FonteDados(ABC):
+    """Interface comum das fontes de preços
+
+    Toda fonte devolve um DataFrame no formato de yf.download(...)[['Close', 'Volume']]:
+    índice 'Date' e colunas MultiIndex (Price, Ticker). O intervalo é [inicio, fim).
+    """
+
+    @abstractmethod
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        """Preços de `ativos` em [inicio, fim), ou dos últimos `periodo` se as datas não vierem"""
+
+    def baixar_novos(self, ativos, inicio):
+        """Pregões a partir de `inicio` vindos da origem (caches na frente não podem responder do disco)"""
+        return self.baixar(ativos, inicio=inicio)
+
+
+class FonteYahoo(FonteDados):
+    """Busca os preços no Yahoo Finance"""
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        import yfinance as yf
+
+        ativos = list(ativos)
+        if inicio is None and fim is None:
+            dados = yf.download(ativos, period=periodo, progress=False)
+        else:
+            dados = yf.download(ativos, start=inicio, end=fim, progress=False)
+        return normalizar_download(dados, ativos)
+
+
+class FonteArquivo(FonteDados):
+    """Lê os preços de um CSV em formato longo ou de um diretório particionado (o gerado pelo main.py)
+
+    No diretório particionado só os ativos, o intervalo e as colunas pedidas são lidos
+    do disco; o CSV é lido inteiro uma vez e mantido em memória.
+    """
+
+    def __init__(self, caminho, coluna_preco='Preço de Fechamento'):
+        self.caminho = caminho
+        self.coluna_preco = coluna_preco
+        self._dados = None
+
+    def _carregar(self):
+        if self._dados is None:
+            dados = pd.read_csv(self.caminho, parse_dates=['Data'])
+            self._dados = dados.pivot(index='Data', columns='Ativo',
+                                      values=[self.coluna_preco, 'Volume'])
+        return self._dados
+
+    def _baixar_particionado(self, ativos, inicio, fim, periodo):
+        if inicio is None and fim is None:
+            ultima = max(pd.Timestamp(resumo['fim']) for resumo in ler_manifesto(self.caminho)['particoes'].values())
+            inicio = inicio_do_periodo(periodo, ultima)
+        longo = ler_particionado(self.caminho, [self.coluna_preco, 'Volume'], ativos, inicio, fim)
+        largo = longo.pivot(index='Data', columns='Ativo', values=[self.coluna_preco, 'Volume'])
+
+        ativos = [ativo for ativo in ativos if ativo in largo[self.coluna_preco].columns]
+        dados = pd.concat({'Close': largo[self.coluna_preco][ativos], 'Volume': largo['Volume'][ativos]}, axis=1)
+        return normalizar_download(dados.dropna(how='all'), ativos)
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        if os.path.isdir(self.caminho):
+            return self._baixar_particionado(ativos, inicio, fim, periodo)
+        largo = self._carregar()
+        if inicio is None and fim is None:
+            inicio = inicio_do_periodo(periodo, largo.index.max())
+
+        mascara = pd.Series(True, index=largo.index)
+        if inicio is not None:
+            mascara &= largo.index >= pd.Timestamp(inicio)
+        if fim is not None:
+            mascara &= largo.index < pd.Timestamp(fim)
+
+        ativos = [ativo for ativo in ativos if ativo in largo[self.coluna_preco].columns]
+        precos = largo.loc[mascara.values, self.coluna_preco][ativos]
+        volumes = largo.loc[mascara.values, 'Volume'][ativos]
+        dados = pd.concat({'Close': precos, 'Volume': volumes}, axis=1)
+        return normalizar_download(dados.dropna(how='all'), ativos)
+
+
+class FonteSintetica(FonteDados):
+    """Gera preços e volumes sintéticos (passeio aleatório log-normal) sem rede
+
+    A série de cada ativo depende só da semente e do ticker, então chamadas com
+    intervalos diferentes são consistentes entre si (útil para testar o cache).
+    Com `ohlc=True` devolve também Open, High e Low, como o yf.download completo
+    (Close e Volume não mudam, vêm de outro fluxo de números aleatórios).
+    """
+
+    def __init__(self, semente=42, origem='2015-01-02', volatilidade=0.02, ohlc=False):
+        self.semente = semente
+        self.origem = pd.Timestamp(origem)
+        self.volatilidade = volatilidade
+        self.ohlc = ohlc
+
+    def _serie(self, ativo, pregoes):
+        chave = zlib.crc32(ativo.encode())
+        gerador_precos = np.random.default_rng([self.semente, chave, 0])
+        gerador_volumes = np.random.default_rng([self.semente, chave, 1])
+        preco_inicial = gerador_precos.uniform(5, 100)
+        choques = gerador_precos.normal(0.0003, self.volatilidade, pregoes)
+        precos = preco_inicial * np.exp(np.cumsum(choques))
+        volumes = gerador_volumes.lognormal(15, 1, pregoes).round()
+        return precos, volumes
+
+    def _extremos(self, ativo, fechamentos):
+        """Abertura, máxima e mínima coerentes com os fechamentos (abertura perto do fechamento anterior)"""
+        gerador = np.random.default_rng([self.semente, zlib.crc32(ativo.encode()), 2])
+        anteriores = np.concatenate([fechamentos[:1], fechamentos[:-1]])
+        aberturas = anteriores * np.exp(gerador.normal(0.0, self.volatilidade / 4, len(fechamentos)))
+        amplitude = np.abs(gerador.normal(0.0, self.volatilidade / 2, (2, len(fechamentos))))
+        maximas = np.maximum(aberturas, fechamentos) * np.exp(amplitude[0])
+        minimas = np.minimum(aberturas, fechamentos) * np.exp(-amplitude[1])
+        return aberturas, maximas, minimas
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        fim = pd.Timestamp(fim) if fim is not None else pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+        inicio = pd.Timestamp(inicio) if inicio is not None else inicio_do_periodo(periodo, fim)
+        calendario = pd.bdate_range(self.origem, fim - pd.Timedelta(days=1), name='Date')
+        janela = calendario >= inicio
+
+        colunas = COLUNAS_OHLCV if self.ohlc else COLUNAS
+        series = {coluna: {} for coluna in colunas}
+        for ativo in ativos:
+            serie_precos, serie_volumes = self._serie(ativo, len(calendario))
+            series['Close'][ativo] = serie_precos[janela]
+            series['Volume'][ativo] = serie_volumes[janela]
+            if self.ohlc:
+                for coluna, valores in zip(['Open', 'High', 'Low'], self._extremos(ativo, serie_precos)):
+                    series[coluna][ativo] = valores[janela]
+
+        indice = calendario[janela]
+        dados = pd.concat({coluna: pd.DataFrame(series[coluna], index=indice) for coluna in colunas}, axis=1)
+        return normalizar_download(dados, list(ativos), colunas)
+
+
+class FonteInstavel(FonteDados):
+    """Envolve outra fonte injetando latência e falhas, para testar a coleta sem rede
+
+    `ativos_quebrados` sempre falham; os demais lotes falham com probabilidade
+    `taxa_falha` e demoram `latencia` segundos (mais um sorteio de até `variacao`).
+    """
+
+    def __init__(self, fonte=None, latencia=0.05, variacao=0.0, taxa_falha=0.0, ativos_quebrados=(), semente=0):
+        self.fonte = fonte if fonte is not None else FonteSintetica()
+        self.latencia = latencia
+        self.variacao = variacao
+        self.taxa_falha = taxa_falha
+        self.ativos_quebrados = set(ativos_quebrados)
+        self.chamadas = 0
+        self._gerador = np.random.default_rng(semente)
+        self._trava = threading.Lock()
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        with self._trava:
+            self.chamadas += 1
+            atraso = self.latencia + self._gerador.uniform(0, self.variacao)
+            falhou = self._gerador.random() < self.taxa_falha
+        time.sleep(atraso)
+
+        quebrados = self.ativos_quebrados.intersection(ativos)
+        if quebrados:
+            raise ConnectionError(f"Falha simulada em {', '.join(sorted(quebrados))}")
+        if falhou:
+            raise ConnectionError("Falha intermitente simulada")
+        return self.fonte.baixar(ativos, inicio, fim, periodo)
@@ -0,0 +1,248 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+
+# estado de cada processo de renderização: matrizes compartilhadas e figuras reaproveitadas
+_DADOS = {}
+_MODELOS = {}
+
+
+def reduzir_serie(valores, max_pontos=2000):
+    """Índices de uma série longa que preservam o mínimo e o máximo de cada faixa
+
+    Divide a série em `max_pontos / 2` faixas e guarda o ponto mínimo e o máximo de
+    cada uma (mais o primeiro e o último), então picos e vales continuam no gráfico.
+    """
+    n = len(valores)
+    if max_pontos is None or n <= max_pontos:
+        return np.arange(n)
+    faixas = max_pontos // 2
+    tamanho = -(-n // faixas)
+    blocos = np.pad(np.asarray(valores, dtype=np.float64), (0, faixas * tamanho - n), mode='edge')
+    blocos = blocos.reshape(faixas, tamanho)
+    base = np.arange(faixas) * tamanho
+    minimos = base + np.argmin(np.where(np.isnan(blocos), np.inf, blocos), axis=1)
+    maximos = base + np.argmax(np.where(np.isnan(blocos), -np.inf, blocos), axis=1)
+    indices = np.unique(np.concatenate([minimos, maximos, [0, n - 1]]))
+    return indices[indices < n]
+
+
+def _iniciar(datas, ativos, precos, volumes, max_pontos):
+    _DADOS.update(datas=datas, colunas={ativo: i for i, ativo in enumerate(ativos)},
+                  precos=precos, volumes=volumes, max_pontos=max_pontos)
+
+
+def _modelo(tipo):
+    """Figura e eixos do tipo de gráfico, criados uma vez por processo e limpos a cada uso"""
+    if tipo not in _MODELOS:
+        if tipo == 'par':
+            figura = Figure(figsize=(15, 6))
+            eixos = figura.subplots(1, 2)
+            figura.subplots_adjust(left=0.06, right=0.98, bottom=0.18, top=0.88, wspace=0.2)
+        else:
+            figura = Figure(figsize=(12, 7))
+            eixos = figura.subplots(2, 1, sharex=True, gridspec_kw={'height_ratios': [3, 1]})
+            figura.subplots_adjust(left=0.08, right=0.98, bottom=0.14, top=0.92, hspace=0.05)
+        _MODELOS[tipo] = (figura, eixos)
+    figura, eixos = _MODELOS[tipo]
+    for eixo in eixos:
+        eixo.clear()
+    return figura, eixos
+
+
+def _serie(ativo):
+    coluna = _DADOS['colunas'][ativo]
+    return _DADOS['precos'][:, coluna]
+
+
+def _desenhar_par(ativo1, ativo2, correlacao, caminho, dpi):
+    figura, (ax1, ax2) = _modelo('par')
+    datas, x, y = _DADOS['datas'], _serie(ativo1), _serie(ativo2)
+    validos = ~(np.isnan(x) | np.isnan(y))
+
+    pontos = np.flatnonzero(validos)
+    max_pontos = _DADOS['max_pontos']
+    if max_pontos is not None and len(pontos) > max_pontos:
+        pontos = pontos[np.linspace(0, len(pontos) - 1, max_pontos).astype(int)]
+    ax1.scatter(x[pontos], y[pontos], alpha=0.6, color='blue')
+    ax1.set_xlabel(f'Preço {ativo1}')
+    ax1.set_ylabel(f'Preço {ativo2}')
+    ax1.set_title(f'Correlação: {ativo1} vs {ativo2}\n(r = {correlacao:.3f})')
+    ax1.grid(True, alpha=0.3)
+    if validos.sum() > 1:
+        reta = np.poly1d(np.polyfit(x[validos], y[validos], 1))
+        extremos = np.array([x[validos].min(), x[validos].max()])
+        ax1.plot(extremos, reta(extremos), "r--", alpha=0.8)
+
+    for ativo, valores in ((ativo1, x), (ativo2, y)):
+        indices = reduzir_serie(valores, max_pontos)
+        ax2.plot(datas[indices], valores[indices], label=ativo, linewidth=2)
+    ax2.set_xlabel('Data')
+    ax2.set_ylabel('Preço (R$)')
+    ax2.set_title('Evolução dos Preços - Comparação')
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+    ax2.tick_params(axis='x', rotation=45)
+
+    figura.savefig(caminho, dpi=dpi)
+
+
+def _desenhar_ativo(ativo, caminho, dpi):
+    figura, (ax1, ax2) = _modelo('ativo')
+    datas, precos = _DADOS['datas'], _serie(ativo)
+    indices = reduzir_serie(precos, _DADOS['max_pontos'])
+    ax1.plot(datas[indices], precos[indices], linewidth=1.5)
+    ax1.set_title(f'{ativo} - Preço de Fechamento')
+    ax1.set_ylabel('Preço (R$)')
+    ax1.grid(True, alpha=0.3)
+
+    if _DADOS['volumes'] is not None:
+        volumes = _DADOS['volumes'][:, _DADOS['colunas'][ativo]]
+        indices = reduzir_serie(volumes, _DADOS['max_pontos'])
+        ax2.fill_between(datas[indices], np.nan_to_num(volumes[indices]) / 1_000_000, step='mid', alpha=0.6)
+    ax2.set_ylabel('Volume (M)')
+    ax2.set_xlabel('Data')
+    ax2.grid(True, alpha=0.3)
+    ax2.tick_params(axis='x', rotation=45)
+
+    figura.savefig(caminho, dpi=dpi)
+
+
+DESENHOS = {'par': _desenhar_par, 'ativo': _desenhar_ativo}
+
+
+def _executar(trabalho):
+    tipo, *argumentos = trabalho
+    inicio = time.perf_counter()
+    DESENHOS[tipo](*argumentos)
+    return argumentos[-2], time.perf_counter() - inicio
+
+
+class RenderizadorGraficos:
+    """Gera lotes de gráficos sem interface (Agg, API de Figure, sem estado global do pyplot)
+
+    As matrizes de preço/volume são enviadas uma vez para cada processo do pool (no
+    inicializador); cada trabalho leva só os tickers e o caminho de saída. Cada
+    processo reaproveita uma figura por tipo de gráfico, e séries com mais de
+    `max_pontos` pregões são reduzidas antes de desenhar.
+    """
+
+    def __init__(self, precos, volumes=None, trabalhadores=None, max_pontos=2000, dpi=100):
+        self.ativos = list(precos.columns)
+        self.datas = precos.index.values
+        self.precos = precos.to_numpy(dtype=np.float64)
+        self.volumes = None if volumes is None else volumes.reindex(
+            index=precos.index, columns=precos.columns).to_numpy(dtype=np.float64)
+        self.trabalhadores = trabalhadores or os.cpu_count() or 1
+        self.max_pontos = max_pontos
+        self.dpi = dpi
+
+    def trabalhos_pares(self, correlacoes, diretorio, pares=None, dpi=None):
+        """Um gráfico por par de ativos (todos os pares, se `pares` não vier)"""
+        os.makedirs(diretorio, exist_ok=True)
+        if pares is None:
+            pares = [(a, b) for i, a in enumerate(self.ativos) for b in self.ativos[i + 1:]]
+        return [('par', a, b, correlacoes.par(a, b), os.path.join(diretorio, f"{a}_{b}.png"), dpi or self.dpi)
+                for a, b in pares]
+
+    def trabalhos_ativos(self, diretorio, dpi=None):
+        """Um gráfico de preço e volume por ativo"""
+        os.makedirs(diretorio, exist_ok=True)
+        return [('ativo', ativo, os.path.join(diretorio, f"{ativo}.png"), dpi or self.dpi) for ativo in self.ativos]
+
+    def renderizar(self, trabalhos):
+        """Desenha os trabalhos e devolve [(caminho, segundos)] na ordem recebida"""
+        dados = (self.datas, self.ativos, self.precos, self.volumes, self.max_pontos)
+        if self.trabalhadores == 1 or len(trabalhos) <= 1:
+            _iniciar(*dados)
+            return [_executar(trabalho) for trabalho in trabalhos]
+
+        lote = max(1, len(trabalhos) // (self.trabalhadores * 4))
+        with ProcessPoolExecutor(self.trabalhadores, initializer=_iniciar, initargs=dados) as executor:
+            return list(executor.map(_executar, trabalhos, chunksize=lote))
+
+
+def resumir_tempos(tempos):
+    """Total, média, p50, p95 e máximo (s) dos tempos por gráfico"""
+    segundos = np.array([tempo for _, tempo in tempos])
+    if len(segundos) == 0:
+        return {'graficos': 0}
+    return {
+        'graficos': len(segundos),
+        'total': float(segundos.sum()),
+        'media': float(segundos.mean()),
+        'p50': float(np.percentile(segundos, 50)),
+        'p95': float(np.percentile(segundos, 95)),
+        'maximo': float(segundos.max()),
+    }
+
+
+def desenhar_retorno_volatilidade(resultados_df, caminho, dpi=300):
+    """Gráfico retorno × volatilidade dos ativos (quadrantes de risco/retorno)"""
+    volatilidade = resultados_df['Volatilidade Diária (%)']
+    rentabilidade = resultados_df['Rentabilidade Acumulada (%)']
+
+    figura = Figure(figsize=(12, 8))
+    eixo = figura.subplots()
+    pontos = eixo.scatter(volatilidade, rentabilidade, s=200, alpha=0.7, c=rentabilidade, cmap='RdYlGn')
+
+    for _, row in resultados_df.iterrows():
+        posicao = (row['Volatilidade Diária (%)'], row['Rentabilidade Acumulada (%)'])
+        eixo.annotate(row['Ativo'], posicao, xytext=(10, 10), textcoords='offset points',
+                      fontsize=12, fontweight='bold')
+        eixo.annotate(f"{row['Rentabilidade Acumulada (%)']:.1f}%", posicao, xytext=(10, -15),
+                      textcoords='offset points', fontsize=10, color='gray')
+
+    eixo.set_xlabel('Volatilidade Diária (%)', fontsize=12, fontweight='bold')
+    eixo.set_ylabel('Rentabilidade Acumulada (%)', fontsize=12, fontweight='bold')
+    eixo.set_title('Relação Retorno x Volatilidade - Análise de Ativos\n(Últimos 2 Anos)',
+                   fontsize=14, fontweight='bold')
+    eixo.axhline(y=0, color='red', linestyle='--', alpha=0.5, label='Retorno Zero')
+    eixo.axvline(x=volatilidade.mean(), color='blue', linestyle='--', alpha=0.5, label='Volatilidade Média')
+    figura.colorbar(pontos, ax=eixo, label='Rentabilidade Acumulada (%)')
+    eixo.legend()
+    eixo.grid(True, alpha=0.3)
+
+    x_median, y_median = volatilidade.median(), rentabilidade.median()
+    quadrantes = [(0.8, 1.8, 'Alto Retorno\nAlto Risco', 'lightcoral'),
+                  (0.8, 0.5, 'Baixo Retorno\nAlto Risco', 'lightyellow'),
+                  (1.2, 1.8, 'Alto Retorno\nBaixo Risco', 'lightgreen'),
+                  (1.2, 0.5, 'Baixo Retorno\nBaixo Risco', 'lightblue')]
+    for fator_x, fator_y, texto, cor in quadrantes:
+        eixo.text(x_median * fator_x, y_median * fator_y, texto, fontsize=10, ha='center', va='center',
+                  bbox=dict(boxstyle="round,pad=0.3", facecolor=cor, alpha=0.3))
+
+    figura.savefig(caminho, dpi=dpi, bbox_inches='tight')
+
+
+def desenhar_fronteira(fronteira, ativos, caminho, minima_variancia=None, maximo_sharpe=None, dpi=200):
+    """Fronteira eficiente (retorno × volatilidade anuais) com os ativos e as carteiras destacadas
+
+    `fronteira` vem de OtimizadorCarteira.fronteira; `ativos` é um DataFrame indexado
+    pelo ativo com as colunas retorno e volatilidade.
+    """
+    figura = Figure(figsize=(12, 8))
+    eixo = figura.subplots()
+    eixo.plot(fronteira['volatilidade'] * 100, fronteira['retorno'] * 100, color='navy', linewidth=2,
+              label='Fronteira eficiente')
+    eixo.scatter(ativos['volatilidade'] * 100, ativos['retorno'] * 100, s=40, alpha=0.6, color='gray',
+                 label='Ativos')
+    if len(ativos) <= 30:
+        for ativo, linha in ativos.iterrows():
+            eixo.annotate(ativo, (linha['volatilidade'] * 100, linha['retorno'] * 100), xytext=(5, 5),
+                          textcoords='offset points', fontsize=9)
+    for carteira, nome, cor in ((minima_variancia, 'Mínima variância', 'green'),
+                                (maximo_sharpe, 'Máximo Sharpe', 'red')):
+        if carteira is not None:
+            eixo.scatter([carteira.volatilidade * 100], [carteira.retorno * 100], s=200, marker='*', color=cor,
+                         zorder=3, label=f'{nome} (Sharpe {carteira.sharpe:.2f})')
+
+    eixo.set_xlabel('Volatilidade Anual (%)', fontsize=12, fontweight='bold')
+    eixo.set_ylabel('Retorno Anual Esperado (%)', fontsize=12, fontweight='bold')
+    eixo.set_title('Fronteira Eficiente - Carteiras Só Compradas', fontsize=14, fontweight='bold')
+    eixo.legend()
+    eixo.grid(True, alpha=0.3)
+    figura.savefig(caminho, dpi=dpi, bbox_inches='tight')
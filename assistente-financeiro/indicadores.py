@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+from backtest import media_movel, preparar
+
+INDICE_REFERENCIA = '^BVSP'
+JANELA_CURTA = 20
+JANELA_LONGA = 50
+PERIODO_RSI = 14
+JANELA_BOLLINGER = 20
+DESVIOS_BOLLINGER = 2.0
+COLUNAS_INDICADORES = ['mm_20', 'mm_50', 'mme_20', 'rsi_14', 'bollinger_inferior', 'bollinger_superior',
+                       'max_drawdown', 'duracao_drawdown', 'drawdown_atual', 'beta']
+
+
+def media_exponencial(valores, periodo):
+    """Média móvel exponencial (span `periodo`) de todas as colunas"""
+    return pd.DataFrame(valores).ewm(span=periodo, adjust=False, min_periods=periodo).mean().to_numpy()
+
+
+def rsi(valores, periodo=PERIODO_RSI):
+    """Índice de força relativa de Wilder (0 a 100) de todas as colunas"""
+    variacoes = pd.DataFrame(valores).diff()
+    ganhos = variacoes.clip(lower=0).ewm(alpha=1 / periodo, adjust=False, min_periods=periodo).mean()
+    perdas = (-variacoes).clip(lower=0).ewm(alpha=1 / periodo, adjust=False, min_periods=periodo).mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        indice = 100 - 100 / (1 + ganhos.to_numpy() / perdas.to_numpy())
+    # sem perdas na janela a razão é infinita e o índice vai a 100
+    return np.where((perdas.to_numpy() == 0) & (ganhos.to_numpy() > 0), 100.0, indice)
+
+
+def bandas_bollinger(somas, contagens, quadrados, janela=JANELA_BOLLINGER, desvios=DESVIOS_BOLLINGER):
+    """(média, banda inferior, banda superior) com o desvio padrão populacional da janela
+
+    A variância sai das somas acumuladas dos preços e dos quadrados, como a média móvel.
+    """
+    media = media_movel(somas, contagens, janela)
+    quadrado_medio = media_movel(quadrados, contagens, janela)
+    desvio = np.sqrt(np.maximum(quadrado_medio - media ** 2, 0.0))
+    return media, media - desvios * desvio, media + desvios * desvio
+
+
+def drawdowns(valores):
+    """(drawdown de cada pregão em %, pregões desde o último topo) de todas as colunas"""
+    with np.errstate(invalid='ignore'):
+        topos = np.fmax.accumulate(valores, axis=0)
+        queda = (valores / topos - 1) * 100
+        submerso = queda < 0
+    pregoes = np.arange(len(valores))[:, None]
+    ultimo_topo = np.maximum.accumulate(np.where(submerso, 0, pregoes), axis=0)
+    return queda, np.where(submerso, pregoes - ultimo_topo, 0)
+
+
+def beta(retornos, retornos_indice):
+    """Beta de cada coluna contra o índice, só nos pregões em que ambos têm retorno"""
+    validos = ~np.isnan(retornos) & ~np.isnan(retornos_indice)[:, None]
+    quantidade = validos.sum(axis=0)
+    ativo = np.where(validos, retornos, 0.0)
+    indice = np.where(validos, retornos_indice[:, None], 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_ativo = ativo.sum(axis=0) / quantidade
+        media_indice = indice.sum(axis=0) / quantidade
+        covariancia = (ativo * indice).sum(axis=0) / quantidade - media_ativo * media_indice
+        variancia = (indice ** 2).sum(axis=0) / quantidade - media_indice ** 2
+        return np.where(quantidade > 1, covariancia / variancia, np.nan)
+
+
+class Indicadores:
+    """Indicadores técnicos de todos os ativos, calculados coluna a coluna sobre a matriz data × ativo
+
+    Cada indicador é uma operação sobre a matriz inteira (nenhum laço por ativo) e fica
+    guardado por (indicador, parâmetros) até a próxima versão dos dados, que cria uma
+    instância nova. `indice` é a série de fechamentos do IBOVESPA, usada pelo beta.
+    """
+
+    def __init__(self, precos, indice=None, versao=0):
+        self.precos = precos
+        self.versao = versao
+        matrizes = preparar(precos)
+        self.valores = pd.DataFrame(precos).ffill().to_numpy(dtype=np.float64)
+        self.retornos, self.somas, self.contagens = matrizes['retornos'], matrizes['somas'], matrizes['contagens']
+        self.indice = None if indice is None else pd.Series(indice).reindex(precos.index).ffill()
+        self._calculados = {}
+
+    def _guardado(self, nome, parametros, calcular):
+        chave = (nome, parametros, self.versao)
+        if chave not in self._calculados:
+            self._calculados[chave] = calcular()
+        return self._calculados[chave]
+
+    def _tabela(self, valores):
+        return pd.DataFrame(valores, index=self.precos.index, columns=self.precos.columns)
+
+    def media_movel(self, janela=JANELA_CURTA):
+        return self._guardado('media_movel', (janela,), lambda: self._tabela(
+            media_movel(self.somas, self.contagens, janela)))
+
+    def media_exponencial(self, periodo=JANELA_CURTA):
+        return self._guardado('media_exponencial', (periodo,), lambda: self._tabela(
+            media_exponencial(self.valores, periodo)))
+
+    def rsi(self, periodo=PERIODO_RSI):
+        return self._guardado('rsi', (periodo,), lambda: self._tabela(rsi(self.valores, periodo)))
+
+    def bollinger(self, janela=JANELA_BOLLINGER, desvios=DESVIOS_BOLLINGER):
+        """(média, inferior, superior) como DataFrames data × ativo"""
+        def calcular():
+            zeros = np.zeros((1, self.valores.shape[1]))
+            quadrados = np.vstack([zeros, np.cumsum(np.nan_to_num(self.valores) ** 2, axis=0)])
+            return tuple(map(self._tabela, bandas_bollinger(self.somas, self.contagens, quadrados, janela, desvios)))
+        return self._guardado('bollinger', (janela, desvios), calcular)
+
+    def drawdown(self):
+        """(drawdown em %, pregões submersos) como DataFrames data × ativo"""
+        return self._guardado('drawdown', (), lambda: tuple(map(self._tabela, drawdowns(self.valores))))
+
+    def beta(self):
+        def calcular():
+            if self.indice is None:
+                return pd.Series(np.nan, index=self.precos.columns)
+            indice = self.indice.to_numpy(dtype=np.float64)
+            retornos_indice = np.full_like(indice, np.nan)
+            retornos_indice[1:] = indice[1:] / indice[:-1] - 1
+            return pd.Series(beta(self.retornos, retornos_indice), index=self.precos.columns)
+        return self._guardado('beta', (), calcular)
+
+    def tabela(self):
+        """Último valor de cada indicador por ativo (colunas de COLUNAS_INDICADORES)
+
+        Sem pregões no período a tabela volta sem linhas.
+        """
+        def calcular():
+            if self.precos.empty:
+                return pd.DataFrame(columns=COLUNAS_INDICADORES, index=pd.Index([], name='Ativo'), dtype=np.float64)
+            media, inferior, superior = self.bollinger()
+            queda, submersos = self.drawdown()
+            tabela = pd.DataFrame({
+                'mm_20': self.media_movel(JANELA_CURTA).iloc[-1],
+                'mm_50': self.media_movel(JANELA_LONGA).iloc[-1],
+                'mme_20': self.media_exponencial(JANELA_CURTA).iloc[-1],
+                'rsi_14': self.rsi(PERIODO_RSI).iloc[-1],
+                'bollinger_inferior': inferior.iloc[-1],
+                'bollinger_superior': superior.iloc[-1],
+                'max_drawdown': queda.min(),
+                'duracao_drawdown': submersos.max(),
+                'drawdown_atual': queda.iloc[-1],
+                'beta': self.beta(),
+            }, columns=COLUNAS_INDICADORES)
+            tabela.index.name = 'Ativo'
+            return tabela
+        return self._guardado('tabela', (), calcular)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from armazem import ArmazemPrecos
+
+
+def _dia(data):
+    return np.datetime64(pd.Timestamp(data).date(), 'D')
+
+
+class IndiceDatas:
+    """Consultas por data sobre os blocos ordenados por ativo de um ArmazemPrecos
+
+    Cada ativo tem suas datas em ordem crescente num bloco contíguo, então achar um
+    pregão é uma busca binária (O(log n)) no bloco. Datas sem pregão (fim de semana,
+    feriado) resolvem para o pregão anterior mais próximo. Intervalos devolvem views
+    dos arrays do armazém, sem copiar os dados.
+    """
+
+    def __init__(self, armazem):
+        self.armazem = armazem
+
+    @classmethod
+    def de_matrizes(cls, precos, volumes):
+        """Índice a partir das matrizes largas (data × ativo), mantendo float64"""
+        dados = pd.concat({'Close': precos, 'Volume': volumes.reindex(columns=precos.columns)}, axis=1)
+        return cls(ArmazemPrecos.de_download(dados, tipo=np.float64))
+
+    def __contains__(self, ativo):
+        return ativo in self.armazem
+
+    def no_dia(self, ativo, data):
+        """(data do pregão, preço, volume) em `data` ou no último pregão antes dela
+
+        Devolve None se o ativo não tiver pregão até essa data.
+        """
+        datas, precos, volumes = self.armazem.serie(ativo)
+        posicao = int(np.searchsorted(datas, _dia(data), side='right')) - 1
+        if posicao < 0:
+            return None
+        return pd.Timestamp(datas[posicao]), float(precos[posicao]), float(volumes[posicao])
+
+    def entre(self, ativo, inicio=None, fim=None):
+        """Views (datas, preços, volumes) dos pregões do ativo em [inicio, fim]"""
+        datas, precos, volumes = self.armazem.serie(ativo)
+        i = 0 if inicio is None else int(np.searchsorted(datas, _dia(inicio)))
+        j = len(datas) if fim is None else int(np.searchsorted(datas, _dia(fim), side='right'))
+        return datas[i:j], precos[i:j], volumes[i:j]
@@ -0,0 +1,335 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PREFIXO = 'assistente'
+LIMITES_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DESCRICOES = {
+    'etapa_segundos': "Duração das etapas instrumentadas (busca, reformatação, métricas, roteamento, consulta, gráficos)",
+    'etapa_erros': "Etapas interrompidas por exceção",
+    'respostas': "Respostas por intenção e resultado do cache de respostas",
+    'requisicoes': "Requisições HTTP por caminho e status",
+    'erros_internos': "Requisições HTTP que terminaram em erro 500, por caminho e exceção",
+}
+
+registro = logging.getLogger('assistente.instrumentacao')
+
+
+class _Inativo:
+    """Gerenciador vazio devolvido com a instrumentação desligada (sempre a mesma instância)"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        return False
+
+
+_INATIVO = _Inativo()
+
+
+class _Etapa:
+    __slots__ = ('instrumentacao', 'nome', 'rotulos', 'inicio')
+
+    def __init__(self, instrumentacao, nome, rotulos):
+        self.instrumentacao = instrumentacao
+        self.nome = nome
+        self.rotulos = rotulos
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, *erro):
+        self.instrumentacao._registrar_etapa(self.nome, self.rotulos, time.perf_counter() - self.inicio, tipo)
+        return False
+
+
+class _Rastro:
+    """Agrupa as etapas de uma pergunta (ou execução) numa única linha de log estruturado"""
+
+    def __init__(self, instrumentacao, evento, campos):
+        self.instrumentacao = instrumentacao
+        self.evento = evento
+        self.campos = campos
+        self.etapas = {}
+
+    def __enter__(self):
+        local = self.instrumentacao._local
+        self.anterior = getattr(local, 'rastro', None)
+        local.rastro = self
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, *erro):
+        total = time.perf_counter() - self.inicio
+        self.instrumentacao._local.rastro = self.anterior
+        linha = {'evento': self.evento, **self.campos, 'total_ms': round(total * 1000, 3),
+                 'etapas_ms': {nome: round(segundos * 1000, 3) for nome, segundos in self.etapas.items()}}
+        if tipo is not None:
+            linha['erro'] = tipo.__name__
+        registro.info(json.dumps(linha, ensure_ascii=False, default=str))
+        return False
+
+
+class _Continuacao:
+    """Faz as etapas da thread atual somarem ao rastro aberto em outra thread"""
+    __slots__ = ('instrumentacao', 'rastro', 'anterior')
+
+    def __init__(self, instrumentacao, rastro):
+        self.instrumentacao = instrumentacao
+        self.rastro = rastro
+
+    def __enter__(self):
+        local = self.instrumentacao._local
+        self.anterior = getattr(local, 'rastro', None)
+        local.rastro = self.rastro
+        return self
+
+    def __exit__(self, *erro):
+        self.instrumentacao._local.rastro = self.anterior
+        return False
+
+
+class Histograma:
+    """Contagens acumuladas por limite, soma e total, como o histograma do Prometheus"""
+    __slots__ = ('contagens', 'soma', 'total')
+
+    def __init__(self):
+        self.contagens = [0] * len(LIMITES_SEGUNDOS)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        for i, limite in enumerate(LIMITES_SEGUNDOS):
+            if valor <= limite:
+                self.contagens[i] += 1
+                break
+        self.soma += valor
+        self.total += 1
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos_texto(rotulos):
+    if not rotulos:
+        return ''
+    return '{' + ','.join(f'{chave}="{_escapar(valor)}"' for chave, valor in rotulos) + '}'
+
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+
+class Instrumentacao:
+    """Temporizadores por etapa, contadores, logs estruturados e texto no formato do Prometheus
+
+    Desligada (o padrão), `etapa` e `rastro` devolvem sempre o mesmo gerenciador vazio e
+    `contar`/`anotar` retornam na primeira linha: o custo nos caminhos quentes é uma
+    checagem de atributo. Ligada, cada etapa alimenta um histograma por (etapa, rótulos)
+    e soma seu tempo ao rastro da pergunta em andamento na thread, que vira uma linha
+    JSON no logger 'assistente.instrumentacao' ao terminar.
+    """
+
+    def __init__(self):
+        self.ativa = False
+        self.perfilador = None
+        self._trava = threading.Lock()
+        self._local = threading.local()
+        self._contadores = {}
+        self._histogramas = {}
+
+    def ativar(self, log=None):
+        """Liga a coleta; `log` é um caminho de arquivo ou um stream para as linhas JSON"""
+        if log is not None:
+            manipulador = logging.StreamHandler(log) if hasattr(log, 'write') else logging.FileHandler(log, encoding='utf-8')
+            manipulador.setFormatter(logging.Formatter('%(message)s'))
+            registro.addHandler(manipulador)
+            registro.setLevel(logging.INFO)
+            registro.propagate = False
+        self.ativa = True
+        return self
+
+    def desativar(self):
+        self.ativa = False
+        if self.perfilador is not None:
+            self.perfilador.parar()
+
+    def limpar(self):
+        with self._trava:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def etapa(self, nome, **rotulos):
+        """Gerenciador de contexto que cronometra a etapa `nome`"""
+        if not self.ativa:
+            return _INATIVO
+        return _Etapa(self, nome, rotulos)
+
+    def rastro(self, evento, **campos):
+        """Gerenciador que junta as etapas internas numa linha de log `evento` com `campos`"""
+        if not self.ativa:
+            return _INATIVO
+        return _Rastro(self, evento, campos)
+
+    def rastro_atual(self):
+        """Rastro em andamento nesta thread (None se não houver), para repassar a outra thread"""
+        return getattr(self._local, 'rastro', None)
+
+    def continuar_rastro(self, rastro):
+        """Gerenciador que soma as etapas desta thread ao `rastro` (vindo de `rastro_atual`)"""
+        if rastro is None:
+            return _INATIVO
+        return _Continuacao(self, rastro)
+
+    def anotar(self, **campos):
+        """Acrescenta campos à linha de log do rastro em andamento"""
+        if not self.ativa:
+            return
+        rastro = getattr(self._local, 'rastro', None)
+        if rastro is not None:
+            rastro.campos.update(campos)
+
+    def contar(self, nome, valor=1, **rotulos):
+        if not self.ativa:
+            return
+        chave = _chave(nome, rotulos)
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def _registrar_etapa(self, nome, rotulos, segundos, erro):
+        chave = _chave('etapa_segundos', {'etapa': nome, **rotulos})
+        with self._trava:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma()
+            histograma.observar(segundos)
+            # o rastro pode receber etapas de várias threads (continuar_rastro)
+            rastro = getattr(self._local, 'rastro', None)
+            if rastro is not None:
+                rastro.etapas[nome] = rastro.etapas.get(nome, 0.0) + segundos
+        if erro is not None:
+            self.contar('etapa_erros', etapa=nome, erro=erro.__name__)
+
+    def resumo_etapas(self):
+        """[(etapa, execuções, total s, média ms)] somando os rótulos, da mais cara para a mais barata"""
+        totais = {}
+        with self._trava:
+            for (_, rotulos), histograma in self._histogramas.items():
+                etapa = dict(rotulos)['etapa']
+                execucoes, soma = totais.get(etapa, (0, 0.0))
+                totais[etapa] = (execucoes + histograma.total, soma + histograma.soma)
+        return sorted(((etapa, n, soma, soma / n * 1000) for etapa, (n, soma) in totais.items()),
+                      key=lambda linha: -linha[2])
+
+    def texto_prometheus(self):
+        """Contadores e histogramas no formato de texto de exposição do Prometheus"""
+        linhas = []
+        with self._trava:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted((chave, (list(h.contagens), h.soma, h.total)) for chave, h in self._histogramas.items())
+
+        anterior = None
+        for (nome, rotulos), valor in contadores:
+            metrica = f"{PREFIXO}_{nome}_total"
+            if nome != anterior:
+                linhas += [f"# HELP {metrica} {DESCRICOES.get(nome, nome)}", f"# TYPE {metrica} counter"]
+                anterior = nome
+            linhas.append(f"{metrica}{_rotulos_texto(rotulos)} {valor}")
+
+        anterior = None
+        for (nome, rotulos), (contagens, soma, total) in histogramas:
+            metrica = f"{PREFIXO}_{nome}"
+            if nome != anterior:
+                linhas += [f"# HELP {metrica} {DESCRICOES.get(nome, nome)}", f"# TYPE {metrica} histogram"]
+                anterior = nome
+            acumulado = 0
+            for limite, contagem in zip(LIMITES_SEGUNDOS, contagens):
+                acumulado += contagem
+                linhas.append(f"{metrica}_bucket{_rotulos_texto(rotulos + (('le', limite),))} {acumulado}")
+            linhas.append(f"{metrica}_bucket{_rotulos_texto(rotulos + (('le', '+Inf'),))} {total}")
+            linhas.append(f"{metrica}_sum{_rotulos_texto(rotulos)} {soma:.9f}")
+            linhas.append(f"{metrica}_count{_rotulos_texto(rotulos)} {total}")
+        return '\n'.join(linhas) + '\n'
+
+    def salvar_prometheus(self, caminho):
+        """Grava o texto de exposição (para o textfile collector do node_exporter, por exemplo)"""
+        temporario = f"{caminho}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(self.texto_prometheus())
+        os.replace(temporario, caminho)
+
+    def perfilar(self, intervalo=0.005):
+        """Liga o amostrador de pilhas (opcional, independente dos temporizadores)"""
+        self.perfilador = AmostradorPilhas(intervalo).iniciar()
+        return self.perfilador
+
+
+class AmostradorPilhas:
+    """Perfilador por amostragem: lê a pilha de todas as threads a cada `intervalo` segundos
+
+    Roda numa thread própria com sys._current_frames(), sem rastrear chamadas, então o
+    custo não depende de quantas funções o código executa. As pilhas saem no formato
+    "folded" (uma linha 'raiz;...;folha contagem'), aceito por flamegraph.pl e speedscope.
+    """
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self.amostras = 0
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._amostrar, name='amostrador-pilhas', daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _amostrar(self):
+        propria = threading.get_ident()
+        while not self._parar.wait(self.intervalo):
+            for ident, quadro in sys._current_frames().items():
+                if ident == propria:
+                    continue
+                pilha = []
+                while quadro is not None:
+                    codigo = quadro.f_code
+                    pilha.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+                    quadro = quadro.f_back
+                self.pilhas[';'.join(reversed(pilha))] += 1
+            self.amostras += 1
+
+    def mais_frequentes(self, quantidade=10, propria=True):
+        """[(função, fração das amostras)]: no topo da pilha (`propria`) ou em qualquer nível"""
+        presencas = Counter()
+        for pilha, contagem in self.pilhas.items():
+            funcoes = pilha.split(';')
+            for funcao in (funcoes[-1:] if propria else set(funcoes)):
+                presencas[funcao] += contagem
+        total = sum(self.pilhas.values()) or 1
+        return [(funcao, contagem / total) for funcao, contagem in presencas.most_common(quantidade)]
+
+    def salvar(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            for pilha, contagem in self.pilhas.most_common():
+                arquivo.write(f"{pilha} {contagem}\n")
+
+
+instrumentacao = Instrumentacao()
+if os.environ.get('ASSISTENTE_INSTRUMENTACAO'):
+    instrumentacao.ativar(os.environ.get('ASSISTENTE_LOG') or None)
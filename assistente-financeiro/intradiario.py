@@ -0,0 +1,316 @@
+import math
+import socket
+import socketserver
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque, namedtuple
+
+import numpy as np
+import pandas as pd
+
+# um negócio (tick): instante em segundos desde a época (UTC), preço e quantidade
+Negocio = namedtuple('Negocio', ['instante', 'ativo', 'preco', 'quantidade'])
+Barra = namedtuple('Barra', ['inicio', 'abertura', 'maxima', 'minima', 'fechamento', 'volume', 'negocios'])
+
+INTERVALO_BARRA = 60
+BARRAS_GUARDADAS = 600
+SEGUNDOS_DIA = 86_400
+
+
+def ler_negocio(linha):
+    """Negócio de uma linha 'instante,ativo,preço,quantidade' (None para cabeçalho ou linha vazia)"""
+    campos = linha.strip().split(',')
+    if len(campos) != 4 or not campos[0][:1].isdigit():
+        return None
+    return Negocio(float(campos[0]), campos[1], float(campos[2]), float(campos[3]))
+
+
+def gravar_negocios(caminho, negocios):
+    """Grava negócios no formato lido por ReprodutorArquivo (para testes e benchmarks)"""
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write("instante,ativo,preco,quantidade\n")
+        for negocio in negocios:
+            arquivo.write(f"{negocio.instante:.3f},{negocio.ativo},{negocio.preco:.4f},{negocio.quantidade:.0f}\n")
+
+
+class FonteEventos(ABC):
+    """Interface comum dos fluxos intradiários: um iterável de Negocio em ordem de chegada"""
+
+    @abstractmethod
+    def __iter__(self):
+        """Negócios em ordem de chegada, até o fluxo acabar"""
+
+
+class FonteNegociosSintetica(FonteEventos):
+    """Negócios sintéticos (passeio aleatório por ativo) gerados de forma vetorizada, sem rede
+
+    `precos_iniciais` ({ativo: preço}) faz o fluxo continuar de onde os dados diários
+    pararam; os instantes avançam em média `espacamento` segundos por negócio a partir
+    de `inicio` (pregão de hoje às 10h de Brasília, se não vier).
+    """
+
+    def __init__(self, ativos, quantidade=100_000, inicio=None, espacamento=0.01, precos_iniciais=None,
+                 volatilidade=0.0005, semente=7):
+        self.ativos = list(ativos)
+        self.quantidade = quantidade
+        if inicio is None:
+            inicio = pd.Timestamp.today().normalize() + pd.Timedelta(hours=13)
+        self.inicio = pd.Timestamp(inicio).timestamp()
+        self.espacamento = espacamento
+        self.precos_iniciais = precos_iniciais or {}
+        self.volatilidade = volatilidade
+        self.semente = semente
+
+    def __iter__(self):
+        gerador = np.random.default_rng(self.semente)
+        indices = gerador.integers(0, len(self.ativos), self.quantidade)
+        instantes = self.inicio + np.cumsum(gerador.exponential(self.espacamento, self.quantidade))
+        choques = gerador.normal(0.0, self.volatilidade, self.quantidade)
+        iniciais = np.array([self.precos_iniciais.get(ativo, 0.0) or gerador.uniform(5, 100) for ativo in self.ativos])
+
+        # passeio de cada ativo: soma acumulada dos choques dos seus próprios negócios
+        ordem = np.argsort(indices, kind='stable')
+        somas = np.concatenate([[0.0], np.cumsum(choques[ordem])])
+        inicio_grupo = np.searchsorted(indices[ordem], np.arange(len(self.ativos)))
+        acumulados = np.empty(self.quantidade)
+        acumulados[ordem] = somas[1:] - somas[inicio_grupo][indices[ordem]]
+        precos = iniciais[indices] * np.exp(acumulados)
+        quantidades = gerador.integers(1, 100, self.quantidade) * 100
+
+        ativos = self.ativos
+        for instante, indice, preco, quantidade in zip(instantes.tolist(), indices.tolist(),
+                                                       precos.round(2).tolist(), quantidades.tolist()):
+            yield Negocio(instante, ativos[indice], preco, quantidade)
+
+
+class ReprodutorArquivo(FonteEventos):
+    """Relê um arquivo de negócios; com `velocidade` respeita os intervalos (2.0 = 2× mais rápido)"""
+
+    def __init__(self, caminho, velocidade=None):
+        self.caminho = caminho
+        self.velocidade = velocidade
+
+    def __iter__(self):
+        referencia = None
+        with open(self.caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                negocio = ler_negocio(linha)
+                if negocio is None:
+                    continue
+                if self.velocidade:
+                    if referencia is None:
+                        referencia = (negocio.instante, time.perf_counter())
+                    espera = (negocio.instante - referencia[0]) / self.velocidade - (time.perf_counter() - referencia[1])
+                    if espera > 0:
+                        time.sleep(espera)
+                yield negocio
+
+
+class ReprodutorSocket(FonteEventos):
+    """Lê negócios de uma conexão TCP, uma linha 'instante,ativo,preço,quantidade' por negócio"""
+
+    def __init__(self, host, porta):
+        self.host = host
+        self.porta = porta
+
+    def __iter__(self):
+        with socket.create_connection((self.host, self.porta)) as conexao:
+            with conexao.makefile('r', encoding='utf-8', newline='\n') as linhas:
+                for linha in linhas:
+                    negocio = ler_negocio(linha)
+                    if negocio is not None:
+                        yield negocio
+
+
+def transmitir_arquivo(caminho, host='127.0.0.1', porta=0):
+    """Servidor TCP (numa thread) que envia o arquivo de negócios a cada conexão
+
+    Serve de par para ReprodutorSocket em testes. Devolve (servidor, porta); encerre
+    com servidor.shutdown().
+    """
+    class Transmissor(socketserver.StreamRequestHandler):
+        def handle(self):
+            with open(caminho, 'rb') as arquivo:
+                for bloco in iter(lambda: arquivo.read(1 << 16), b''):
+                    self.wfile.write(bloco)
+
+    servidor = socketserver.ThreadingTCPServer((host, porta), Transmissor)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name='transmissor-negocios', daemon=True).start()
+    return servidor, servidor.server_address[1]
+
+
+class EstadoAtivo:
+    """Estado intradiário de um ativo, atualizado em O(1) por negócio
+
+    A volatilidade é a de Welford (média e soma dos quadrados dos desvios acumuladas)
+    sobre os log-retornos entre fechamentos de barras consecutivas.
+    """
+
+    __slots__ = ('referencia', 'dia', 'preco_atual', 'instante', 'maxima', 'minima', 'volume', 'negocios',
+                 'barra_inicio', 'barra_abertura', 'barra_maxima', 'barra_minima', 'barra_volume',
+                 'barra_negocios', 'ultimo_fechamento', 'n_retornos', 'media', 'm2', 'barras')
+
+    def __init__(self, referencia, dia):
+        self.referencia = referencia
+        self.barras = deque(maxlen=BARRAS_GUARDADAS)
+        self.novo_dia(dia, referencia)
+
+    def novo_dia(self, dia, referencia):
+        self.dia = dia
+        self.referencia = referencia
+        self.preco_atual = self.instante = self.maxima = self.minima = None
+        self.volume = 0.0
+        self.negocios = 0
+        self.barra_inicio = None
+        self.ultimo_fechamento = None
+        self.n_retornos = 0
+        self.media = self.m2 = 0.0
+        self.barras.clear()
+
+    def fechar_barra(self):
+        fechamento = self.preco_atual
+        self.barras.append(Barra(self.barra_inicio, self.barra_abertura, self.barra_maxima, self.barra_minima,
+                                 fechamento, self.barra_volume, self.barra_negocios))
+        if self.ultimo_fechamento is not None:
+            retorno = math.log(fechamento / self.ultimo_fechamento)
+            self.n_retornos += 1
+            delta = retorno - self.media
+            self.media += delta / self.n_retornos
+            self.m2 += delta * (retorno - self.media)
+        self.ultimo_fechamento = fechamento
+
+    def volatilidade(self):
+        """Desvio padrão dos log-retornos por barra, em % (NaN com menos de dois retornos)"""
+        return math.sqrt(self.m2 / (self.n_retornos - 1)) * 100 if self.n_retornos > 1 else math.nan
+
+    def retorno(self):
+        """Variação desde o fechamento anterior (ou o primeiro negócio do dia), em %"""
+        if self.preco_atual is None or not self.referencia:
+            return math.nan
+        return (self.preco_atual / self.referencia - 1) * 100
+
+
+class IngestaoIntradiaria:
+    """Consome um fluxo de negócios, agrega em barras e mantém as métricas intradiárias
+
+    Cada negócio custa uma busca no dicionário de ativos e algumas atribuições: nada é
+    acumulado num DataFrame. Negócios mais antigos que a barra aberta do ativo somam ao
+    volume do dia, mas não mudam o preço atual nem reabrem barras já fechadas (são
+    contados em `atrasados`; os de um dia anterior são descartados).
+    `iniciar` consome a fonte numa thread; as leituras (`painel`, `estado`) podem ocorrer
+    em paralelo e veem cada ativo no último negócio já aplicado.
+    """
+
+    def __init__(self, fonte=None, referencias=None, intervalo_barra=INTERVALO_BARRA):
+        self.fonte = fonte
+        self.referencias = dict(referencias or {})
+        self.intervalo_barra = intervalo_barra
+        self.estados = {}
+        self.eventos = 0
+        self.atrasados = 0
+        self._thread = None
+        self._parar = threading.Event()
+
+    def processar(self, negocio):
+        instante, ativo, preco, quantidade = negocio
+        dia = int(instante // SEGUNDOS_DIA)
+        estado = self.estados.get(ativo)
+        if estado is None:
+            estado = self.estados[ativo] = EstadoAtivo(self.referencias.get(ativo), dia)
+        elif dia != estado.dia:
+            if dia < estado.dia:
+                self.atrasados += 1
+                return
+            estado.novo_dia(dia, estado.preco_atual)
+
+        inicio = instante - instante % self.intervalo_barra
+        if estado.barra_inicio is None or inicio > estado.barra_inicio:
+            if estado.barra_inicio is not None:
+                estado.fechar_barra()
+            estado.barra_inicio = inicio
+            estado.barra_abertura = estado.barra_maxima = estado.barra_minima = preco
+            estado.barra_volume = 0.0
+            estado.barra_negocios = 0
+        elif inicio < estado.barra_inicio:
+            # atrasado: soma ao volume, mas não volta o preço nem reabre a barra fechada
+            self.atrasados += 1
+            estado.volume += quantidade
+            estado.negocios += 1
+            self.eventos += 1
+            return
+        else:
+            if preco > estado.barra_maxima:
+                estado.barra_maxima = preco
+            elif preco < estado.barra_minima:
+                estado.barra_minima = preco
+        estado.barra_volume += quantidade
+        estado.barra_negocios += 1
+
+        if estado.referencia is None:
+            estado.referencia = preco
+        if estado.maxima is None or preco > estado.maxima:
+            estado.maxima = preco
+        if estado.minima is None or preco < estado.minima:
+            estado.minima = preco
+        estado.preco_atual = preco
+        estado.instante = instante
+        estado.volume += quantidade
+        estado.negocios += 1
+        self.eventos += 1
+
+    def consumir(self, negocios, limite=None):
+        """Aplica os negócios de um iterável (até `limite`, ou até `parar`); devolve quantos aplicou"""
+        processar, parar = self.processar, self._parar
+        aplicados = 0
+        for negocio in negocios:
+            processar(negocio)
+            aplicados += 1
+            if (limite is not None and aplicados >= limite) or (not aplicados & 1023 and parar.is_set()):
+                break
+        return aplicados
+
+    def iniciar(self):
+        """Consome `self.fonte` numa thread de fundo"""
+        self._parar.clear()
+        self._thread = threading.Thread(target=self.consumir, args=(self.fonte,), name='ingestao-intradiaria',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self, espera=5.0):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(espera)
+
+    def __contains__(self, ativo):
+        estado = self.estados.get(ativo)
+        return estado is not None and estado.preco_atual is not None
+
+    def estado(self, ativo):
+        return self.estados.get(ativo)
+
+    def barras(self, ativo, incluir_aberta=True):
+        """Barras fechadas do ativo (mais a barra em formação) como DataFrame indexado pelo início"""
+        estado = self.estados.get(ativo)
+        if estado is None:
+            return pd.DataFrame(columns=Barra._fields[1:])
+        barras = list(estado.barras)
+        if incluir_aberta and estado.barra_inicio is not None:
+            barras.append(Barra(estado.barra_inicio, estado.barra_abertura, estado.barra_maxima, estado.barra_minima,
+                                estado.preco_atual, estado.barra_volume, estado.barra_negocios))
+        tabela = pd.DataFrame(barras, columns=Barra._fields)
+        tabela.index = pd.to_datetime(tabela.pop('inicio'), unit='s')
+        return tabela
+
+    def painel(self):
+        """Métricas intradiárias de todos os ativos com negócios (montado na hora da leitura)"""
+        linhas = {ativo: {'preco_atual': estado.preco_atual, 'retorno_dia': estado.retorno(),
+                          'volatilidade_barras': estado.volatilidade(), 'maxima': estado.maxima,
+                          'minima': estado.minima, 'volume': estado.volume, 'negocios': estado.negocios,
+                          'barras': len(estado.barras), 'instante': estado.instante}
+                  for ativo, estado in list(self.estados.items()) if estado.preco_atual is not None}
+        tabela = pd.DataFrame.from_dict(linhas, orient='index')
+        tabela.index.name = 'Ativo'
+        return tabela
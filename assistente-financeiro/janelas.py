@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from metricas import COLUNAS_METRICAS, retornos_diarios
+
+
+def intervalo_do_periodo(periodo, ultima_data):
+    """Converte um período em (inicio, fim) inclusivos e uma descrição legível
+
+    Aceita None (histórico todo), ('dias', n), ('meses', n), ('anos', n), ('ano', 2024),
+    ('ytd',), ('data', inicio) (dessa data até a última) e ('intervalo', inicio, fim).
+    """
+    if periodo is None:
+        return None, None, "histórico completo"
+
+    ultima_data = pd.Timestamp(ultima_data)
+    tipo = periodo[0]
+    if tipo in ('dias', 'meses', 'anos'):
+        quantidade = periodo[1]
+        deslocamento = {'dias': pd.DateOffset(days=quantidade), 'meses': pd.DateOffset(months=quantidade),
+                        'anos': pd.DateOffset(years=quantidade)}[tipo]
+        return ultima_data - deslocamento, ultima_data, f"últimos {quantidade} {tipo}"
+    elif tipo == 'ano':
+        return pd.Timestamp(periodo[1], 1, 1), pd.Timestamp(periodo[1], 12, 31), f"{periodo[1]}"
+    elif tipo == 'ytd':
+        return pd.Timestamp(ultima_data.year, 1, 1), ultima_data, f"no ano de {ultima_data.year}"
+    elif tipo == 'data':
+        inicio = pd.Timestamp(periodo[1])
+        return inicio, ultima_data, f"desde {inicio:%d/%m/%Y}"
+    elif tipo == 'intervalo':
+        inicio, fim = pd.Timestamp(periodo[1]), pd.Timestamp(periodo[2])
+        return inicio, fim, f"{inicio:%d/%m/%Y} a {fim:%d/%m/%Y}"
+    raise ValueError(f"Período inválido: {periodo}")
+
+
+class TabelaEsparsa:
+    """Mínimo/máximo de qualquer intervalo de linhas em O(1), para todas as colunas de uma vez"""
+
+    def __init__(self, matriz, funcao):
+        self.funcao = funcao
+        self.niveis = [matriz]
+        salto = 1
+        while 2 * salto <= len(matriz):
+            anterior = self.niveis[-1]
+            self.niveis.append(funcao(anterior[:-salto], anterior[salto:]))
+            salto *= 2
+
+    def consultar(self, inicio, fim):
+        """Agregado das linhas [inicio, fim) em cada coluna"""
+        nivel = int(np.log2(fim - inicio))
+        tabela = self.niveis[nivel]
+        return self.funcao(tabela[inicio], tabela[fim - (1 << nivel)])
+
+
+class JanelasMetricas:
+    """Métricas de qualquer janela de datas a partir de somas acumuladas
+
+    Guarda as somas prefixadas de retornos, retornos ao quadrado, contagens e volumes,
+    mais preços com preenchimento para frente/para trás e tabelas esparsas de mínimo e
+    máximo. Qualquer janela custa O(1) por ativo, e as séries móveis saem de uma
+    diferença vetorizada das somas para todos os ativos ao mesmo tempo. Melhor e pior
+    dia não são mantidos por janela (ficam NaN) para não dobrar as tabelas esparsas.
+    """
+
+    def __init__(self, precos, volumes=None):
+        self.datas = precos.index.values.astype('datetime64[D]')
+        self.ativos = list(precos.columns)
+        matriz = precos.to_numpy(dtype=np.float64)
+        retornos = retornos_diarios(precos).to_numpy(dtype=np.float64)
+
+        def acumular(valores):
+            soma = np.zeros((len(valores) + 1, valores.shape[1]))
+            np.cumsum(valores, axis=0, out=soma[1:])
+            return soma
+
+        validos = ~np.isnan(retornos)
+        self._n_retornos = acumular(validos.astype(np.float64))
+        self._soma = acumular(np.where(validos, retornos, 0.0))
+        self._soma_quadrados = acumular(np.where(validos, retornos ** 2, 0.0))
+        if volumes is not None:
+            volumes = volumes.reindex(index=precos.index, columns=precos.columns).to_numpy(dtype=np.float64)
+            self._n_volumes = acumular((~np.isnan(volumes)).astype(np.float64))
+            self._soma_volumes = acumular(np.nan_to_num(volumes))
+        else:
+            self._n_volumes = self._soma_volumes = None
+
+        self._para_frente = pd.DataFrame(matriz).ffill().to_numpy()
+        self._para_tras = pd.DataFrame(matriz).bfill().to_numpy()
+        self._minimos = TabelaEsparsa(np.where(np.isnan(matriz), np.inf, matriz), np.minimum)
+        self._maximos = TabelaEsparsa(np.where(np.isnan(matriz), -np.inf, matriz), np.maximum)
+
+    def posicoes(self, inicio=None, fim=None):
+        """Linhas [i, j) cobertas pelas datas inclusivas [inicio, fim] (busca binária)"""
+        i = 0 if inicio is None else int(np.searchsorted(self.datas, np.datetime64(pd.Timestamp(inicio).date())))
+        j = len(self.datas) if fim is None else int(
+            np.searchsorted(self.datas, np.datetime64(pd.Timestamp(fim).date()), side='right'))
+        return i, j
+
+    def metricas(self, inicio=None, fim=None):
+        """Tabela de métricas (formato de metricas.calcular_metricas) da janela [inicio, fim]"""
+        i, j = self.posicoes(inicio, fim)
+        if j <= i:
+            return pd.DataFrame(np.nan, index=pd.Index(self.ativos, name='Ativo'), columns=COLUNAS_METRICAS)
+
+        # o retorno da primeira linha da janela depende de um preço de fora dela
+        n = self._n_retornos[j] - self._n_retornos[i + 1]
+        soma = self._soma[j] - self._soma[i + 1]
+        soma_quadrados = self._soma_quadrados[j] - self._soma_quadrados[i + 1]
+        minimo = self._minimos.consultar(i, j)
+        maximo = self._maximos.consultar(i, j)
+        preco_inicial = np.where(np.isfinite(maximo), self._para_tras[i], np.nan)
+        preco_final = self._para_frente[j - 1]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = soma / n
+            desvios = np.maximum(soma_quadrados - n * media ** 2, 0.0)
+            volume_medio = np.nan
+            if self._soma_volumes is not None:
+                volume_medio = (self._soma_volumes[j] - self._soma_volumes[i]) / (self._n_volumes[j] - self._n_volumes[i])
+            tabela = pd.DataFrame({
+                'retorno_total': (preco_final / preco_inicial - 1) * 100,
+                'volatilidade': np.where(n >= 2, np.sqrt(desvios / (n - 1)) * 100, np.nan),
+                'volatilidade_populacional': np.sqrt(desvios / n) * 100,
+                'retorno_medio': media * 100,
+                'melhor_dia': np.nan,
+                'pior_dia': np.nan,
+                'preco_inicial': preco_inicial,
+                'preco_atual': preco_final,
+                'preco_min': np.where(np.isinf(minimo), np.nan, minimo),
+                'preco_max': np.where(np.isinf(maximo), np.nan, maximo),
+                'volume_medio': volume_medio,
+            }, index=pd.Index(self.ativos, name='Ativo'))
+        return tabela
+
+    def volatilidade_movel(self, janela=21):
+        """Volatilidade móvel (%) de todos os ativos, como DataFrame data × ativo"""
+        n = self._n_retornos[janela:] - self._n_retornos[:-janela]
+        soma = self._soma[janela:] - self._soma[:-janela]
+        soma_quadrados = self._soma_quadrados[janela:] - self._soma_quadrados[:-janela]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = soma / n
+            variancia = np.maximum(soma_quadrados - n * media ** 2, 0.0) / (n - 1)
+            valores = np.where(n >= janela, np.sqrt(variancia) * 100, np.nan)
+        return self._serie(valores)
+
+    def retorno_movel(self, janela=21):
+        """Retorno acumulado (%) em janelas móveis de `janela` pregões"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valores = (self._para_frente[janela - 1:] / self._para_frente[:len(self.datas) - janela + 1] - 1) * 100
+        return self._serie(valores)
+
+    def _serie(self, valores):
+        completa = np.full((len(self.datas), len(self.ativos)), np.nan)
+        completa[len(self.datas) - len(valores):] = valores
+        return pd.DataFrame(completa, index=pd.DatetimeIndex(self.datas.astype('datetime64[ns]'), name='Data'),
+                            columns=self.ativos)
@@ -1,101 +1,178 @@
-import yfinance as yf
+import os
+import time
+
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-import os
-import requests
-import json
-from datetime import datetime
 
-plt.style.use('default')
-plt.rcParams['figure.figsize'] = (12, 8)
+from backtest import Backtest, melhores_parametros
+from cache_precos import CachePrecos
+from correlacao import MatrizCorrelacao
+from graficos import RenderizadorGraficos, desenhar_fronteira, desenhar_retorno_volatilidade, resumir_tempos
+from indicadores import INDICE_REFERENCIA, Indicadores
+from instrumentacao import instrumentacao
+from metricas import calcular_metricas_longo
+from otimizacao import OtimizadorCarteira
+from particoes import DIRETORIO_DADOS, exportar_particionado
+from pipeline import Etapa, Pipeline
+from risco import CARTEIRA, tabela_risco
+
+DIRETORIO_GRAFICOS = 'graficos'
+ARQUIVO_METRICAS = os.environ.get('ASSISTENTE_METRICAS', 'metricas_execucao.prom')
 
-def coletar_dados_ativos():
-    """Coleta dados dos ativos via Yahoo Finance"""
+def coletar_dados_ativos(fonte=None):
+    """Coleta dados dos ativos via Yahoo Finance (com cache local em disco)"""
     print("📥 Baixando dados dos ativos...")
     
     ativos = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA', 'ABEV3.SA']
     
-    dados = yf.download(ativos, period='2y')[['Close', 'Volume']]
-    dados = dados.stack(level=1).reset_index()
-    
-    dados.rename(columns={
-        'Date': 'Data',
-        'Ticker': 'Ativo',
-        'Close': 'Preço de Fechamento',
-        'Volume': 'Volume'
-    }, inplace=True)
-    
-    dados.to_csv('dados_ativos.csv', index=False)
-    print("✅ Dados salvos em 'dados_ativos.csv'")
+    fonte = fonte if fonte is not None else CachePrecos()
+    with instrumentacao.etapa('busca'):
+        dados = fonte.baixar(ativos, periodo='2y')[['Close', 'Volume']]
+    for ativo, erro in getattr(fonte, 'falhas', {}).items():
+        print(f"⚠️  Falha ao baixar {ativo}: {erro}")
+    
+    with instrumentacao.etapa('reformatacao'):
+        dados = dados.stack(level=1).reset_index()
+        dados.rename(columns={
+            'Date': 'Data',
+            'Ticker': 'Ativo',
+            'Close': 'Preço de Fechamento',
+            'Volume': 'Volume'
+        }, inplace=True)
+    
+    with instrumentacao.etapa('exportacao'):
+        gravadas, mantidas = exportar_particionado(dados, DIRETORIO_DADOS)
+    print(f"✅ Dados salvos em '{DIRETORIO_DADOS}/' ({gravadas} partições gravadas, {mantidas} sem mudança)")
     
     return dados, ativos
 
-def calcular_rentabilidade_volatilidade(dados, ativos):
-    """Calcula rentabilidade e volatilidade detalhada dos ativos"""
-    
-    resultados_detalhados = []
-    
-    for ativo in ativos:
-        df = dados[dados['Ativo'] == ativo].copy()
-        
-        df['Retorno Diário'] = df['Preço de Fechamento'].pct_change()
-        df['Retorno Diário (%)'] = df['Retorno Diário'] * 100
-        
-        preco_inicial = df['Preço de Fechamento'].iloc[0]
-        preco_final = df['Preço de Fechamento'].iloc[-1]
-        rentab_acumulada = (preco_final / preco_inicial - 1) * 100
-        
-        retornos = df['Retorno Diário'].dropna()
-
-        media_retornos = retornos.mean()
-        
-        desvios = retornos - media_retornos
-        
-        desvios_quad = desvios ** 2
-        
-        variancia = desvios_quad.mean()
-        
-        volatilidade = np.sqrt(variancia) * 100
-        
-        retorno_medio_diario = media_retornos * 100
-        melhor_dia = df['Retorno Diário (%)'].max()
-        pior_dia = df['Retorno Diário (%)'].min()
-        
-        resultados_detalhados.append([
-            ativo, 
-            rentab_acumulada, 
-            volatilidade,
-            retorno_medio_diario,
-            melhor_dia,
-            pior_dia,
-            preco_inicial,
-            preco_final
-        ])
-        
+def coletar_indice(dados, fonte=None):
+    """Fechamentos do IBOVESPA no mesmo intervalo dos dados (None se não vierem)"""
+    fonte = fonte if fonte is not None else CachePrecos()
+    with instrumentacao.etapa('busca', indice=True):
+        indice = fonte.baixar([INDICE_REFERENCIA], inicio=dados['Data'].min(),
+                              fim=dados['Data'].max() + pd.Timedelta(days=1))
+    if INDICE_REFERENCIA not in indice['Close'].columns or indice['Close'][INDICE_REFERENCIA].isna().all():
+        print("⚠️  IBOVESPA indisponível: beta não será calculado")
+        return None
+    return indice['Close'][INDICE_REFERENCIA]
+
+def calcular_rentabilidade_volatilidade(dados, ativos, indice=None):
+    """Calcula rentabilidade, volatilidade e indicadores técnicos detalhados dos ativos"""
+    
+    tabela = calcular_metricas_longo(dados, 'Preço de Fechamento').reindex(ativos)
+    precos = dados.pivot(index='Data', columns='Ativo', values='Preço de Fechamento')
+    indicadores = Indicadores(precos, indice).tabela().reindex(ativos)
+    tabela = tabela.join(indicadores)
+    
+    for ativo, linha in tabela.iterrows():
         print(f"\n🔍 ANÁLISE DETALHADA - {ativo}:")
-        print(f"   Preço Inicial: R$ {preco_inicial:.2f}")
-        print(f"   Preço Final: R$ {preco_final:.2f}")
-        print(f"   Rentabilidade Acumulada: {rentab_acumulada:.2f}%")
-        print(f"   Volatilidade Diária: {volatilidade:.2f}%")
-        print(f"   Retorno Médio Diário: {retorno_medio_diario:.4f}%")
-        print(f"   Melhor Dia: {melhor_dia:.2f}%")
-        print(f"   Pior Dia: {pior_dia:.2f}%")
+        print(f"   Preço Inicial: R$ {linha['preco_inicial']:.2f}")
+        print(f"   Preço Final: R$ {linha['preco_atual']:.2f}")
+        print(f"   Rentabilidade Acumulada: {linha['retorno_total']:.2f}%")
+        print(f"   Volatilidade Diária: {linha['volatilidade_populacional']:.2f}%")
+        print(f"   Retorno Médio Diário: {linha['retorno_medio']:.4f}%")
+        print(f"   Melhor Dia: {linha['melhor_dia']:.2f}%")
+        print(f"   Pior Dia: {linha['pior_dia']:.2f}%")
+        print(f"   Médias Móveis: MM20 R$ {linha['mm_20']:.2f} | MM50 R$ {linha['mm_50']:.2f} | "
+              f"MME20 R$ {linha['mme_20']:.2f}")
+        print(f"   RSI (14): {linha['rsi_14']:.1f}")
+        print(f"   Bandas de Bollinger: R$ {linha['bollinger_inferior']:.2f} – R$ {linha['bollinger_superior']:.2f}")
+        print(f"   Drawdown Máximo: {linha['max_drawdown']:.2f}% ({linha['duracao_drawdown']:.0f} pregões abaixo do topo)")
+        print(f"   Beta vs IBOVESPA: {linha['beta']:.2f}")
     
     colunas = ['Ativo', 'Rentabilidade Acumulada (%)', 'Volatilidade Diária (%)', 
                'Retorno Médio Diário (%)', 'Melhor Dia (%)', 'Pior Dia (%)',
-               'Preço Inicial (R$)', 'Preço Final (R$)']
-    
-    resultados_df = pd.DataFrame(resultados_detalhados, columns=colunas)
+               'Preço Inicial (R$)', 'Preço Final (R$)', 'MM 20 (R$)', 'MM 50 (R$)', 'MME 20 (R$)',
+               'RSI 14', 'Bollinger Inferior (R$)', 'Bollinger Superior (R$)', 'Drawdown Máximo (%)',
+               'Duração Drawdown (pregões)', 'Beta IBOVESPA']
+    
+    resultados_df = pd.DataFrame({
+        'Ativo': tabela.index,
+        'Rentabilidade Acumulada (%)': tabela['retorno_total'].to_numpy(),
+        'Volatilidade Diária (%)': tabela['volatilidade_populacional'].to_numpy(),
+        'Retorno Médio Diário (%)': tabela['retorno_medio'].to_numpy(),
+        'Melhor Dia (%)': tabela['melhor_dia'].to_numpy(),
+        'Pior Dia (%)': tabela['pior_dia'].to_numpy(),
+        'Preço Inicial (R$)': tabela['preco_inicial'].to_numpy(),
+        'Preço Final (R$)': tabela['preco_atual'].to_numpy(),
+        'MM 20 (R$)': tabela['mm_20'].to_numpy(),
+        'MM 50 (R$)': tabela['mm_50'].to_numpy(),
+        'MME 20 (R$)': tabela['mme_20'].to_numpy(),
+        'RSI 14': tabela['rsi_14'].to_numpy(),
+        'Bollinger Inferior (R$)': tabela['bollinger_inferior'].to_numpy(),
+        'Bollinger Superior (R$)': tabela['bollinger_superior'].to_numpy(),
+        'Drawdown Máximo (%)': tabela['max_drawdown'].to_numpy(),
+        'Duração Drawdown (pregões)': tabela['duracao_drawdown'].to_numpy(),
+        'Beta IBOVESPA': tabela['beta'].to_numpy(),
+    }, columns=colunas)
     
     return resultados_df
 
-def analisar_correlacao(dados, ativo1='PETR4.SA', ativo2='VALE3.SA'):
-    """Analisa e plota correlação entre dois ativos"""
+def calcular_risco(dados, ativos, simulacoes=100_000, trabalhadores=1):
+    """VaR e CVaR de 1 dia (95%) por ativo e da carteira com pesos iguais"""
+    
+    precos = dados.pivot(index='Data', columns='Ativo', values='Preço de Fechamento').reindex(columns=ativos)
+    risco = tabela_risco(precos, simulacoes=simulacoes, trabalhadores=trabalhadores)
+    
+    for ativo, linha in risco.iterrows():
+        nome = "💼 Carteira (pesos iguais)" if ativo == CARTEIRA else ativo
+        print(f"\n🛡️  {nome}:")
+        print(f"   VaR 95% (histórico / paramétrico / Monte Carlo): "
+              f"{linha['var_historico']:.2f}% / {linha['var_parametrico']:.2f}% / {linha['var_monte_carlo']:.2f}%")
+        print(f"   CVaR 95% (histórico / paramétrico / Monte Carlo): "
+              f"{linha['cvar_historico']:.2f}% / {linha['cvar_parametrico']:.2f}% / {linha['cvar_monte_carlo']:.2f}%")
     
-    df_corr = dados.pivot(index='Data', columns='Ativo', values='Preço de Fechamento')
+    return risco
+
+def otimizar_carteira(dados, ativos, caminho='fronteira_eficiente.png', taxa_livre_risco=0.0):
+    """Carteiras de mínima variância e máximo Sharpe, com o gráfico da fronteira eficiente"""
+    
+    precos = dados.pivot(index='Data', columns='Ativo', values='Preço de Fechamento').reindex(columns=ativos)
+    otimizador = OtimizadorCarteira.de_precos(precos, taxa_livre_risco)
+    minima = otimizador.minima_variancia()
+    tangente = otimizador.maximo_sharpe()
+    
+    for nome, carteira in (("MÍNIMA VARIÂNCIA", minima), ("MÁXIMO SHARPE", tangente)):
+        print(f"\n💼 CARTEIRA DE {nome}:")
+        print(f"   Retorno Esperado: {carteira.retorno * 100:.2f}% a.a. | "
+              f"Volatilidade: {carteira.volatilidade * 100:.2f}% a.a. | Sharpe: {carteira.sharpe:.2f}")
+        for ativo, peso in carteira.pesos[carteira.pesos > 0].sort_values(ascending=False).items():
+            print(f"   {ativo}: {peso * 100:.1f}%")
+    
+    individuais = pd.DataFrame({'retorno': otimizador.media,
+                                'volatilidade': np.sqrt(np.diag(otimizador.covariancia))},
+                               index=otimizador.ativos)
+    desenhar_fronteira(otimizador.fronteira(), individuais, caminho, minima, tangente)
+    
+    return minima, tangente
+
+def simular_estrategias(dados, ativos, custo=0.001, trabalhadores=None):
+    """Varredura do cruzamento de médias móveis em todos os ativos, comparada a comprar e manter"""
+    
+    precos = dados.pivot(index='Data', columns='Ativo', values='Preço de Fechamento').reindex(columns=ativos)
+    backtest = Backtest(precos, custo)
+    varredura = backtest.varrer(trabalhadores=trabalhadores or os.cpu_count())
+    melhores = melhores_parametros(varredura)
+    referencia = backtest.comprar_e_manter()
+    
+    print(f"🧪 {len(varredura) // len(ativos)} combinações de médias × {len(ativos)} ativos "
+          f"(custo de {custo * 100:.2f}% por operação)")
+    for ativo in melhores.index:
+        info = melhores.loc[ativo]
+        print(f"   {ativo}: médias {info['curta']:.0f}/{info['longa']:.0f} → {info['retorno_total']:.2f}% "
+              f"(comprar e manter: {referencia.loc[ativo, 'retorno_total']:.2f}%) | "
+              f"Drawdown máx.: {info['max_drawdown']:.2f}% | Giro: {info['giro']:.0f}")
+    
+    return varredura
+
+def analisar_correlacao(dados, ativo1='PETR4.SA', ativo2='VALE3.SA', correlacoes=None):
+    """Analisa a correlação entre dois ativos (o gráfico sai em renderizar_graficos)"""
     
-    correlacao = df_corr[ativo1].corr(df_corr[ativo2])
+    if correlacoes is None:
+        df_corr = dados.pivot(index='Data', columns='Ativo', values='Preço de Fechamento')
+        correlacoes = MatrizCorrelacao.de_precos(df_corr)
+    correlacao = correlacoes.par(ativo1, ativo2)
 
     if correlacao > 0.7:
         interpretacao = "FORTE CORRELAÇÃO POSITIVA"
@@ -111,92 +188,41 @@ def analisar_correlacao(dados, ativo1='PETR4.SA', ativo2='VALE3.SA'):
     print(f"Correlação entre {ativo1} e {ativo2}: {correlacao:.4f}")
     print(f"Interpretação: {interpretacao}")
     
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-    
-    ax1.scatter(df_corr[ativo1], df_corr[ativo2], alpha=0.6, color='blue')
-    ax1.set_xlabel(f'Preço {ativo1}')
-    ax1.set_ylabel(f'Preço {ativo2}')
-    ax1.set_title(f'Correlação: {ativo1} vs {ativo2}\n(r = {correlacao:.3f})')
-    ax1.grid(True, alpha=0.3)
-    
-    z = np.polyfit(df_corr[ativo1], df_corr[ativo2], 1)
-    p = np.poly1d(z)
-    ax1.plot(df_corr[ativo1], p(df_corr[ativo1]), "r--", alpha=0.8)
-    
-    ax2.plot(df_corr.index, df_corr[ativo1], label=ativo1, linewidth=2)
-    ax2.plot(df_corr.index, df_corr[ativo2], label=ativo2, linewidth=2)
-    ax2.set_xlabel('Data')
-    ax2.set_ylabel('Preço (R$)')
-    ax2.set_title('Evolução dos Preços - Comparação')
-    ax2.legend()
-    ax2.grid(True, alpha=0.3)
-    ax2.tick_params(axis='x', rotation=45)
-    
-    plt.tight_layout()
-    plt.savefig('correlacao_ativos.png', dpi=300, bbox_inches='tight')
-    plt.show()
-    
     return correlacao, interpretacao
 
-def plotar_retorno_vs_volatilidade(resultados_df):
+def plotar_retorno_vs_volatilidade(resultados_df, caminho='retorno_vs_volatilidade_detalhado.png'):
     """Cria gráfico comparando retorno e volatilidade dos ativos"""
-    
-    plt.figure(figsize=(12, 8))
+    inicio = time.perf_counter()
+    desenhar_retorno_volatilidade(resultados_df, caminho)
+    return caminho, time.perf_counter() - inicio
 
-    scatter = plt.scatter(resultados_df['Volatilidade Diária (%)'], 
-                         resultados_df['Rentabilidade Acumulada (%)'],
-                         s=200, alpha=0.7, 
-                         c=resultados_df['Rentabilidade Acumulada (%)'],
-                         cmap='RdYlGn')
-    
-    for i, row in resultados_df.iterrows():
-        plt.annotate(row['Ativo'], 
-                    (row['Volatilidade Diária (%)'], row['Rentabilidade Acumulada (%)']),
-                    xytext=(10, 10), textcoords='offset points',
-                    fontsize=12, fontweight='bold')
+def renderizar_graficos(dados, correlacoes, ativo1, ativo2, trabalhadores=None, max_pontos=2000,
+                        diretorio=DIRETORIO_GRAFICOS):
+    """Gráficos de todos os pares e de cada ativo, renderizados em paralelo sem interface
+    
+    O par principal sai também em 'correlacao_ativos.png' (dpi 300); os demais vão para
+    `diretorio`/pares e `diretorio`/ativos. Devolve [(caminho, segundos)].
+    """
+    precos = dados.pivot(index='Data', columns='Ativo', values='Preço de Fechamento')
+    volumes = dados.pivot(index='Data', columns='Ativo', values='Volume')
+    renderizador = RenderizadorGraficos(precos, volumes, trabalhadores, max_pontos)
+    
+    trabalhos = [('par', ativo1, ativo2, correlacoes.par(ativo1, ativo2), 'correlacao_ativos.png', 300)]
+    trabalhos += renderizador.trabalhos_pares(correlacoes, os.path.join(diretorio, 'pares'))
+    trabalhos += renderizador.trabalhos_ativos(os.path.join(diretorio, 'ativos'))
+    
+    inicio = time.perf_counter()
+    tempos = renderizador.renderizar(trabalhos)
+    resumo = resumir_tempos(tempos)
+    print(f"🖼️  {resumo['graficos']} gráficos em {time.perf_counter() - inicio:.2f}s "
+          f"({renderizador.trabalhadores} processos) | por gráfico: p50 {resumo['p50'] * 1000:.0f} ms, "
+          f"p95 {resumo['p95'] * 1000:.0f} ms, máx {resumo['maximo'] * 1000:.0f} ms")
+    
+    pd.DataFrame(tempos, columns=['Gráfico', 'Segundos']).to_csv(
+        os.path.join(diretorio, 'tempos_graficos.csv'), index=False)
+    return tempos
 
-        plt.annotate(f"{row['Rentabilidade Acumulada (%)']:.1f}%",
-                    (row['Volatilidade Diária (%)'], row['Rentabilidade Acumulada (%)']),
-                    xytext=(10, -15), textcoords='offset points',
-                    fontsize=10, color='gray')
-    
-    plt.xlabel('Volatilidade Diária (%)', fontsize=12, fontweight='bold')
-    plt.ylabel('Rentabilidade Acumulada (%)', fontsize=12, fontweight='bold')
-    plt.title('Relação Retorno x Volatilidade - Análise de Ativos\n(Últimos 2 Anos)', 
-              fontsize=14, fontweight='bold')
-    
-    plt.axhline(y=0, color='red', linestyle='--', alpha=0.5, label='Retorno Zero')
-    plt.axvline(x=resultados_df['Volatilidade Diária (%)'].mean(), 
-               color='blue', linestyle='--', alpha=0.5, label='Volatilidade Média')
-    
-    plt.colorbar(scatter, label='Rentabilidade Acumulada (%)')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    
-    x_median = resultados_df['Volatilidade Diária (%)'].median()
-    y_median = resultados_df['Rentabilidade Acumulada (%)'].median()
-    
-    plt.text(x_median*0.8, y_median*1.8, 'Alto Retorno\nAlto Risco', 
-             fontsize=10, ha='center', va='center', 
-             bbox=dict(boxstyle="round,pad=0.3", facecolor="lightcoral", alpha=0.3))
-    
-    plt.text(x_median*0.8, y_median*0.5, 'Baixo Retorno\nAlto Risco', 
-             fontsize=10, ha='center', va='center',
-             bbox=dict(boxstyle="round,pad=0.3", facecolor="lightyellow", alpha=0.3))
-    
-    plt.text(x_median*1.2, y_median*1.8, 'Alto Retorno\nBaixo Risco', 
-             fontsize=10, ha='center', va='center',
-             bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.3))
-    
-    plt.text(x_median*1.2, y_median*0.5, 'Baixo Retorno\nBaixo Risco', 
-             fontsize=10, ha='center', va='center',
-             bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue", alpha=0.3))
-    
-    plt.tight_layout()
-    plt.savefig('retorno_vs_volatilidade_detalhado.png', dpi=300, bbox_inches='tight')
-    plt.show()
-
-def gerar_relatorio_final(resultados_df, correlacao, interpretacao, ativo1, ativo2):
+def gerar_relatorio_final(resultados_df, correlacao, interpretacao, ativo1, ativo2, risco=None):
     """Gera relatório final com resumo da análise"""
     
     print("\n" + "="*80)
@@ -207,49 +233,133 @@ def gerar_relatorio_final(resultados_df, correlacao, interpretacao, ativo1, ativ
     print(f"⚡ Maior Volatilidade: {resultados_df.loc[resultados_df['Volatilidade Diária (%)'].idxmax()]['Ativo']}")
     print(f"🛡️  Menor Volatilidade: {resultados_df.loc[resultados_df['Volatilidade Diária (%)'].idxmin()]['Ativo']}")
     print(f"🔗 Correlação {ativo1}/{ativo2}: {correlacao:.3f} ({interpretacao})")
+    if risco is not None:
+        carteira = risco.loc[CARTEIRA]
+        print(f"🛡️  VaR 95% da carteira (1 dia, Monte Carlo): {carteira['var_monte_carlo']:.2f}% "
+              f"| CVaR: {carteira['cvar_monte_carlo']:.2f}%")
     
     print("\n✅ Análise concluída! Gráficos salvos como:")
     print("   - correlacao_ativos.png")
     print("   - retorno_vs_volatilidade_detalhado.png")
+    print("   - fronteira_eficiente.png")
+    print(f"   - {DIRETORIO_GRAFICOS}/pares/*.png e {DIRETORIO_GRAFICOS}/ativos/*.png")
+
+def relatorio_instrumentacao(caminho=ARQUIVO_METRICAS):
+    """Tempo por etapa da execução e métricas no formato do Prometheus (só com a instrumentação ligada)"""
+    print("\n" + "="*80)
+    print("⏱️  TEMPO POR ETAPA")
+    print("="*80)
+    for etapa, execucoes, total, media in instrumentacao.resumo_etapas():
+        print(f"   {etapa:<14} {total:>8.2f}s  ({execucoes}× | média {media:.1f} ms)")
+    
+    instrumentacao.salvar_prometheus(caminho)
+    print(f"📈 Métricas salvas em '{caminho}'")
+    
+    if instrumentacao.perfilador is not None:
+        perfilador = instrumentacao.perfilador.parar()
+        print(f"🔬 Funções no topo da pilha em {perfilador.amostras} amostras:")
+        for funcao, fracao in perfilador.mais_frequentes(10):
+            print(f"   {fracao * 100:5.1f}%  {funcao}")
+        perfilador.salvar(os.environ['ASSISTENTE_PERFIL'])
+        print(f"🔬 Pilhas salvas em '{os.environ['ASSISTENTE_PERFIL']}' (formato folded)")
 
 def main():
-    """Função principal que orquestra toda a análise"""
+    """Função principal que orquestra toda a análise
     
-    print("="*80)
-    print("📊 ANÁLISE COMPLETA DOS ATIVOS")
-    print("="*80)
+    Com ASSISTENTE_INSTRUMENTACAO=1 cronometra cada etapa, grava as métricas em
+    ASSISTENTE_METRICAS e, com ASSISTENTE_PERFIL=arquivo, amostra as pilhas da execução.
+    """
+    if instrumentacao.ativa and os.environ.get('ASSISTENTE_PERFIL'):
+        instrumentacao.perfilar()
     
-    dados, ativos = coletar_dados_ativos()
+    with instrumentacao.rastro('execucao'):
+        executar_analise()
+    
+    if instrumentacao.ativa:
+        relatorio_instrumentacao()
+
+def executar_analise(trabalhadores=None, fonte=None):
+    """Etapas do relatório completo como um grafo: as independentes rodam juntas e as que
+    não mudaram (mesmos dados, mesmo código) saem dos checkpoints em ASSISTENTE_CHECKPOINTS
+    
+    ASSISTENTE_REFAZER=1 ignora os checkpoints; `trabalhadores=1` roda uma etapa por vez e
+    `fonte` troca o CachePrecos padrão.
+    A saída aparece na ordem de sempre.
+    """
     
-    print("\n" + "="*80)
-    print("📈 CÁLCULO DE RENTABILIDADE E VOLATILIDADE")
+    print("="*80)
+    print("📊 ANÁLISE COMPLETA DOS ATIVOS")
     print("="*80)
     
-    resultados_df = calcular_rentabilidade_volatilidade(dados, ativos)
+    pipeline = Pipeline([
+        Etapa('dados', etapa_dados, parametros={'fonte': fonte}, guardar=False),
+        Etapa('indice', etapa_indice, ['dados'], parametros={'fonte': fonte}, guardar=False),
+        Etapa('metricas', etapa_metricas, ['dados', 'indice']),
+        Etapa('risco', etapa_risco, ['dados']),
+        Etapa('otimizacao', etapa_otimizacao, ['dados'], arquivos=lambda _: ['fronteira_eficiente.png']),
+        Etapa('backtest', etapa_backtest, ['dados']),
+        Etapa('correlacao', etapa_correlacao, ['dados'], parametros={'ativo1': 'PETR4.SA', 'ativo2': 'VALE3.SA'}),
+        Etapa('graficos', etapa_graficos, ['dados', 'metricas', 'correlacao'],
+              arquivos=lambda tempos: [caminho for caminho, _ in tempos]),
+        Etapa('relatorio', etapa_relatorio, ['metricas', 'correlacao', 'risco'], guardar=False),
+    ], trabalhadores=trabalhadores, refazer=os.environ.get('ASSISTENTE_REFAZER') == '1')
+    try:
+        pipeline.executar()
+    finally:
+        pipeline.imprimir_resumo(os.path.join(pipeline.diretorio, 'resumo_execucao.json'))
 
+def secao(titulo):
     print("\n" + "="*80)
-    print("📊 RESUMO GERAL DOS RESULTADOS")
+    print(titulo)
     print("="*80)
+
+def etapa_dados(fonte):
+    return coletar_dados_ativos(fonte)
+
+def etapa_indice(dados, fonte):
+    return coletar_indice(dados[0], fonte)
+
+def etapa_metricas(dados, indice):
+    dados, ativos = dados
+    secao("📈 CÁLCULO DE RENTABILIDADE E VOLATILIDADE")
+    resultados_df = calcular_rentabilidade_volatilidade(dados, ativos, indice)
+
+    secao("📊 RESUMO GERAL DOS RESULTADOS")
     print(resultados_df.round(2))
 
     ativo_maior_vol = resultados_df.loc[resultados_df['Volatilidade Diária (%)'].idxmax()]
     print(f"\n🔥 ATIVO COM MAIOR VOLATILIDADE:")
     print(f"   {ativo_maior_vol['Ativo']}: {ativo_maior_vol['Volatilidade Diária (%)']:.2f}%")
+    return resultados_df
 
-    print("\n" + "="*80)
-    print("🔗 ANÁLISE DE CORRELAÇÃO")
-    print("="*80)
-    
-    ativo1, ativo2 = 'PETR4.SA', 'VALE3.SA'
-    correlacao, interpretacao = analisar_correlacao(dados, ativo1, ativo2)
-   
-    print("\n" + "="*80)
-    print("📊 GRÁFICO: RETORNO X VOLATILIDADE")
-    print("="*80)
-    
-    plotar_retorno_vs_volatilidade(resultados_df)
+def etapa_risco(dados):
+    secao("🛡️  RISCO: VaR E CVaR (1 DIA, 95%)")
+    return calcular_risco(*dados)
+
+def etapa_otimizacao(dados):
+    secao("💼 OTIMIZAÇÃO DE CARTEIRA (MÉDIA-VARIÂNCIA)")
+    return otimizar_carteira(*dados)
+
+def etapa_backtest(dados):
+    secao("🧪 BACKTEST: CRUZAMENTO DE MÉDIAS MÓVEIS")
+    return simular_estrategias(*dados)
+
+def etapa_correlacao(dados, ativo1, ativo2):
+    secao("🔗 ANÁLISE DE CORRELAÇÃO")
+    dados, _ = dados
+    correlacoes = MatrizCorrelacao.de_precos(dados.pivot(index='Data', columns='Ativo', values='Preço de Fechamento'))
+    correlacao, interpretacao = analisar_correlacao(dados, ativo1, ativo2, correlacoes)
+    return correlacoes, correlacao, interpretacao, ativo1, ativo2
+
+def etapa_graficos(dados, resultados_df, correlacao):
+    secao("📊 GRÁFICOS")
+    correlacoes, _, _, ativo1, ativo2 = correlacao
+    tempos = [plotar_retorno_vs_volatilidade(resultados_df)]
+    return tempos + renderizar_graficos(dados[0], correlacoes, ativo1, ativo2)
 
-    gerar_relatorio_final(resultados_df, correlacao, interpretacao, ativo1, ativo2)
+def etapa_relatorio(resultados_df, correlacao, risco):
+    _, correlacao, interpretacao, ativo1, ativo2 = correlacao
+    gerar_relatorio_final(resultados_df, correlacao, interpretacao, ativo1, ativo2, risco)
 
 if __name__ == "__main__":
     main()
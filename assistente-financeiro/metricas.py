@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+COLUNAS_METRICAS = [
+    'retorno_total', 'volatilidade', 'volatilidade_populacional', 'retorno_medio',
+    'melhor_dia', 'pior_dia', 'preco_inicial', 'preco_atual', 'preco_min', 'preco_max',
+    'volume_medio',
+]
+
+
+def pivotar(dados, coluna_valor, coluna_ativo='Ativo', coluna_data='Data'):
+    """Converte o formato longo em matriz larga (data × ativo)"""
+    return dados.pivot(index=coluna_data, columns=coluna_ativo, values=coluna_valor)
+
+
+def retornos_diarios(precos):
+    """Retornos diários de todos os ativos de uma vez (equivale ao pct_change por ativo)
+
+    Cada retorno é calculado contra o último preço válido do próprio ativo, então
+    buracos na matriz (ativos com pregões diferentes) não geram retornos falsos.
+    """
+    return precos / precos.ffill().shift(1) - 1
+
+
+def adicionar_retorno_diario(dados, coluna_preco, coluna_retorno, coluna_ativo='Ativo'):
+    """Adiciona ao formato longo a coluna de retorno diário por ativo, sem laço por ativo"""
+    anterior = dados.groupby(coluna_ativo, sort=False, observed=True)[coluna_preco].shift(1)
+    dados[coluna_retorno] = dados[coluna_preco] / anterior - 1
+    return dados
+
+
+def calcular_metricas(precos, volumes=None):
+    """Calcula as métricas de todos os ativos numa única passada vetorizada
+
+    Recebe matrizes largas (data × ativo) e devolve um DataFrame indexado pelo ativo
+    com as colunas de COLUNAS_METRICAS. Retornos e volatilidades em %.
+    """
+    retornos = retornos_diarios(precos)
+    valores = precos.to_numpy(dtype=np.float64)
+    validos = ~np.isnan(valores)
+    colunas = np.arange(valores.shape[1])
+    primeiro = validos.argmax(axis=0)
+    ultimo = len(valores) - 1 - validos[::-1].argmax(axis=0)
+    preco_inicial = valores[primeiro, colunas]
+    preco_final = valores[ultimo, colunas]
+
+    metricas = pd.DataFrame({
+        'retorno_total': (preco_final / preco_inicial - 1) * 100,
+        'volatilidade': retornos.std(ddof=1).to_numpy() * 100,
+        'volatilidade_populacional': retornos.std(ddof=0).to_numpy() * 100,
+        'retorno_medio': retornos.mean().to_numpy() * 100,
+        'melhor_dia': retornos.max().to_numpy() * 100,
+        'pior_dia': retornos.min().to_numpy() * 100,
+        'preco_inicial': preco_inicial,
+        'preco_atual': preco_final,
+        'preco_min': precos.min().to_numpy(),
+        'preco_max': precos.max().to_numpy(),
+        'volume_medio': volumes.mean().to_numpy() if volumes is not None else np.nan,
+    }, index=precos.columns)
+    metricas.index.name = 'Ativo'
+    return metricas
+
+
+def calcular_metricas_longo(dados, coluna_preco, coluna_volume='Volume', coluna_ativo='Ativo'):
+    """Atalho: métricas a partir do formato longo usado pelo assistente e pelo main"""
+    precos = pivotar(dados, coluna_preco, coluna_ativo)
+    volumes = pivotar(dados, coluna_volume, coluna_ativo) if coluna_volume in dados else None
+    return calcular_metricas(precos, volumes)
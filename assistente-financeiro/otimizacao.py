@@ -0,0 +1,128 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from metricas import retornos_diarios
+
+PREGOES_ANO = 252
+
+Carteira = namedtuple('Carteira', ['pesos', 'retorno', 'volatilidade', 'sharpe'])
+
+
+def projetar_simplex(valores):
+    """Projeta cada coluna no simplex {w >= 0, soma(w) = 1} (todas as colunas de uma vez)"""
+    ordenados = -np.sort(-valores, axis=0)
+    acumulados = np.cumsum(ordenados, axis=0) - 1
+    posicoes = np.arange(1, len(valores) + 1)[:, None]
+    ultimo = (ordenados - acumulados / posicoes > 0).sum(axis=0) - 1
+    limiar = acumulados[ultimo, np.arange(valores.shape[1])] / (ultimo + 1)
+    return np.maximum(valores - limiar, 0.0)
+
+
+class OtimizadorCarteira:
+    """Carteiras de média-variância só com posições compradas (pesos >= 0, soma 1)
+
+    A covariância é calculada uma vez. Cada ponto da fronteira minimiza
+    w'Σw - λ·μ'w; todos os λ pedidos são resolvidos juntos por gradiente projetado
+    acelerado (FISTA), com as colunas da matriz de pesos sendo as carteiras, então
+    o custo por iteração é um produto Σ·W para a fronteira inteira.
+    Retornos e volatilidades anualizados (252 pregões).
+    """
+
+    def __init__(self, media, covariancia, taxa_livre_risco=0.0):
+        validos = media.notna() & np.isfinite(np.diag(covariancia.to_numpy()))
+        self.ativos = list(media.index[validos])
+        self.media = media[validos].to_numpy(dtype=np.float64)
+        self.covariancia = covariancia.loc[self.ativos, self.ativos].fillna(0.0).to_numpy(dtype=np.float64)
+        self.taxa_livre_risco = taxa_livre_risco
+        self._lipschitz = 2 * np.abs(np.linalg.eigvalsh(self.covariancia)).max()
+
+    @classmethod
+    def de_precos(cls, precos, taxa_livre_risco=0.0):
+        """Otimizador a partir da matriz larga de preços (data × ativo)"""
+        retornos = retornos_diarios(precos).iloc[1:]
+        return cls(retornos.mean() * PREGOES_ANO, retornos.cov() * PREGOES_ANO, taxa_livre_risco)
+
+    def resolver(self, aversoes, iteracoes=20_000, tolerancia=1e-9):
+        """Pesos ótimos (ativos × len(aversoes)) para cada λ de `aversoes`"""
+        aversoes = np.asarray(aversoes, dtype=np.float64)
+        passo = 1 / self._lipschitz
+        pesos = np.full((len(self.ativos), len(aversoes)), 1 / len(self.ativos))
+        tendencia = aversoes * self.media[:, None]
+        atual, momento = pesos, 1.0
+        for _ in range(iteracoes):
+            gradiente = 2 * self.covariancia @ atual - tendencia
+            novos = projetar_simplex(atual - passo * gradiente)
+            proximo_momento = (1 + np.sqrt(1 + 4 * momento ** 2)) / 2
+            atual = novos + (momento - 1) / proximo_momento * (novos - pesos)
+            if np.abs(novos - pesos).max() < tolerancia:
+                pesos = novos
+                break
+            pesos, momento = novos, proximo_momento
+        return pesos
+
+    def _retorno_volatilidade(self, pesos):
+        """Retorno e volatilidade de cada coluna da matriz de pesos"""
+        variancias = np.einsum('ip,ij,jp->p', pesos, self.covariancia, pesos)
+        return self.media @ pesos, np.sqrt(np.maximum(variancias, 0.0))
+
+    def carteira(self, pesos):
+        """Carteira (namedtuple) com os pesos, retorno, volatilidade e Sharpe"""
+        pesos = np.where(pesos < 1e-6, 0.0, pesos)
+        pesos = pesos / pesos.sum()
+        retorno = float(self.media @ pesos)
+        volatilidade = float(np.sqrt(max(pesos @ self.covariancia @ pesos, 0.0)))
+        sharpe = (retorno - self.taxa_livre_risco) / volatilidade if volatilidade > 0 else np.nan
+        return Carteira(pd.Series(pesos, index=self.ativos, name='peso'), retorno, volatilidade, sharpe)
+
+    def _maior_aversao(self):
+        """λ a partir do qual a carteira ótima é (quase) só o ativo de maior retorno"""
+        return 100 * self._lipschitz / (np.ptp(self.media) or 1.0)
+
+    def _aversoes(self, pontos):
+        """λ de 0 (mínima variância) até _maior_aversao, em escala logarítmica"""
+        return np.concatenate([[0.0], self._maior_aversao() * np.logspace(-5, 0, pontos - 1)])
+
+    def minima_variancia(self):
+        return self.carteira(self.resolver([0.0])[:, 0])
+
+    def fronteira(self, pontos=50):
+        """Pontos da fronteira eficiente: DataFrame com retorno, volatilidade, sharpe e os pesos"""
+        pesos = self.resolver(self._aversoes(pontos))
+        retornos, volatilidades = self._retorno_volatilidade(pesos)
+        tabela = pd.DataFrame(pesos.T, columns=self.ativos)
+        tabela.insert(0, 'sharpe', (retornos - self.taxa_livre_risco) / volatilidades)
+        tabela.insert(0, 'volatilidade', volatilidades)
+        tabela.insert(0, 'retorno', retornos)
+        return tabela.drop_duplicates(subset=['retorno', 'volatilidade']).sort_values('volatilidade',
+                                                                                    ignore_index=True)
+
+    def maximo_sharpe(self, pontos=50, refinamentos=3):
+        """Carteira tangente: maior Sharpe na fronteira, refinando o λ em volta do melhor ponto"""
+        aversoes = self._aversoes(pontos)
+        for _ in range(refinamentos + 1):
+            pesos = self.resolver(aversoes)
+            retornos, volatilidades = self._retorno_volatilidade(pesos)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                sharpes = (retornos - self.taxa_livre_risco) / volatilidades
+            melhor = int(np.nanargmax(sharpes))
+            inferior = aversoes[max(melhor - 1, 0)]
+            superior = aversoes[min(melhor + 1, len(aversoes) - 1)]
+            aversoes = np.linspace(inferior, superior, 9)
+        return self.carteira(pesos[:, melhor])
+
+    def para_retorno(self, alvo, iteracoes=40):
+        """Carteira de menor variância com retorno anual `alvo` (busca binária em λ)"""
+        inferior, superior = 0.0, self._maior_aversao()
+        pesos = self.resolver([0.0])[:, 0]
+        if self.media @ pesos >= alvo:
+            return self.carteira(pesos)
+        for _ in range(iteracoes):
+            meio = (inferior + superior) / 2
+            pesos = self.resolver([meio])[:, 0]
+            if self.media @ pesos < alvo:
+                inferior = meio
+            else:
+                superior = meio
+        return self.carteira(self.resolver([superior])[:, 0])
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import shutil
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+DIRETORIO_DADOS = os.environ.get('ASSISTENTE_DADOS_DIR', 'dados_ativos')
+MANIFESTO = '_particoes.json'
+FORMATO = 1
+
+
+def _nome_arquivo(coluna):
+    """'Preço de Fechamento' -> 'preco_de_fechamento'"""
+    decomposto = unicodedata.normalize('NFKD', coluna.lower())
+    texto = ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+    return ''.join(caractere if caractere.isalnum() else '_' for caractere in texto)
+
+
+def _tipo(serie):
+    """Tipo NumPy da coluna; texto vira unicode de largura fixa ('str'), porque .npy de
+    objetos exigiria pickle e não abre com memória mapeada"""
+    if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+        return str(serie.to_numpy().dtype)
+    return 'str'
+
+
+def _caminho_particao(diretorio, ativo, ano):
+    return os.path.join(diretorio, f"ativo={ativo}", f"ano={ano}")
+
+
+def ler_manifesto(diretorio=DIRETORIO_DADOS):
+    """Esquema e partições gravadas ({'colunas': ..., 'particoes': ...}), ou None"""
+    caminho = os.path.join(diretorio, MANIFESTO)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as arquivo:
+        manifesto = json.load(arquivo)
+    return manifesto if manifesto.get('formato') == FORMATO else None
+
+
+def _gravar_manifesto(diretorio, manifesto):
+    caminho = os.path.join(diretorio, MANIFESTO)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, indent=1)
+    os.replace(temporario, caminho)
+
+
+def _gravar_particao(destino, colunas):
+    """Grava os arrays num diretório temporário e só então troca pela partição antiga"""
+    temporario, antigo = destino + '.tmp', destino + '.antigo'
+    for resto in (temporario, antigo):
+        if os.path.exists(resto):
+            shutil.rmtree(resto)
+    os.makedirs(temporario)
+    for nome, valores in colunas.items():
+        np.save(os.path.join(temporario, f"{nome}.npy"), np.ascontiguousarray(valores))
+    if os.path.exists(destino):
+        os.replace(destino, antigo)
+    os.replace(temporario, destino)
+    if os.path.exists(antigo):
+        shutil.rmtree(antigo)
+
+
+def _resumo(colunas, coluna_data):
+    """Linhas, datas extremas e hash do conteúdo de uma partição ({coluna: array})"""
+    datas = colunas[coluna_data]
+    conteudo = hashlib.blake2b(digest_size=16)
+    for nome in sorted(colunas):
+        conteudo.update(nome.encode())
+        conteudo.update(np.ascontiguousarray(colunas[nome]).tobytes())
+    return {'linhas': len(datas), 'inicio': str(pd.Timestamp(datas[0])), 'fim': str(pd.Timestamp(datas[-1])),
+            'hash': conteudo.hexdigest()}
+
+
+def _mesclar(diretorio, ativo, ano, resumo, esquema, coluna_data, novas):
+    """Partição gravada com as linhas `novas`: datas novas entram, datas repetidas são substituídas"""
+    caminho = _caminho_particao(diretorio, ativo, ano)
+    antigas = {dados['arquivo']: _ler_coluna(os.path.join(caminho, f"{dados['arquivo']}.npy"), dados['tipo'],
+                                             0, resumo['linhas'], False)
+               for dados in esquema.values()}
+    arquivo_data = esquema[coluna_data]['arquivo']
+    manter = ~np.isin(antigas[arquivo_data], novas[arquivo_data])
+    datas = np.concatenate([antigas[arquivo_data][manter], novas[arquivo_data]])
+    ordem = np.argsort(datas, kind='stable')
+    return {nome: np.concatenate([antigas[nome][manter], novas[nome]])[ordem] for nome in novas}
+
+
+def exportar_particionado(dados, diretorio=DIRETORIO_DADOS, coluna_ativo='Ativo', coluna_data='Data'):
+    """Grava o formato longo em arrays .npy colunares, uma partição por ativo e ano
+
+    Cada partição (`ativo=PETR4.SA/ano=2024/`) tem um .npy por coluna, ordenado pela
+    data e com o tipo original (datas em datetime64, preços em float). O manifesto
+    guarda linhas, datas e um hash do conteúdo de cada partição. Uma nova exportação é
+    mesclada às partições gravadas: datas novas são acrescentadas, datas já gravadas
+    recebem os valores novos (preços revistos) e linhas que não vieram agora, como os
+    pregões que saíram da janela de 2 anos, são mantidas. Só as partições cujo conteúdo
+    mudou são regravadas. Devolve (gravadas, mantidas).
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    colunas = [coluna for coluna in dados.columns if coluna != coluna_ativo]
+    esquema = {coluna: {'arquivo': _nome_arquivo(coluna), 'tipo': _tipo(dados[coluna])} for coluna in colunas}
+
+    manifesto = ler_manifesto(diretorio)
+    if manifesto is None or manifesto['colunas'] != esquema:
+        # esquema novo: as partições antigas não servem mais
+        for chave in (manifesto or {}).get('particoes', {}):
+            shutil.rmtree(os.path.join(diretorio, *chave.split('/')), ignore_errors=True)
+        manifesto = {'formato': FORMATO, 'coluna_data': coluna_data, 'colunas': esquema, 'particoes': {}}
+        _gravar_manifesto(diretorio, manifesto)
+
+    ativos = pd.Categorical(dados[coluna_ativo])
+    datas = dados[coluna_data].to_numpy(dtype='datetime64[ns]')
+    anos = datas.astype('datetime64[Y]').astype(np.int64) + 1970
+    ordem = np.lexsort((datas, anos, ativos.codes))
+    codigos, anos = ativos.codes[ordem], anos[ordem]
+    quebras = np.flatnonzero((np.diff(codigos) != 0) | (np.diff(anos) != 0)) + 1
+    limites = np.concatenate([[0], quebras, [len(ordem)]])
+    valores = {coluna: dados[coluna].to_numpy(dtype=esquema[coluna]['tipo'])[ordem] for coluna in colunas}
+    arquivo_data = esquema[coluna_data]['arquivo']
+
+    gravadas = mantidas = 0
+    for comeco, final in zip(limites[:-1], limites[1:]):
+        ativo, ano = ativos.categories[codigos[comeco]], int(anos[comeco])
+        chave = f"ativo={ativo}/ano={ano}"
+        particao = {esquema[coluna]['arquivo']: valores[coluna][comeco:final] for coluna in colunas}
+        resumo = _resumo(particao, arquivo_data)
+        gravado = manifesto['particoes'].get(chave)
+        if gravado is not None and gravado.get('hash') != resumo['hash']:
+            particao = _mesclar(diretorio, ativo, ano, gravado, esquema, coluna_data, particao)
+            resumo = _resumo(particao, arquivo_data)
+        if gravado is not None and gravado.get('hash') == resumo['hash']:
+            mantidas += 1
+            continue
+        _gravar_particao(_caminho_particao(diretorio, ativo, ano), particao)
+        manifesto['particoes'][chave] = resumo
+        gravadas += 1
+
+    _gravar_manifesto(diretorio, manifesto)
+    return gravadas, mantidas
+
+
+def _ler_coluna(caminho, tipo, comeco, final, mmap):
+    """Linhas [comeco, final) de um .npy de tipo conhecido
+
+    O tipo vem do manifesto, então o cabeçalho do .npy não é interpretado (é o que mais
+    custa em arquivos pequenos): só o seu tamanho é lido, para achar onde começam os
+    dados. Sem `mmap`, apenas os bytes do recorte são lidos; com ele, o recorte é um
+    memmap (nada é lido até ser usado). Texto, de largura variável, passa por np.load.
+    """
+    if tipo == 'str':
+        return np.load(caminho, mmap_mode='r' if mmap else None)[comeco:final]
+    tipo = np.dtype(tipo)
+    with open(caminho, 'rb') as arquivo:
+        versao, _ = np.lib.format.read_magic(arquivo)
+        cabecalho = int.from_bytes(arquivo.read(2 if versao == 1 else 4), 'little')
+        deslocamento = arquivo.tell() + cabecalho + comeco * tipo.itemsize
+        if mmap:
+            return np.memmap(caminho, dtype=tipo, mode='r', offset=deslocamento, shape=(final - comeco,))
+        return np.fromfile(arquivo, dtype=tipo, count=final - comeco, offset=cabecalho + comeco * tipo.itemsize)
+
+
+def ler_particionado(diretorio=DIRETORIO_DADOS, colunas=None, ativos=None, inicio=None, fim=None, mmap=False,
+                     coluna_ativo='Ativo'):
+    """Lê o formato longo só das partições, colunas e linhas pedidas
+
+    `ativos` e o intervalo [inicio, fim) descartam partições pelo manifesto, sem abrir
+    arquivos; dentro de cada partição o recorte de datas é uma busca binária na coluna
+    de datas, e das demais colunas só as linhas do recorte são lidas. Só os arquivos de
+    `colunas` (além de ativo e data) são abertos. Com `mmap` as colunas são mapeadas em
+    memória em vez de lidas. O ativo vem como categoria.
+    """
+    manifesto = ler_manifesto(diretorio)
+    if manifesto is None:
+        raise FileNotFoundError(f"Nenhum dado particionado em {diretorio}")
+    esquema, coluna_data = manifesto['colunas'], manifesto['coluna_data']
+    colunas = [coluna for coluna in esquema if colunas is None or coluna in colunas or coluna == coluna_data]
+    inicio = None if inicio is None else np.datetime64(pd.Timestamp(inicio), 'ns')
+    fim = None if fim is None else np.datetime64(pd.Timestamp(fim), 'ns')
+    selecionados = None if ativos is None else set(ativos)
+
+    categorias, codigos, tamanhos = [], [], []
+    partes = {coluna: [] for coluna in colunas}
+    for chave, resumo in sorted(manifesto['particoes'].items()):
+        ativo, ano = (parte.split('=', 1)[1] for parte in chave.split('/'))
+        if selecionados is not None and ativo not in selecionados:
+            continue
+        if (inicio is not None and np.datetime64(resumo['fim']) < inicio) or \
+                (fim is not None and np.datetime64(resumo['inicio']) >= fim):
+            continue
+
+        caminho = _caminho_particao(diretorio, ativo, ano)
+        comeco, final = 0, resumo['linhas']
+        if (inicio is not None and np.datetime64(resumo['inicio']) < inicio) or \
+                (fim is not None and np.datetime64(resumo['fim']) >= fim):
+            # partição cortada pelo intervalo: as datas dizem quais linhas ler
+            datas = _ler_coluna(os.path.join(caminho, f"{esquema[coluna_data]['arquivo']}.npy"),
+                                esquema[coluna_data]['tipo'], 0, final, mmap)
+            comeco = 0 if inicio is None else int(np.searchsorted(datas, inicio, side='left'))
+            final = final if fim is None else int(np.searchsorted(datas, fim, side='left'))
+            if final <= comeco:
+                continue
+        for coluna in colunas:
+            partes[coluna].append(_ler_coluna(os.path.join(caminho, f"{esquema[coluna]['arquivo']}.npy"),
+                                              esquema[coluna]['tipo'], comeco, final, mmap))
+        if not categorias or categorias[-1] != ativo:
+            categorias.append(ativo)
+        codigos.append(len(categorias) - 1)
+        tamanhos.append(final - comeco)
+
+    resultado = {coluna_ativo: pd.Categorical.from_codes(np.repeat(np.array(codigos, dtype=np.int32), tamanhos),
+                                                         categories=categorias)}
+    for coluna in colunas:
+        tipo = np.dtype(esquema[coluna]['tipo'])
+        resultado[coluna] = np.concatenate(partes[coluna]) if partes[coluna] else np.empty(0, dtype=tipo)
+    ordem = [coluna_data, coluna_ativo] + [coluna for coluna in colunas if coluna != coluna_data]
+    return pd.DataFrame(resultado, columns=ordem)
+
+
+def listar_particoes(diretorio=DIRETORIO_DADOS):
+    """Tabela (ativo, ano) -> linhas e datas das partições gravadas"""
+    manifesto = ler_manifesto(diretorio)
+    particoes = manifesto['particoes'] if manifesto else {}
+    linhas = []
+    for chave, resumo in particoes.items():
+        ativo, ano = (parte.split('=', 1)[1] for parte in chave.split('/'))
+        linhas.append({'Ativo': ativo, 'ano': int(ano), **resumo})
+    return pd.DataFrame(linhas, columns=['Ativo', 'ano', 'linhas', 'inicio', 'fim', 'hash']).sort_values(['Ativo', 'ano'])
@@ -0,0 +1,281 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import instrumentacao
+
+DIRETORIO_CHECKPOINTS = os.environ.get('ASSISTENTE_CHECKPOINTS', '.checkpoints_analise')
+
+
+class Etapa:
+    """Uma etapa do pipeline: `funcao(*resultados das dependencias, **parametros)`
+
+    Com `guardar=False` a etapa roda sempre (buscas na rede, relatório) e seu resultado
+    entra pela impressão digital do conteúdo na chave das seguintes. `arquivos(resultado)`
+    lista os arquivos que a etapa gera; se algum sumir, o checkpoint deixa de valer.
+    """
+
+    def __init__(self, nome, funcao, dependencias=(), parametros=None, guardar=True, arquivos=None):
+        self.nome = nome
+        self.funcao = funcao
+        self.dependencias = tuple(dependencias)
+        self.parametros = parametros or {}
+        self.guardar = guardar
+        self.arquivos = arquivos
+
+
+def impressao_digital(valor):
+    """Hash do conteúdo de um resultado (DataFrames e arrays pelos valores, o resto por pickle)"""
+    resumo = hashlib.sha256()
+
+    def atualizar(item):
+        if isinstance(item, (pd.DataFrame, pd.Series)):
+            resumo.update(pd.util.hash_pandas_object(item, index=True).to_numpy().tobytes())
+            colunas = item.columns if isinstance(item, pd.DataFrame) else [item.name]
+            resumo.update(repr(list(colunas)).encode())
+        elif isinstance(item, np.ndarray):
+            resumo.update(np.ascontiguousarray(item).tobytes())
+        elif isinstance(item, (tuple, list)):
+            resumo.update(f"{type(item).__name__}{len(item)}".encode())
+            for elemento in item:
+                atualizar(elemento)
+        else:
+            resumo.update(pickle.dumps(item))
+
+    atualizar(valor)
+    return resumo.hexdigest()
+
+
+DIRETORIO_PROJETO = os.path.dirname(os.path.abspath(__file__))
+
+
+def _modulos_locais(funcao):
+    """Arquivos .py do projeto que a função usa, direta ou indiretamente (pelos globais dos módulos)"""
+    arquivos, pendentes = set(), [funcao]
+    while pendentes:
+        objeto = pendentes.pop()
+        modulo = sys.modules.get(getattr(objeto, '__module__', None) or getattr(objeto, '__name__', ''))
+        arquivo = os.path.abspath(getattr(modulo, '__file__', None) or '')
+        if not arquivo.startswith(DIRETORIO_PROJETO + os.sep) or arquivo in arquivos:
+            continue
+        arquivos.add(arquivo)
+        pendentes.extend(valor for valor in vars(modulo).values()
+                         if callable(valor) or isinstance(valor, type(sys)))
+    return sorted(arquivos)
+
+
+def _versao_codigo(funcao):
+    """Hash do código da etapa e dos módulos do projeto de que ela depende"""
+    resumo = hashlib.sha256(funcao.__code__.co_code + repr(funcao.__code__.co_consts).encode())
+    for arquivo in _modulos_locais(funcao):
+        with open(arquivo, 'rb') as fonte:
+            resumo.update(fonte.read())
+    return resumo.hexdigest()
+
+
+class _SaidaPorThread:
+    """sys.stdout que separa o que cada etapa imprime (uma StringIO por thread)"""
+
+    def __init__(self, original):
+        self.original = original
+        self.capturas = {}
+
+    def write(self, texto):
+        return self.capturas.get(threading.get_ident(), self.original).write(texto)
+
+    def flush(self):
+        self.original.flush()
+
+    def __getattr__(self, nome):
+        return getattr(self.original, nome)
+
+
+class Pipeline:
+    """Executa etapas em grafo de dependências, em paralelo e com checkpoints em disco
+
+    Cada etapa começa assim que suas dependências terminam, numa thread (o trabalho
+    pesado das etapas já vai para processos ou para o NumPy, que solta o GIL). A chave
+    do checkpoint junta o nome, o código da função, os parâmetros e as chaves das
+    dependências, então só o que depende de algo alterado é refeito. O que cada etapa
+    imprime é capturado e mostrado na ordem da declaração, e fica no checkpoint para
+    aparecer igual quando a etapa sai do cache. Se uma etapa falhar, as que dependem
+    dela são puladas, as demais terminam e o erro é relançado no fim.
+    """
+
+    def __init__(self, etapas, diretorio=DIRETORIO_CHECKPOINTS, trabalhadores=None, refazer=False):
+        self.etapas = {etapa.nome: etapa for etapa in etapas}
+        self.ordem = [etapa.nome for etapa in etapas]
+        for etapa in etapas:
+            faltando = [nome for nome in etapa.dependencias if nome not in self.etapas]
+            if faltando:
+                raise ValueError(f"Etapa '{etapa.nome}' depende de etapas inexistentes: {faltando}")
+        self._verificar_ciclos()
+        self.diretorio = diretorio
+        self.trabalhadores = trabalhadores or len(etapas)
+        self.refazer = refazer
+        self.resumo = []
+        self.total = 0.0
+
+    def _verificar_ciclos(self):
+        """Ordenação topológica (Kahn): o que sobrar sem ordem está num ciclo"""
+        faltam = {nome: len(set(etapa.dependencias)) for nome, etapa in self.etapas.items()}
+        prontas = [nome for nome, quantidade in faltam.items() if quantidade == 0]
+        while prontas:
+            feita = prontas.pop()
+            for nome, etapa in self.etapas.items():
+                if feita in etapa.dependencias:
+                    faltam[nome] -= 1
+                    if faltam[nome] == 0:
+                        prontas.append(nome)
+        ciclo = sorted(nome for nome, quantidade in faltam.items() if quantidade > 0)
+        if ciclo:
+            raise ValueError(f"Dependências circulares entre as etapas: {ciclo}")
+
+    def _caminho(self, nome, chave):
+        return os.path.join(self.diretorio, f"{nome}-{chave[:16]}.pkl")
+
+    def _chave(self, etapa, chaves):
+        partes = [etapa.nome, _versao_codigo(etapa.funcao), repr(sorted(etapa.parametros.items()))]
+        partes += [chaves[nome] for nome in etapa.dependencias]
+        return hashlib.sha256('\n'.join(partes).encode()).hexdigest()
+
+    def _ler_checkpoint(self, etapa, chave):
+        caminho = self._caminho(etapa.nome, chave)
+        if self.refazer or not etapa.guardar or not os.path.exists(caminho):
+            return None
+        try:
+            with open(caminho, 'rb') as arquivo:
+                resultado, saida = pickle.load(arquivo)
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # checkpoint truncado ou de uma versão antiga das classes: refaz a etapa
+            return None
+        if etapa.arquivos is not None and not all(os.path.exists(item) for item in etapa.arquivos(resultado)):
+            return None
+        return resultado, saida
+
+    def _gravar_checkpoint(self, etapa, chave, resultado, saida):
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = self._caminho(etapa.nome, chave)
+        temporario = caminho + '.tmp'
+        with open(temporario, 'wb') as arquivo:
+            pickle.dump((resultado, saida), arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+        # só o checkpoint mais recente de cada etapa é mantido
+        for nome in os.listdir(self.diretorio):
+            if nome.startswith(f"{etapa.nome}-") and nome.endswith('.pkl') and \
+                    os.path.join(self.diretorio, nome) != caminho:
+                os.remove(os.path.join(self.diretorio, nome))
+
+    def _rodar(self, etapa, chave, argumentos, saida_padrao, rastro):
+        """Executa (ou lê do cache) uma etapa numa thread do pool: (resultado, saída, situação, segundos)"""
+        inicio = time.perf_counter()
+        guardado = self._ler_checkpoint(etapa, chave)
+        if guardado is not None:
+            return guardado + ('cache', time.perf_counter() - inicio)
+
+        captura = io.StringIO()
+        saida_padrao.capturas[threading.get_ident()] = captura
+        try:
+            # o rastro da execução é por thread: as etapas somam seus tempos ao rastro de quem chamou
+            with instrumentacao.continuar_rastro(rastro), instrumentacao.etapa(etapa.nome):
+                resultado = etapa.funcao(*argumentos, **etapa.parametros)
+        finally:
+            del saida_padrao.capturas[threading.get_ident()]
+        if etapa.guardar:
+            self._gravar_checkpoint(etapa, chave, resultado, captura.getvalue())
+        return resultado, captura.getvalue(), 'executada', time.perf_counter() - inicio
+
+    def executar(self):
+        """Roda o grafo inteiro e devolve {etapa: resultado}"""
+        resultados, chaves, saidas, erros = {}, {}, {}, {}
+        pendentes = list(self.ordem)
+        impressas = 0
+        self.resumo = []
+        rastro = instrumentacao.rastro_atual()
+        saida_padrao = _SaidaPorThread(sys.stdout)
+        sys.stdout = saida_padrao
+        inicio = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.trabalhadores) as executor:
+                andamento = {}
+                while pendentes or andamento:
+                    for nome in list(pendentes):
+                        etapa = self.etapas[nome]
+                        if any(dependencia in erros for dependencia in etapa.dependencias):
+                            pendentes.remove(nome)
+                            erros[nome] = None
+                            saidas[nome] = ''
+                            self.resumo.append((nome, 'pulada', 0.0))
+                        elif all(dependencia in resultados for dependencia in etapa.dependencias):
+                            pendentes.remove(nome)
+                            chaves[nome] = self._chave(etapa, chaves)
+                            argumentos = [resultados[dependencia] for dependencia in etapa.dependencias]
+                            futuro = executor.submit(self._rodar, etapa, chaves[nome], argumentos,
+                                                     saida_padrao, rastro)
+                            andamento[futuro] = nome
+                    if not andamento:
+                        if pendentes:
+                            raise RuntimeError(f"Nenhuma etapa pode começar: {pendentes}")
+                        continue
+
+                    prontos, _ = wait(andamento, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        nome = andamento.pop(futuro)
+                        try:
+                            resultado, saida, situacao, segundos = futuro.result()
+                        except Exception as erro:
+                            erros[nome] = erro
+                            saidas[nome] = f"\n❌ Etapa '{nome}' falhou: {erro!r}\n"
+                            self.resumo.append((nome, 'erro', 0.0))
+                            continue
+                        resultados[nome] = resultado
+                        saidas[nome] = saida
+                        self.resumo.append((nome, situacao, segundos))
+                        if not self.etapas[nome].guardar:
+                            chaves[nome] = impressao_digital(resultado)
+
+                    while impressas < len(self.ordem) and self.ordem[impressas] in saidas:
+                        saida_padrao.original.write(saidas[self.ordem[impressas]])
+                        impressas += 1
+        finally:
+            for nome in self.ordem[impressas:]:
+                saida_padrao.original.write(saidas.get(nome, ''))
+            sys.stdout = saida_padrao.original
+        self.total = time.perf_counter() - inicio
+
+        falhas = [erro for erro in erros.values() if erro is not None]
+        if falhas:
+            raise falhas[0]
+        return resultados
+
+    def imprimir_resumo(self, caminho=None):
+        """Tempo e origem (executada, cache, erro, pulada) de cada etapa; grava em JSON com `caminho`"""
+        print("\n" + "="*80)
+        print("⏱️  RESUMO DA EXECUÇÃO")
+        print("="*80)
+        situacoes = dict((nome, (situacao, segundos)) for nome, situacao, segundos in self.resumo)
+        for nome in self.ordem:
+            situacao, segundos = situacoes.get(nome, ('pendente', 0.0))
+            icone = {'executada': '▶️ ', 'cache': '💾', 'erro': '❌', 'pulada': '⏭️ '}.get(situacao, '  ')
+            print(f"   {icone} {nome:<16} {situacao:<10} {segundos:>8.2f}s")
+        soma = sum(segundos for _, _, segundos in self.resumo)
+        acertos = sum(situacao == 'cache' for _, situacao, _ in self.resumo)
+        guardaveis = sum(etapa.guardar for etapa in self.etapas.values())
+        print(f"   Total: {self.total:.2f}s de relógio | {soma:.2f}s somando as etapas | "
+              f"{acertos}/{guardaveis} etapas do cache")
+
+        if caminho is not None:
+            os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                json.dump({'total_segundos': self.total, 'acertos_cache': acertos,
+                           'etapas': [{'etapa': nome, 'situacao': situacao, 'segundos': segundos}
+                                      for nome, situacao, segundos in self.resumo]}, arquivo, indent=2)
@@ -0,0 +1,101 @@
+from bisect import bisect_left, insort
+
+import numpy as np
+
+METRICAS_RANQUEADAS = ['retorno_total', 'volatilidade', 'volume_medio', 'preco_atual']
+
+
+class IndiceRanking:
+    """Índice ordenado de uma métrica: top/bottom N e posição de um ativo sem reordenar
+
+    Mantém uma lista de pares (valor, ativo) em ordem crescente. Consultas de topo e
+    base são fatias da lista (O(k)); a posição de um ativo é uma busca binária e a
+    troca do valor de um ativo remove e reinsere só aquele par.
+    """
+
+    def __init__(self, valores=None):
+        self._valores = dict(valores or {})
+        self._ordem = sorted((valor, ativo) for ativo, valor in self._valores.items()
+                             if not np.isnan(valor))
+
+    def __len__(self):
+        return len(self._ordem)
+
+    def atualizar(self, ativo, valor):
+        """Troca o valor de um ativo mantendo a ordem"""
+        self.remover(ativo)
+        self._valores[ativo] = valor
+        if not np.isnan(valor):
+            insort(self._ordem, (valor, ativo))
+
+    def com_valores(self, valores):
+        """Novo índice com os valores trocados, reordenado a partir da ordem atual
+
+        Entre duas atualizações as posições mudam pouco, então ordenar a sequência
+        anterior com os valores novos é quase linear (o Timsort aproveita os trechos
+        já ordenados). Este índice não muda.
+        """
+        novo = IndiceRanking.__new__(IndiceRanking)
+        novo._valores = {**self._valores, **valores}
+        ordem = [(novo._valores[ativo], ativo) for _, ativo in self._ordem]
+        ordem += [(valor, ativo) for ativo, valor in valores.items()
+                  if np.isnan(self._valores.get(ativo, np.nan))]
+        novo._ordem = sorted(par for par in ordem if not np.isnan(par[0]))
+        return novo
+
+    def remover(self, ativo):
+        antigo = self._valores.pop(ativo, None)
+        if antigo is None or np.isnan(antigo):
+            return
+        posicao = bisect_left(self._ordem, (antigo, ativo))
+        del self._ordem[posicao]
+
+    def maiores(self, limite=None, inicio=0):
+        """Ativos do maior para o menor valor, paginados"""
+        fim = len(self._ordem) - inicio
+        comeco = 0 if limite is None else max(fim - limite, 0)
+        return [(ativo, valor) for valor, ativo in reversed(self._ordem[comeco:max(fim, 0)])]
+
+    def menores(self, limite=None, inicio=0):
+        """Ativos do menor para o maior valor, paginados"""
+        fim = None if limite is None else inicio + limite
+        return [(ativo, valor) for valor, ativo in self._ordem[inicio:fim]]
+
+    def posicao(self, ativo, decrescente=True):
+        """Posição (1 = primeiro) do ativo no ranking, ou None se não ranqueado"""
+        valor = self._valores.get(ativo)
+        if valor is None or np.isnan(valor):
+            return None
+        crescente = bisect_left(self._ordem, (valor, ativo))
+        return len(self._ordem) - crescente if decrescente else crescente + 1
+
+
+class IndicesRanking:
+    """Um IndiceRanking por métrica, construído junto com as métricas do assistente"""
+
+    def __init__(self, metricas, nomes=METRICAS_RANQUEADAS):
+        self.indices = {
+            nome: IndiceRanking({ativo: float(info[nome]) for ativo, info in metricas.items()})
+            for nome in nomes
+        }
+
+    def __getitem__(self, nome):
+        return self.indices[nome]
+
+    def com_metricas(self, metricas):
+        """Novos índices com as métricas atualizadas, reaproveitando a ordem atual de cada um"""
+        novos = IndicesRanking.__new__(IndicesRanking)
+        novos.indices = {
+            nome: indice.com_valores({ativo: float(info[nome]) for ativo, info in metricas.items()})
+            for nome, indice in self.indices.items()
+        }
+        return novos
+
+    def atualizar_ativo(self, ativo, info):
+        """Reposiciona um ativo em todos os índices depois de suas métricas mudarem"""
+        for nome, indice in self.indices.items():
+            indice.atualizar(ativo, float(info[nome]))
+
+    def remover_ativo(self, ativo):
+        for indice in self.indices.values():
+            indice.remover(ativo)
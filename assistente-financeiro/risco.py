@@ -0,0 +1,202 @@
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from metricas import retornos_diarios
+
+NIVEL_PADRAO = 0.95
+MINIMO_OBSERVACOES = 30
+CARTEIRA = 'CARTEIRA'
+COLUNAS_RISCO = ['var_historico', 'cvar_historico', 'var_parametrico', 'cvar_parametrico',
+                 'var_monte_carlo', 'cvar_monte_carlo']
+
+
+def _pesos(ativos, pesos):
+    """Pesos da carteira na ordem de `ativos` (iguais se não vierem), somando 1"""
+    if pesos is None:
+        return np.full(len(ativos), 1 / len(ativos))
+    if isinstance(pesos, dict):
+        pesos = [pesos.get(ativo, 0.0) for ativo in ativos]
+    pesos = np.asarray(pesos, dtype=np.float64)
+    return pesos / pesos.sum()
+
+
+def var_cvar_historico(perdas, nivel=NIVEL_PADRAO, minimo=MINIMO_OBSERVACOES):
+    """VaR e CVaR empíricos de cada coluna de uma matriz de perdas (NaN ignorados)
+
+    Colunas com menos de `minimo` perdas ficam NaN.
+    """
+    perdas = np.asarray(perdas, dtype=np.float64)
+    var = np.full(perdas.shape[1], np.nan)
+    cvar = np.full(perdas.shape[1], np.nan)
+    suficientes = (~np.isnan(perdas)).sum(axis=0) >= max(minimo, 1)
+    if suficientes.any():
+        perdas = perdas[:, suficientes]
+        var[suficientes] = limite = np.nanquantile(perdas, nivel, axis=0)
+        with np.errstate(invalid='ignore'):
+            cauda = np.where(perdas >= limite, perdas, np.nan)
+        cvar[suficientes] = np.nansum(cauda, axis=0) / (~np.isnan(cauda)).sum(axis=0)
+    return var, cvar
+
+
+def var_cvar_parametrico(media, desvio, nivel=NIVEL_PADRAO):
+    """VaR e CVaR supondo retornos normais com a média e o desvio dados"""
+    normal = NormalDist()
+    z = normal.inv_cdf(nivel)
+    return desvio * z - media, desvio * normal.pdf(z) / (1 - nivel) - media
+
+
+def cholesky_robusta(covariancia):
+    """Fator de Cholesky, somando uma diagonal mínima se a matriz não for positiva definida
+
+    Covariâncias calculadas par a par (ativos com históricos diferentes) podem sair
+    levemente indefinidas.
+    """
+    covariancia = np.asarray(covariancia, dtype=np.float64)
+    escala = np.mean(np.diag(covariancia)) or 1.0
+    ajuste = 0.0
+    for _ in range(10):
+        try:
+            return np.linalg.cholesky(covariancia + ajuste * np.eye(len(covariancia)))
+        except np.linalg.LinAlgError:
+            ajuste = max(ajuste * 10, escala * 1e-10)
+    raise np.linalg.LinAlgError("Covariância não pôde ser fatorada")
+
+
+class AcumuladorPerdas:
+    """Histograma de perdas por coluna: memória fixa qualquer que seja o número de caminhos
+
+    Cada coluna tem `faixas` faixas em [minimo, maximo] com a contagem e a soma exata
+    das perdas de cada faixa (valores fora do intervalo caem nas faixas das pontas).
+    O VaR é interpolado dentro da faixa do quantil; o CVaR usa as somas da cauda.
+    """
+
+    def __init__(self, minimo, maximo, faixas=4_000):
+        self.minimo = np.asarray(minimo, dtype=np.float64)
+        self.largura = (np.asarray(maximo, dtype=np.float64) - self.minimo) / faixas
+        self.faixas = faixas
+        self.contagens = np.zeros((len(self.minimo), faixas))
+        self.somas = np.zeros((len(self.minimo), faixas))
+        self.total = 0
+
+    def adicionar(self, perdas):
+        """Acumula um lote de perdas (caminhos × colunas)"""
+        faixa = np.clip(((perdas - self.minimo) / self.largura).astype(np.int64), 0, self.faixas - 1)
+        posicao = (faixa + np.arange(perdas.shape[1]) * self.faixas).ravel()
+        tamanho = self.contagens.size
+        self.contagens += np.bincount(posicao, minlength=tamanho).reshape(self.contagens.shape)
+        self.somas += np.bincount(posicao, weights=perdas.ravel(), minlength=tamanho).reshape(self.somas.shape)
+        self.total += len(perdas)
+
+    def juntar(self, outro):
+        self.contagens += outro.contagens
+        self.somas += outro.somas
+        self.total += outro.total
+        return self
+
+    def var_cvar(self, nivel=NIVEL_PADRAO):
+        alvo = nivel * self.total
+        acumulado = np.cumsum(self.contagens, axis=1)
+        faixa = np.minimum((acumulado < alvo).sum(axis=1), self.faixas - 1)
+        linhas = np.arange(len(faixa))
+
+        contagem = self.contagens[linhas, faixa]
+        antes = acumulado[linhas, faixa] - contagem
+        fracao = np.where(contagem > 0, (alvo - antes) / np.maximum(contagem, 1), 0.0)
+        var = self.minimo + (faixa + fracao) * self.largura
+
+        # cauda: faixas acima da do quantil mais a parte dela que passa do VaR
+        depois = np.arange(self.faixas) > faixa[:, None]
+        restante = 1 - fracao
+        soma_cauda = (self.somas * depois).sum(axis=1) + restante * self.somas[linhas, faixa]
+        contagem_cauda = (self.contagens * depois).sum(axis=1) + restante * contagem
+        return var, soma_cauda / contagem_cauda
+
+
+def _simular_lotes(media, fator, pesos, lotes, semente, minimo, maximo, faixas):
+    """Simula os lotes de caminhos de um processo e devolve o histograma das perdas"""
+    gerador = np.random.default_rng(semente)
+    acumulador = AcumuladorPerdas(minimo, maximo, faixas)
+    for tamanho in lotes:
+        retornos = media + gerador.standard_normal((tamanho, len(media))) @ fator.T
+        acumulador.adicionar(-np.column_stack([retornos, retornos @ pesos]))
+    return acumulador
+
+
+def var_cvar_monte_carlo(media, covariancia, pesos, nivel=NIVEL_PADRAO, simulacoes=100_000,
+                         lote=20_000, trabalhadores=1, semente=42, faixas=4_000):
+    """VaR e CVaR por Monte Carlo com retornos normais correlacionados (Cholesky)
+
+    Os caminhos são gerados em lotes de `lote` linhas e reduzidos a um histograma por
+    coluna, então a memória não cresce com `simulacoes`. Com `trabalhadores` > 1 os
+    lotes são divididos entre processos, cada um com seu fluxo de números aleatórios.
+    Devolve (var, cvar) para cada ativo e, na última posição, para a carteira.
+    """
+    media = np.asarray(media, dtype=np.float64)
+    fator = cholesky_robusta(covariancia)
+    desvios = np.sqrt(np.append(np.diag(covariancia), pesos @ covariancia @ pesos))
+    centros = -np.append(media, media @ pesos)
+    minimo, maximo = centros - 12 * desvios, centros + 12 * desvios
+
+    lotes = [lote] * (simulacoes // lote) + ([simulacoes % lote] if simulacoes % lote else [])
+    sementes = np.random.SeedSequence(semente).spawn(max(trabalhadores, 1))
+    partes = [lotes[i::len(sementes)] for i in range(len(sementes))]
+    argumentos = (media, fator, pesos)
+    if len(sementes) == 1:
+        acumulador = _simular_lotes(*argumentos, partes[0], sementes[0], minimo, maximo, faixas)
+    else:
+        with ProcessPoolExecutor(len(sementes)) as executor:
+            futuros = [executor.submit(_simular_lotes, *argumentos, parte, sementes[i], minimo, maximo, faixas)
+                       for i, parte in enumerate(partes)]
+            acumulador = futuros[0].result()
+            for futuro in futuros[1:]:
+                acumulador.juntar(futuro.result())
+    return acumulador.var_cvar(nivel)
+
+
+def tabela_risco(precos, pesos=None, nivel=NIVEL_PADRAO, horizonte=1, simulacoes=100_000,
+                 trabalhadores=1, semente=42, minimo=MINIMO_OBSERVACOES):
+    """VaR e CVaR histórico, paramétrico e Monte Carlo por ativo e da carteira
+
+    Recebe a matriz larga de preços (data × ativo) e devolve um DataFrame indexado
+    pelo ativo (mais a linha CARTEIRA) com as colunas de COLUNAS_RISCO, em % de
+    perda no `horizonte` (pregões; escala pela raiz do tempo nos modelos normais).
+    Ativos com menos de `minimo` retornos ficam com a linha NaN, e a carteira também
+    se algum deles estiver nessa situação.
+    """
+    ativos = list(precos.columns)
+    pesos = _pesos(ativos, pesos)
+    retornos = retornos_diarios(precos).iloc[1:]
+    matriz = retornos.to_numpy(dtype=np.float64)
+
+    # a carteira só tem retorno nos pregões em que todos os ativos têm
+    carteira = np.where(np.isnan(matriz).any(axis=1), np.nan, np.nan_to_num(matriz) @ pesos)
+    perdas = -np.column_stack([matriz, carteira])
+    if horizonte > 1:
+        perdas = pd.DataFrame(perdas).rolling(horizonte).sum().to_numpy()
+    var_hist, cvar_hist = var_cvar_historico(perdas, nivel, minimo)
+
+    suficientes = retornos.count().to_numpy() >= max(minimo, 2)
+    media = np.where(suficientes, retornos.mean().to_numpy(), np.nan) * horizonte
+    covariancia = retornos.cov(min_periods=max(minimo, 2)).to_numpy() * horizonte
+    desvios = np.sqrt(np.append(np.diag(covariancia), pesos @ covariancia @ pesos))
+    var_param, cvar_param = var_cvar_parametrico(np.append(media, media @ pesos), desvios, nivel)
+
+    # Monte Carlo só nos ativos com histórico suficiente; a carteira precisa de todos
+    var_mc, cvar_mc = np.full(len(ativos) + 1, np.nan), np.full(len(ativos) + 1, np.nan)
+    if suficientes.any():
+        simulados = np.append(suficientes, False)
+        parcial = pesos[suficientes] if pesos[suficientes].sum() > 0 else np.ones(suficientes.sum())
+        var, cvar = var_cvar_monte_carlo(media[suficientes], covariancia[np.ix_(suficientes, suficientes)],
+                                         parcial / parcial.sum(), nivel, simulacoes,
+                                         trabalhadores=trabalhadores, semente=semente)
+        var_mc[simulados], cvar_mc[simulados] = var[:-1], cvar[:-1]
+        if suficientes.all():
+            var_mc[-1], cvar_mc[-1] = var[-1], cvar[-1]
+
+    tabela = pd.DataFrame(
+        np.column_stack([var_hist, cvar_hist, var_param, cvar_param, var_mc, cvar_mc]) * 100,
+        index=pd.Index(ativos + [CARTEIRA], name='Ativo'), columns=COLUNAS_RISCO)
+    return tabela
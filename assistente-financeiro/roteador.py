@@ -0,0 +1,157 @@
+import re
+import unicodedata
+from collections import namedtuple
+from datetime import date
+
+Intencao = namedtuple('Intencao', ['nome', 'ativos', 'modificadores', 'periodo'], defaults=[None])
+
+PALAVRAS_CHAVE = {
+    'var': ['var', 'cvar', 'value at risk', 'expected shortfall', 'perda esperada', 'valor em risco'],
+    'backtest': ['backtest', 'cruzamento de média', 'cruzamento das média', 'médias móveis', 'média móvel',
+                 'teria rendido', 'teria ganho', 'estratégia'],
+    'carteira': ['monte uma carteira', 'montar uma carteira', 'monte carteira', 'montar carteira',
+                 'otimiz', 'fronteira eficiente', 'sharpe', 'alocação'],
+    'drawdown': ['drawdown', 'queda máxima', 'maior queda', 'abaixo do topo'],
+    'indicadores': ['indicador', 'análise técnica', 'rsi', 'ifr', 'bollinger', 'média exponencial', 'mme', 'beta'],
+    'intradiario': ['intradiário', 'intraday', 'tempo real', 'ao vivo'],
+    'volatilidade': ['volatil', 'risco', 'oscila'],
+    'retorno': ['retorno', 'desempenho', 'lucro', 'rendimento'],
+    'preco': ['preço', 'valor', 'cotação'],
+    'volume': ['volume', 'negocia'],
+    'correlacao': ['correlação', 'correlaciona', 'relação', 'diversificação'],
+    'resumo': ['resumo', 'info', 'detalhe'],
+}
+
+MODIFICADORES = {
+    'melhor': ['melhor'],
+    'pior': ['pior'],
+    'minimo': ['mínim', 'menor'],
+    'maximo': ['máxim', 'maior'],
+    'menos': ['menos'],
+    'ytd': ['ytd', 'no ano', 'neste ano', 'este ano', 'acumulado do ano'],
+    # 'hoje' sozinho pede o painel intradiário; com outro tema ("preço da PETR4 hoje") não muda a intenção
+    'hoje': ['hoje'],
+}
+
+# palavras curtas que só valem isoladas ('var' não pode casar com 'variação')
+PALAVRAS_INTEIRAS = {'var', 'cvar', 'rsi', 'ifr', 'mme', 'beta'}
+
+UNIDADES_PERIODO = {'dia': 'dias', 'dias': 'dias', 'mes': 'meses', 'meses': 'meses', 'ano': 'anos', 'anos': 'anos'}
+
+# ordem de prioridade quando a pergunta cita mais de um tema
+PRIORIDADE = ['backtest', 'var', 'carteira', 'drawdown', 'indicadores', 'intradiario', 'volatilidade', 'retorno', 'preco', 'volume', 'correlacao', 'resumo']
+
+
+SEM_ACENTOS = str.maketrans('áàâãäéèêëíìîïóòôõöúùûüç', 'aaaaaeeeeiiiiooooouuuuc')
+
+
+def data_iso(texto):
+    """'2024-03-01' ou '01/03/2024' como 'AAAA-MM-DD' (None se a data não existir)"""
+    if '/' in texto:
+        dia, mes, ano = texto.split('/')
+    else:
+        ano, mes, dia = texto.split('-')
+    try:
+        return date(int(ano), int(mes), int(dia)).isoformat()
+    except ValueError:
+        return None
+
+
+def normalizar_texto(texto):
+    """Minúsculas e sem acentos, para casar 'cotação' com 'cotacao'"""
+    texto = texto.lower().translate(SEM_ACENTOS)
+    if not texto.isascii():
+        decomposto = unicodedata.normalize('NFKD', texto)
+        texto = ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+    return texto.strip()
+
+
+class RoteadorIntencoes:
+    """Identifica intenção e ativos de uma pergunta numa única varredura
+
+    Palavras-chave, modificadores, períodos ("últimos 30 dias", "2024"), datas
+    ("2024-03-01", "01/03/2024") e tickers (com ou sem o sufixo .SA) viram uma só
+    expressão regular compilada; cada casamento diz a que grupo pertence, então a
+    pergunta é percorrida uma vez, independente do tamanho do universo de ativos.
+    """
+
+    def __init__(self, ativos):
+        self.tickers = {}
+        for ativo in ativos:
+            base = normalizar_texto(ativo)
+            self.tickers[base] = ativo
+            if base.endswith('.sa'):
+                self.tickers[base[:-3]] = ativo
+
+        self.rotulos = {}
+        for grupo in (PALAVRAS_CHAVE, MODIFICADORES):
+            for rotulo, palavras in grupo.items():
+                for palavra in palavras:
+                    self.rotulos[normalizar_texto(palavra)] = rotulo
+
+        def alternativa(palavra):
+            if palavra in PALAVRAS_INTEIRAS:
+                return rf"(?<![a-z0-9]){re.escape(palavra)}(?![a-z0-9])"
+            return re.escape(palavra)
+
+        def alternativas(palavras):
+            return '|'.join(alternativa(palavra) for palavra in sorted(palavras, key=len, reverse=True))
+
+        # tickers com dígito (o padrão da B3) casam por formato e são conferidos no dicionário;
+        # só os demais entram como alternativas literais na expressão
+        literais = [ticker for ticker in self.tickers if not any(c.isdigit() for c in ticker)]
+        formatos = [r"[a-z0-9^]*\d[a-z0-9]*(?:\.sa)?"] + ([alternativas(literais)] if literais else [])
+        self.padrao = re.compile(
+            r"(?P<ultimos>ultim[oa]s?\s+(?P<quantidade>\d+)\s+(?P<unidade>dias?|mes(?:es)?|anos?))"
+            r"|(?<![a-z0-9])(?P<data>\d{4}-\d\d?-\d\d?|\d\d?/\d\d?/\d{4})(?![a-z0-9])"
+            r"|(?<![a-z0-9])(?P<ano>(?:19|20)\d\d)(?![a-z0-9])"
+            f"|(?<![a-z0-9])(?P<ativo>{'|'.join(formatos)})(?![a-z0-9])"
+            f"|(?P<palavra>{alternativas(self.rotulos)})"
+        )
+
+    def rotear(self, pergunta):
+        """Devolve a Intencao (nome, ativos citados, modificadores, período) da pergunta
+
+        Uma data vira o período ('data', 'AAAA-MM-DD'); duas ou mais, ('intervalo', início, fim).
+        """
+        temas, modificadores, ativos, datas = set(), set(), [], []
+        periodo = None
+        for casamento in self.padrao.finditer(normalizar_texto(pergunta)):
+            if casamento.group('ultimos') is not None:
+                periodo = (UNIDADES_PERIODO[casamento.group('unidade')], int(casamento.group('quantidade')))
+                continue
+            if casamento.group('data') is not None:
+                data = data_iso(casamento.group('data'))
+                if data is not None:
+                    datas.append(data)
+                continue
+            if casamento.group('ano') is not None:
+                periodo = periodo or ('ano', int(casamento.group('ano')))
+                continue
+
+            ativo = casamento.group('ativo')
+            if ativo is not None:
+                ticker = self.tickers.get(ativo)
+                if ticker is not None and ticker not in ativos:
+                    ativos.append(ticker)
+                continue
+
+            rotulo = self.rotulos[casamento.group('palavra')]
+            if rotulo in MODIFICADORES:
+                modificadores.add(rotulo)
+            else:
+                temas.add(rotulo)
+
+        nome = next((tema for tema in PRIORIDADE if tema in temas), None)
+        if nome is None:
+            if {'melhor', 'pior'} <= modificadores:
+                nome = 'melhor_pior'
+            else:
+                nome = 'intradiario' if 'hoje' in modificadores else 'ajuda'
+        if len(datas) >= 2:
+            periodo = ('intervalo', min(datas), max(datas))
+        elif datas:
+            periodo = ('data', datas[0])
+        elif periodo is None and 'ytd' in modificadores:
+            periodo = ('ytd',)
+        return Intencao(nome, tuple(ativos), frozenset(modificadores - {'ytd', 'hoje'}), periodo)
@@ -0,0 +1,321 @@
+"""Serviço HTTP/JSON do assistente (asyncio, sem dependências externas)
+
+    POST /perguntar  {"pergunta": "..."}  ->  {"intencao": ..., "dados": ..., "resposta": "..."}
+    GET  /saude                          ->  versão dos dados e estatísticas dos caches
+    GET  /metricas                       ->  tempos por etapa e contadores (texto do Prometheus)
+
+Uma única instância de AssistenteAtivos é compartilhada por todas as conexões. As
+respostas são calculadas num pool de threads; a atualização periódica monta uma
+instância nova só com os pregões novos (AssistenteAtivos.atualizado) e troca a
+referência de uma vez, então requisições em andamento terminam com os dados
+antigos sem travas no caminho de leitura.
+
+    python servidor.py --porta 8080 [--sintetico] [--atualizar-a-cada 900] [--snapshot DIR]
+                       [--instrumentar [--log ARQUIVO] [--perfil ARQUIVO]]
+                       [--intradiario ARQUIVO|HOST:PORTA]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from assistente import AssistenteAtivos
+from instrumentacao import instrumentacao
+from intradiario import ReprodutorArquivo, ReprodutorSocket
+
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+          500: 'Internal Server Error'}
+
+
+def fonte_intradiaria(endereco):
+    """Arquivo de negócios existente vira um reprodutor; 'host:porta' vira uma conexão TCP"""
+    if os.path.exists(endereco) or ':' not in endereco:
+        return ReprodutorArquivo(endereco)
+    host, porta = endereco.rsplit(':', 1)
+    return ReprodutorSocket(host, int(porta))
+
+
+def valores_json(valor):
+    """Cópia de `valor` aceita pelo json com allow_nan=False: NaN e infinitos viram null"""
+    if isinstance(valor, dict):
+        return {chave: valores_json(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [valores_json(item) for item in valor]
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+def dados_da_intencao(assistente, intencao):
+    """Versão estruturada (JSON) da resposta para uma intenção"""
+    nome, ativos, modificadores, periodo = intencao
+    metricas, _ = assistente.metricas_periodo(periodo)
+
+    if nome == 'backtest':
+        backtest = assistente.backtest(periodo)
+        estrategia = backtest.cruzamento_medias()
+        estrategia['comprar_e_manter'] = backtest.comprar_e_manter()['retorno_total']
+        if ativos:
+            estrategia = estrategia.reindex(list(ativos))
+        return estrategia.to_dict('index')
+
+    if nome == 'intradiario' and assistente.intradiario is not None:
+        painel = assistente.intradiario.painel()
+        if ativos:
+            painel = painel.reindex(list(ativos))
+        return painel.to_dict('index')
+
+    if nome in ('drawdown', 'indicadores'):
+        tabela = assistente.indicadores(periodo).tabela()
+        if nome == 'drawdown':
+            tabela = tabela[['max_drawdown', 'duracao_drawdown', 'drawdown_atual']]
+        if ativos:
+            tabela = tabela.reindex(list(ativos))
+        return tabela.to_dict('index')
+
+    if nome == 'var':
+        return assistente.tabela_risco(periodo).to_dict('index')
+
+    if nome == 'carteira':
+        otimizador = assistente.otimizador()
+        carteiras = {'minima_variancia': otimizador.minima_variancia()}
+        if 'minimo' not in modificadores and 'menos' not in modificadores:
+            carteiras['maximo_sharpe'] = otimizador.maximo_sharpe()
+        return {nome_carteira: {'retorno': carteira.retorno, 'volatilidade': carteira.volatilidade,
+                                'sharpe': carteira.sharpe,
+                                'pesos': carteira.pesos[carteira.pesos > 0].to_dict()}
+                for nome_carteira, carteira in carteiras.items()}
+
+    if nome in ('volatilidade', 'volume') or (nome == 'retorno' and not {'melhor', 'pior'} & modificadores):
+        metrica = {'volatilidade': 'volatilidade', 'volume': 'volume_medio', 'retorno': 'retorno_total'}[nome]
+        indice, _ = assistente.ranking(metrica, periodo)
+        return [{'ativo': ativo, metrica: valor} for ativo, valor in indice.maiores()]
+
+    elif nome in ('retorno', 'melhor_pior'):
+        indice, _ = assistente.ranking('retorno_total', periodo)
+        if len(indice) == 0:
+            return {'melhor': None, 'pior': None}
+        (melhor, valor_melhor), (pior, valor_pior) = indice.maiores(1)[0], indice.menores(1)[0]
+        return {'melhor': {'ativo': melhor, 'retorno_total': valor_melhor},
+                'pior': {'ativo': pior, 'retorno_total': valor_pior}}
+
+    elif nome == 'preco' and periodo is not None and periodo[0] == 'data':
+        indice = assistente.indice_datas()
+        precos = {}
+        for ativo in ativos or assistente.ativos:
+            pregao = indice.no_dia(ativo, periodo[1]) if ativo in indice else None
+            precos[ativo] = None if pregao is None else {'data': f"{pregao[0]:%Y-%m-%d}", 'preco': pregao[1]}
+        return precos
+
+    elif nome == 'preco' and periodo is not None and periodo[0] == 'intervalo' and ativos:
+        series = {}
+        for ativo in ativos:
+            datas, precos, _ = assistente.precos_entre(ativo, periodo[1], periodo[2])
+            series[ativo] = [{'data': str(dia), 'preco': float(preco)} for dia, preco in zip(datas, precos)]
+        return series
+
+    elif nome == 'preco':
+        campo = 'preco_min' if 'minimo' in modificadores else 'preco_max' if 'maximo' in modificadores else 'preco_atual'
+        return {ativo: info[campo] for ativo, info in metricas.items()}
+
+    elif nome == 'correlacao' and len(ativos) >= 2:
+        return {'ativos': list(ativos[:2]),
+                'correlacao': assistente.matriz_correlacao().par(ativos[0], ativos[1])}
+
+    elif nome == 'correlacao' and len(ativos) == 1:
+        menos = 'menos' in modificadores or 'minimo' in modificadores
+        pares = assistente.matriz_correlacao().mais_correlacionados(ativos[0], menos=menos)
+        return [{'ativo': outro, 'correlacao': correl} for outro, correl in pares]
+
+    elif nome == 'resumo' and ativos and ativos[0] in metricas:
+        info = metricas[ativos[0]]
+        return {campo: info[campo] for campo in info.__slots__}
+
+    return None
+
+
+class ServidorAssistente:
+    """Servidor HTTP mínimo sobre asyncio.start_server"""
+
+    def __init__(self, criar_assistente, trabalhadores=8, intervalo_atualizacao=None):
+        self.criar_assistente = criar_assistente
+        self.assistente = criar_assistente()
+        self.executor = ThreadPoolExecutor(max_workers=trabalhadores)
+        self.intervalo_atualizacao = intervalo_atualizacao
+        self.requisicoes = 0
+
+    def responder(self, pergunta):
+        """Resposta completa de uma pergunta (roda numa thread do pool)"""
+        assistente = self.assistente
+        with instrumentacao.rastro('pergunta', pergunta=pergunta):
+            with instrumentacao.etapa('roteamento'):
+                intencao = assistente.roteador.rotear(pergunta)
+            with instrumentacao.etapa('dados', intencao=intencao.nome):
+                dados = assistente.responder_com_cache(intencao, dados_da_intencao)
+            return {
+                'pergunta': pergunta,
+                'intencao': {'nome': intencao.nome, 'ativos': list(intencao.ativos),
+                             'modificadores': sorted(intencao.modificadores), 'periodo': intencao.periodo},
+                'dados': dados,
+                'resposta': assistente.responder_com_cache(intencao),
+                'versao_dados': assistente.versao_dados,
+            }
+
+    def saude(self):
+        assistente = self.assistente
+        return {
+            'ativos': len(assistente.ativos),
+            'versao_dados': assistente.versao_dados,
+            'requisicoes': self.requisicoes,
+            'cache_respostas': assistente.cache_respostas.estatisticas(),
+            'intradiario': None if assistente.intradiario is None else {
+                'eventos': assistente.intradiario.eventos, 'atrasados': assistente.intradiario.atrasados,
+                'ativos': len(assistente.intradiario.estados)},
+        }
+
+    async def atualizar_periodicamente(self):
+        """Busca só os pregões novos numa instância nova e troca a referência atomicamente"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.intervalo_atualizacao)
+            try:
+                self.assistente = await loop.run_in_executor(self.executor, self.assistente.atualizado)
+            except Exception as erro:
+                print(f"⚠️  Falha na atualização, mantendo os dados atuais: {erro!r}")
+
+    async def tratar_conexao(self, leitor, escritor):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    cabecalho = await leitor.readuntil(b'\r\n\r\n')
+                    linhas = cabecalho.decode('latin-1').split('\r\n')
+                    metodo, caminho, _ = linhas[0].split(' ', 2)
+                    campos = dict(linha.split(':', 1) for linha in linhas[1:] if ':' in linha)
+                    campos = {chave.strip().lower(): valor.strip() for chave, valor in campos.items()}
+                    corpo = await leitor.readexactly(int(campos.get('content-length', 0)))
+                except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+                    break
+
+                self.requisicoes += 1
+                try:
+                    status, resposta = await self.rotear(loop, metodo, caminho, corpo)
+                except Exception as erro:
+                    instrumentacao.contar('erros_internos', caminho=caminho, erro=type(erro).__name__)
+                    print(f"❌ Erro ao responder {metodo} {caminho}: {erro!r}")
+                    status, resposta = 500, {'erro': f"Erro interno ao responder: {type(erro).__name__}"}
+                instrumentacao.contar('requisicoes', caminho=caminho, status=status)
+                if isinstance(resposta, str):
+                    conteudo, tipo = resposta.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+                else:
+                    conteudo = json.dumps(valores_json(resposta), ensure_ascii=False, allow_nan=False, default=float).encode('utf-8')
+                    tipo = 'application/json; charset=utf-8'
+                manter = campos.get('connection', '').lower() != 'close'
+                escritor.write(
+                    f"HTTP/1.1 {status} {STATUS[status]}\r\n"
+                    f"Content-Type: {tipo}\r\n"
+                    f"Content-Length: {len(conteudo)}\r\n"
+                    f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode('latin-1') + conteudo
+                )
+                await escritor.drain()
+                if not manter:
+                    break
+        except ConnectionResetError:
+            pass
+        finally:
+            escritor.close()
+
+    async def rotear(self, loop, metodo, caminho, corpo):
+        if caminho == '/saude':
+            return 200, self.saude()
+        if caminho == '/metricas':
+            return 200, instrumentacao.texto_prometheus()
+        if caminho != '/perguntar':
+            return 404, {'erro': f"Caminho {caminho} não encontrado"}
+        if metodo != 'POST':
+            return 405, {'erro': "Use POST com {\"pergunta\": \"...\"}"}
+
+        try:
+            pergunta = json.loads(corpo or b'{}')['pergunta']
+        except (ValueError, KeyError, TypeError):
+            return 400, {'erro': "Corpo deve ser JSON com o campo 'pergunta'"}
+
+        inicio = time.perf_counter()
+        resposta = await loop.run_in_executor(self.executor, self.responder, str(pergunta))
+        resposta['tempo_ms'] = (time.perf_counter() - inicio) * 1000
+        return 200, resposta
+
+    async def servir(self, host='127.0.0.1', porta=8080, pronto=None):
+        servidor = await asyncio.start_server(self.tratar_conexao, host, porta)
+        if self.intervalo_atualizacao:
+            self._atualizacao = asyncio.get_running_loop().create_task(self.atualizar_periodicamente())
+        print(f"🌐 Assistente ouvindo em http://{host}:{servidor.sockets[0].getsockname()[1]}")
+        if pronto is not None:
+            pronto(servidor.sockets[0].getsockname()[1])
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP do assistente de ativos")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--trabalhadores', type=int, default=8)
+    parser.add_argument('--atualizar-a-cada', type=float, default=None, help="segundos entre recargas")
+    parser.add_argument('--sintetico', type=int, nargs='?', const=4, default=None,
+                        help="usa a fonte sintética local com N ativos (padrão 4)")
+    parser.add_argument('--snapshot', default=None, metavar='DIRETORIO',
+                        help="inicia a partir do snapshot em disco (criado na primeira execução)")
+    parser.add_argument('--instrumentar', action='store_true',
+                        help="cronometra as etapas de cada pergunta (expostas em GET /metricas)")
+    parser.add_argument('--log', default=None, metavar='ARQUIVO',
+                        help="com --instrumentar, grava uma linha JSON por pergunta")
+    parser.add_argument('--perfil', default=None, metavar='ARQUIVO',
+                        help="com --instrumentar, amostra as pilhas e grava no formato folded ao encerrar")
+    parser.add_argument('--intradiario', default=None, metavar='ARQUIVO|HOST:PORTA',
+                        help="acompanha negócios de um arquivo (reproduzido) ou de uma conexão TCP")
+    argumentos = parser.parse_args()
+
+    if argumentos.instrumentar:
+        instrumentacao.ativar(argumentos.log)
+        if argumentos.perfil:
+            instrumentacao.perfilar()
+
+    if argumentos.sintetico:
+        from fontes_dados import FonteSintetica, universo_sintetico
+        fonte = FonteSintetica()
+
+        def carregar():
+            return AssistenteAtivos(universo_sintetico(argumentos.sintetico), fonte=fonte)
+    else:
+        fonte = None
+        carregar = AssistenteAtivos
+
+    def criar_assistente():
+        if argumentos.snapshot is None:
+            return carregar()
+        assistente = AssistenteAtivos.de_snapshot(argumentos.snapshot, fonte=fonte)
+        if assistente is None:
+            assistente = carregar()
+            assistente.salvar_snapshot(argumentos.snapshot)
+        return assistente
+
+    servidor = ServidorAssistente(criar_assistente, argumentos.trabalhadores, argumentos.atualizar_a_cada)
+    if argumentos.intradiario:
+        servidor.assistente.conectar_intradiario(fonte_intradiaria(argumentos.intradiario))
+    try:
+        asyncio.run(servidor.servir(argumentos.host, argumentos.porta))
+    finally:
+        if instrumentacao.perfilador is not None:
+            instrumentacao.perfilador.parar().salvar(argumentos.perfil)
+
+
+if __name__ == "__main__":
+    main()
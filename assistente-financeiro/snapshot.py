@@ -0,0 +1,112 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from armazem import ArmazemPrecos, RegistroMetricas
+
+DIRETORIO_SNAPSHOT = os.environ.get('ASSISTENTE_SNAPSHOT_DIR', '.snapshot_assistente')
+FORMATO = 1
+
+COLUNAS_DADOS = {'Data': 'data', 'Preço': 'preco', 'Volume': 'volume', 'Retorno_Diario': 'retorno'}
+CAMPOS_ARMAZEM = ('datas', 'precos', 'volumes', 'offsets')
+
+
+def _caminho(diretorio, nome):
+    return os.path.join(diretorio, f"{nome}.npy")
+
+
+def _salvar_array(diretorio, nome, valores):
+    caminho = _caminho(diretorio, nome)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as arquivo:
+        np.save(arquivo, np.ascontiguousarray(valores))
+    os.replace(temporario, caminho)
+
+
+def _ler_array(diretorio, nome):
+    return np.load(_caminho(diretorio, nome), mmap_mode='r')
+
+
+def salvar_snapshot(assistente, diretorio=DIRETORIO_SNAPSHOT):
+    """Grava dados, métricas e armazém do assistente em arrays .npy
+
+    O meta.json é removido antes e gravado por último: um snapshot interrompido no
+    meio fica sem ele e é ignorado na leitura.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    meta = os.path.join(diretorio, 'meta.json')
+    if os.path.exists(meta):
+        os.remove(meta)
+
+    dados = assistente.dados
+    ativo = pd.Categorical(dados['Ativo'], categories=assistente.ativos)
+    _salvar_array(diretorio, 'dados_ativo', ativo.codes.astype(np.int32))
+    for coluna, nome in COLUNAS_DADOS.items():
+        _salvar_array(diretorio, f"dados_{nome}", dados[coluna].to_numpy())
+
+    campos = RegistroMetricas.__slots__
+    tabela = np.array([[assistente.metricas[ativo][campo] for campo in campos] for ativo in assistente.ativos],
+                      dtype=np.float64).reshape(len(assistente.ativos), len(campos))
+    _salvar_array(diretorio, 'metricas', tabela)
+
+    if assistente.armazem is not None:
+        for campo in CAMPOS_ARMAZEM:
+            _salvar_array(diretorio, f"armazem_{campo}", getattr(assistente.armazem, campo))
+
+    temporario = meta + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump({
+            'formato': FORMATO,
+            'ativos': list(assistente.ativos),
+            'compacto': assistente.armazem is not None,
+            'campos_metricas': list(campos),
+            'ultima_data': str(dados['Data'].max().date()),
+            'salvo_em': time.time(),
+        }, arquivo, indent=2)
+    os.replace(temporario, meta)
+
+
+def ler_meta(diretorio=DIRETORIO_SNAPSHOT):
+    """Metadados do snapshot, ou None se não houver um completo e compatível"""
+    caminho = os.path.join(diretorio, 'meta.json')
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as arquivo:
+        meta = json.load(arquivo)
+    if meta.get('formato') != FORMATO or meta.get('campos_metricas') != list(RegistroMetricas.__slots__):
+        return None
+    return meta
+
+
+def carregar_snapshot(diretorio=DIRETORIO_SNAPSHOT):
+    """(meta, dados, metricas, armazem) lidos com memória mapeada, ou None
+
+    Os DataFrames são montados com `copy=False`, um bloco por coluna: as colunas numéricas
+    e as datas continuam sendo os arrays mapeados (só o que é usado sai do disco). No modo
+    padrão a coluna Ativo vira texto e é a única materializada.
+    """
+    meta = ler_meta(diretorio)
+    if meta is None:
+        return None
+
+    ativos = meta['ativos']
+    colunas = {'Data': _ler_array(diretorio, 'dados_data'),
+               'Ativo': pd.Categorical.from_codes(_ler_array(diretorio, 'dados_ativo'), categories=ativos)}
+    for coluna, nome in COLUNAS_DADOS.items():
+        if coluna != 'Data':
+            colunas[coluna] = _ler_array(diretorio, f"dados_{nome}")
+    dados = pd.DataFrame(colunas, copy=False)
+    if not meta['compacto']:
+        dados['Ativo'] = dados['Ativo'].astype(str)
+
+    tabela = pd.DataFrame(_ler_array(diretorio, 'metricas'), index=pd.Index(ativos, name='Ativo'),
+                          columns=meta['campos_metricas'], copy=False)
+    metricas = RegistroMetricas.de_tabela(tabela)
+
+    armazem = None
+    if meta['compacto']:
+        armazem = ArmazemPrecos(ativos, *(_ler_array(diretorio, f"armazem_{campo}") for campo in CAMPOS_ARMAZEM))
+    return meta, dados, metricas, armazem
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from armazem import ArmazemPrecos
+from assistente import AssistenteAtivos
+from fontes_dados import FonteSintetica, carregar_universo
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+
+
+@pytest.fixture(scope='module')
+def dados():
+    dados = FonteSintetica().baixar(ATIVOS, inicio='2023-01-02', fim='2024-01-01')
+    dados.loc[dados.index[:30], ('Close', 'VALE3.SA')] = np.nan
+    return dados
+
+
+def test_matriz_volta_aos_precos_originais(dados):
+    armazem = ArmazemPrecos.de_download(dados)
+    np.testing.assert_allclose(armazem.matriz('precos').to_numpy(), dados['Close'].to_numpy(), rtol=1e-6)
+    datas, precos, _ = armazem.serie('VALE3.SA')
+    assert len(precos) == len(dados) - 30
+    assert datas[0] == np.datetime64(dados.index[30].date())
+
+
+def test_com_pregoes_igual_a_montar_tudo_de_uma_vez(dados):
+    antes, depois = dados.iloc[:200], dados.iloc[200:]
+    armazem = ArmazemPrecos.de_download(antes)
+    novo = armazem.com_pregoes(depois)
+    completo = ArmazemPrecos.de_download(dados)
+    for campo in ('datas', 'precos', 'volumes', 'offsets'):
+        np.testing.assert_array_equal(getattr(novo, campo), getattr(completo, campo))
+    assert len(armazem.datas) == armazem.offsets[-1]
+
+
+def test_modo_compacto_responde_como_o_padrao():
+    padrao = AssistenteAtivos(ATIVOS, fonte=FonteSintetica())
+    compacto = AssistenteAtivos(ATIVOS, fonte=FonteSintetica(), compacto=True)
+    assert compacto.armazem is not None
+    for ativo in ATIVOS:
+        assert compacto.metricas[ativo]['retorno_total'] == pytest.approx(padrao.metricas[ativo]['retorno_total'],
+                                                                          rel=1e-5)
+
+
+def test_orcamento_estourado_falha_com_memory_error():
+    with pytest.raises(MemoryError):
+        AssistenteAtivos(ATIVOS, fonte=FonteSintetica(), compacto=True, orcamento_mb=0.001)
+
+
+def test_universo_normaliza_e_remove_repetidos(tmp_path):
+    arquivo = tmp_path / 'ativos.txt'
+    arquivo.write_text("# comentário\npetr4\nPETR4.SA\nvale3  # mineração\n\n", encoding='utf-8')
+    assert carregar_universo(str(arquivo)) == ['PETR4.SA', 'VALE3.SA']
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from assistente import AssistenteAtivos
+from cache_precos import CachePrecos
+from fontes_dados import FonteDados, FonteSintetica
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA']
+
+
+class FonteAte(FonteDados):
+    """FonteSintetica que só conhece os pregões até `ate` (inclusive)"""
+
+    def __init__(self, ate):
+        self.sintetica = FonteSintetica()
+        self.ate = pd.Timestamp(ate)
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        fim = pd.Timestamp(fim) if fim is not None else pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+        return self.sintetica.baixar(ativos, inicio, min(fim, self.ate + pd.Timedelta(days=1)), periodo)
+
+
+def test_atualizacao_busca_pregao_novo_dentro_da_validade(tmp_path, capsys):
+    ontem = pd.Timestamp.today().normalize() - pd.offsets.BDay(1)
+    anterior = ontem - pd.offsets.BDay(1)
+    fonte = FonteAte(anterior)
+    cache = CachePrecos(fonte, diretorio=str(tmp_path))
+    assistente = AssistenteAtivos(ATIVOS, fonte=cache)
+    assert assistente.dados['Data'].max() == anterior
+
+    fonte.ate = ontem
+    novo = assistente.atualizado()
+
+    assert novo is not assistente
+    assert novo.dados['Data'].max() == ontem
+    assert novo.versao_dados == assistente.versao_dados + 1
+    # uma carga normal, dentro da validade, continua saindo do disco
+    assert cache.baixar(ATIVOS, periodo='2y').index.max() == ontem
+
+
+def test_atualizacao_nao_altera_a_instancia_antiga_e_bate_com_a_carga_completa(tmp_path):
+    from rankings import METRICAS_RANQUEADAS
+
+    ontem = pd.Timestamp.today().normalize() - pd.offsets.BDay(1)
+    fonte = FonteAte(ontem - pd.offsets.BDay(5))
+    assistente = AssistenteAtivos(ATIVOS + ['ITUB4.SA'], fonte=CachePrecos(fonte, diretorio=str(tmp_path)))
+    correlacao = assistente.matriz_correlacao().matriz.copy()
+    rankings = {nome: assistente.rankings[nome].maiores() for nome in METRICAS_RANQUEADAS}
+    metricas = {ativo: info['retorno_total'] for ativo, info in assistente.metricas.items()}
+
+    fonte.ate = ontem
+    novo = assistente.atualizado()
+
+    assert assistente._acumulados is None
+    np.testing.assert_array_equal(assistente.matriz_correlacao().matriz, correlacao)
+    assert {nome: assistente.rankings[nome].maiores() for nome in METRICAS_RANQUEADAS} == rankings
+    assert {ativo: info['retorno_total'] for ativo, info in assistente.metricas.items()} == metricas
+
+    completo = AssistenteAtivos(ATIVOS + ['ITUB4.SA'], fonte=fonte)
+    np.testing.assert_allclose(novo.matriz_correlacao().matriz, completo.matriz_correlacao().matriz, rtol=1e-9)
+    for nome in METRICAS_RANQUEADAS:
+        assert [ativo for ativo, _ in novo.rankings[nome].maiores()] == \
+            [ativo for ativo, _ in completo.rankings[nome].maiores()]
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+from assistente import SEM_PREGOES, AssistenteAtivos
+from backtest import Backtest
+from fontes_dados import FonteSintetica
+from indicadores import Indicadores
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+
+
+@pytest.fixture(scope='module')
+def precos():
+    return FonteSintetica().baixar(ATIVOS, inicio='2022-01-03', fim='2024-01-01')['Close']
+
+
+def test_comprar_e_manter_igual_ao_pandas(precos):
+    tabela = Backtest(precos).comprar_e_manter()
+    np.testing.assert_allclose(tabela['retorno_total'], (precos.iloc[-1] / precos.iloc[0] - 1) * 100, rtol=1e-9)
+    np.testing.assert_allclose(tabela['volatilidade'], precos.pct_change().std() * 100, rtol=1e-9)
+
+
+def test_drawdown_com_o_mesmo_sinal_dos_indicadores(precos):
+    tabela = Backtest(precos).comprar_e_manter()
+    assert (tabela['max_drawdown'] < 0).all()
+    np.testing.assert_allclose(tabela['max_drawdown'], Indicadores(precos).tabela()['max_drawdown'], rtol=1e-9)
+
+
+def test_periodo_sem_pregoes(precos):
+    tabela = Backtest(precos.iloc[:0]).cruzamento_medias()
+    assert tabela.isna().all().all()
+    assistente = AssistenteAtivos(ATIVOS, fonte=FonteSintetica())
+    assert assistente.processar_pergunta("backtest da PETR4 em 2010").endswith(SEM_PREGOES)
+
+
+def test_varredura_feita_uma_vez_por_periodo(monkeypatch):
+    assistente = AssistenteAtivos(ATIVOS, fonte=FonteSintetica())
+    chamadas = []
+    varrer = Backtest.varrer
+    monkeypatch.setattr(Backtest, 'varrer', lambda self, *args, **kwargs: chamadas.append(1) or varrer(self, *args, **kwargs))
+    primeira = assistente.consultar_backtest(['PETR4.SA'])
+    assert '🏆 Melhores médias' in primeira
+    assert assistente.consultar_backtest(['PETR4.SA'], curta=10, longa=100) != primeira
+    assert len(chamadas) == 1
+
+
+def test_backtests_em_threads_iguais_ao_sequencial(precos):
+    pares = [(5, 50), (10, 100), (20, 150), (50, 200)]
+    sequencial = [Backtest(precos).cruzamento_medias(*par) for par in pares]
+    with ThreadPoolExecutor(4) as executor:
+        paralelo = list(executor.map(lambda par: Backtest(precos).cruzamento_medias(*par), pares * 4))
+    for esperado, obtido in zip(sequencial * 4, paralelo):
+        pd.testing.assert_frame_equal(esperado, obtido)
+    assert backtest._ESTADO == {}
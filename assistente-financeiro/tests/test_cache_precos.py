@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cache_precos import CachePrecos
+from fontes_dados import FonteDados, FonteSintetica, normalizar_download
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA']
+
+
+class FonteAjustada(FonteDados):
+    """FonteSintetica até `ate`, com os fechamentos anteriores a `ex_data` multiplicados por `fator`"""
+
+    def __init__(self, ate):
+        self.sintetica = FonteSintetica()
+        self.ate = pd.Timestamp(ate)
+        self.ex_data = None
+        self.fator = 1.0
+        self.chamadas = []
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        self.chamadas.append((list(ativos), pd.Timestamp(inicio)))
+        fim = min(pd.Timestamp(fim), self.ate + pd.Timedelta(days=1))
+        dados = self.sintetica.baixar(ativos, inicio, fim, periodo)
+        if self.ex_data is not None:
+            fatores = np.where(dados.index < self.ex_data, self.fator, 1.0)
+            dados = pd.concat({'Close': dados['Close'].mul(fatores, axis=0), 'Volume': dados['Volume']}, axis=1)
+        return normalizar_download(dados, list(ativos))
+
+
+@pytest.fixture
+def fonte():
+    return FonteAjustada('2024-03-28')
+
+
+def test_anexa_so_o_que_falta_e_respeita_a_validade(tmp_path, fonte):
+    cache = CachePrecos(fonte, diretorio=str(tmp_path))
+    cache.baixar(ATIVOS, inicio='2024-01-02', fim='2024-06-01')
+
+    fonte.ate = pd.Timestamp('2024-04-30')
+    cache.baixar(ATIVOS, inicio='2024-01-02', fim='2024-06-01')
+    assert len(fonte.chamadas) == 1  # dentro da validade sai do disco
+
+    dados = cache.baixar(ATIVOS, inicio='2024-01-02', fim='2024-06-01', validade=0)
+    assert fonte.chamadas[-1][1] == pd.Timestamp('2024-03-28')  # só a partir do último pregão guardado
+    esperado = FonteSintetica().baixar(ATIVOS, inicio='2024-01-02', fim='2024-05-01')
+    pd.testing.assert_frame_equal(dados, esperado, check_freq=False, check_dtype=False, check_index_type=False)
+
+
+def test_ajuste_novo_rebaixa_o_historico(tmp_path, fonte):
+    cache = CachePrecos(fonte, diretorio=str(tmp_path))
+    cache.baixar(ATIVOS, inicio='2024-01-02', fim='2024-06-01')
+
+    # provento com data ex em abril: a fonte reajusta todos os fechamentos anteriores
+    fonte.ate, fonte.ex_data, fonte.fator = pd.Timestamp('2024-04-30'), pd.Timestamp('2024-04-15'), 0.9
+    dados = cache.baixar(ATIVOS, inicio='2024-01-02', fim='2024-06-01', validade=0)
+
+    esperado = fonte.baixar(ATIVOS, inicio='2024-01-02', fim='2024-06-01')
+    np.testing.assert_allclose(dados['Close'].to_numpy(), esperado['Close'].to_numpy())
+    assert (sorted(fonte.chamadas[-2][0]), fonte.chamadas[-2][1]) == (ATIVOS, pd.Timestamp('2024-01-02'))
+
+
+def test_regravacao_nao_sobrescreve_arquivos_mapeados(tmp_path, fonte, monkeypatch):
+    cache = CachePrecos(fonte, diretorio=str(tmp_path))
+    cache.baixar(ATIVOS, inicio='2024-01-02', fim='2024-06-01')
+    datas, close, _ = cache._ler('PETR4.SA')
+    antes = np.array(close)
+
+    # no Windows um arquivo mapeado não pode ser apagado nem substituído
+    monkeypatch.setattr(os, 'remove', lambda caminho: (_ for _ in ()).throw(PermissionError(caminho)))
+    fonte.ate = pd.Timestamp('2024-04-30')
+    cache.baixar(ATIVOS, inicio='2024-01-02', fim='2024-06-01', validade=0)
+    np.testing.assert_array_equal(close, antes)
+    assert len(os.listdir(tmp_path)) == 1 + 2 * 3 * len(ATIVOS)
+
+    monkeypatch.undo()
+    del datas, close
+    fonte.ate = pd.Timestamp('2024-05-31')
+    dados = cache.baixar(ATIVOS, inicio='2024-01-02', fim='2024-06-01', validade=0)
+    assert set(os.listdir(tmp_path)) == {'indice.json'} | {
+        f"{ativo}.{campo}.v3.npy" for ativo in ATIVOS for campo in ('close', 'datas', 'volume')}
+    assert dados.index.max() == pd.Timestamp('2024-05-31')
@@ -0,0 +1,40 @@
+import sys
+
+import pytest
+
+from assistente import AssistenteAtivos
+from cache_respostas import CacheRespostas
+from fontes_dados import FonteSintetica
+
+
+def test_descarta_os_menos_usados_ao_passar_da_capacidade():
+    resposta = 'x' * 100
+    cache = CacheRespostas(capacidade_bytes=3 * sys.getsizeof(resposta))
+    for chave in 'abc':
+        cache.guardar(chave, resposta)
+    assert cache.obter('a') == resposta  # 'a' passa a ser o mais recente
+    cache.guardar('d', resposta)
+    assert cache.obter('b') is None
+    assert cache.obter('a') == resposta
+    assert cache.descartes == 1 and len(cache) == 3
+    assert cache.bytes <= cache.capacidade_bytes
+
+
+def test_resposta_maior_que_o_cache_nao_e_guardada():
+    cache = CacheRespostas(capacidade_bytes=10)
+    cache.guardar('a', 'x' * 100)
+    assert len(cache) == 0
+
+
+def test_assistente_reaproveita_ate_os_dados_mudarem():
+    assistente = AssistenteAtivos(['PETR4.SA', 'VALE3.SA'], fonte=FonteSintetica())
+    primeira = assistente.processar_pergunta("Qual o retorno total?")
+    assert assistente.processar_pergunta("qual o retorno total") is primeira
+    assert assistente.cache_respostas.acertos == 1
+
+    registro = assistente.metricas['PETR4.SA']
+    registro.retorno_total = 1e6
+    assistente.atualizar_metricas_ativo('PETR4.SA', registro)
+    segunda = assistente.processar_pergunta("Qual o retorno total?")
+    assert segunda != primeira
+    assert segunda.index('PETR4.SA') < segunda.index('VALE3.SA')
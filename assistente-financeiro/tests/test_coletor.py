@@ -0,0 +1,75 @@
+import time
+
+from coletor import ColetorParalelo
+from fontes_dados import FonteDados, FonteSintetica, normalizar_download
+
+
+class FontePresa(FonteDados):
+    """FonteSintetica em que os lotes com 'PRESO' demoram `demora` segundos"""
+
+    def __init__(self, demora):
+        self.sintetica = FonteSintetica()
+        self.demora = demora
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        if 'PRESO' in ativos:
+            time.sleep(self.demora)
+        return self.sintetica.baixar(ativos, inicio, fim, periodo)
+
+
+def test_lote_preso_nao_faz_os_outros_estourarem_o_timeout():
+    coletor = ColetorParalelo(FontePresa(1.0), tamanho_lote=1, trabalhadores=2, tentativas=2,
+                              espera_inicial=0.0, timeout=0.3)
+
+    lotes = [lote for lote, _ in coletor.baixar_em_lotes(['A', 'PRESO', 'B', 'C', 'D'])]
+
+    assert sorted(ativo for lote in lotes for ativo in lote) == ['A', 'B', 'C', 'D']
+    assert list(coletor.falhas) == ['PRESO']
+
+
+class FonteEsquecida(FonteDados):
+    """FonteSintetica que deixa `ausentes` de fora dos lotes com mais de um ativo
+    e devolve `vazios[ativo]` respostas vazias antes de entregar o ativo sozinho"""
+
+    def __init__(self, ausentes, vazios):
+        self.sintetica = FonteSintetica()
+        self.ausentes = set(ausentes)
+        self.vazios = dict(vazios)
+        self.chamadas = []
+
+    def baixar(self, ativos, inicio=None, fim=None, periodo='2y'):
+        self.chamadas.append(list(ativos))
+        if len(ativos) > 1:
+            ativos = [ativo for ativo in ativos if ativo not in self.ausentes]
+        elif self.vazios.get(ativos[0], 0) > 0:
+            self.vazios[ativos[0]] -= 1
+            return normalizar_download(None, ativos)
+        return self.sintetica.baixar(ativos, inicio, fim, periodo)
+
+
+def test_ativo_que_volta_vazio_no_lote_e_buscado_de_novo_sozinho():
+    fonte = FonteEsquecida(['B', 'C'], {'B': 1, 'C': 5})
+    coletor = ColetorParalelo(fonte, tamanho_lote=3, trabalhadores=1, tentativas=3, espera_inicial=0.0)
+
+    dados = coletor.baixar(['A', 'B', 'C'], inicio='2024-01-01', fim='2024-02-01')
+
+    assert not dados['Close']['A'].isna().all()
+    assert not dados['Close']['B'].isna().all()
+    assert 'C' not in dados['Close']
+    assert coletor.falhas == {'C': "sem dados"}
+    assert fonte.chamadas.count(['C']) == 3
+
+
+def test_falhas_de_grupos_com_inicios_diferentes_se_acumulam(tmp_path):
+    from cache_precos import CachePrecos
+
+    fonte = FonteEsquecida([], {})
+    coletor = ColetorParalelo(fonte, trabalhadores=1, tentativas=1, espera_inicial=0.0)
+    cache = CachePrecos(coletor, diretorio=str(tmp_path))
+    cache.baixar(['A', 'B'], inicio='2024-01-01', fim='2024-02-01')
+
+    # A e B continuam de onde pararam, C e D vêm do início: dois grupos, uma falha em cada
+    fonte.ausentes, fonte.vazios = {'B', 'D'}, {'B': 9, 'D': 9}
+    cache.baixar(['A', 'B', 'C', 'D'], inicio='2024-01-01', fim='2024-03-01', validade=0)
+    assert ['A', 'B'] in fonte.chamadas[1:] and ['C', 'D'] in fonte.chamadas[1:]
+    assert sorted(cache.falhas) == ['B', 'D']
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from correlacao import MatrizCorrelacao
+from fontes_dados import FonteSintetica
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA', 'ABEV3.SA']
+
+
+@pytest.fixture(scope='module')
+def precos():
+    precos = FonteSintetica().baixar(ATIVOS, inicio='2023-01-02', fim='2024-01-01')['Close'].copy()
+    precos.iloc[:50, 1] = np.nan
+    precos.iloc[120:125, 3] = np.nan
+    return precos
+
+
+@pytest.mark.parametrize('usar_retornos', [False, True])
+def test_igual_ao_corr_do_pandas(precos, usar_retornos):
+    correlacoes = MatrizCorrelacao.de_precos(precos, usar_retornos)
+    esperado = (precos / precos.ffill().shift(1) - 1) if usar_retornos else precos
+    np.testing.assert_allclose(correlacoes.matriz, esperado.corr().to_numpy(), atol=1e-10)
+
+
+@pytest.mark.parametrize('usar_retornos', [False, True])
+def test_pregoes_novos_sem_alterar_a_original(precos, usar_retornos):
+    antes = MatrizCorrelacao.de_precos(precos.iloc[:180], usar_retornos)
+    matriz = antes.matriz.copy()
+    depois = antes.com_pregoes(precos.iloc[180:].to_numpy())
+    np.testing.assert_allclose(depois.matriz, MatrizCorrelacao.de_precos(precos, usar_retornos).matriz, atol=1e-10)
+    np.testing.assert_array_equal(antes.matriz, matriz)
+
+
+def test_mais_correlacionados_em_ordem(precos):
+    correlacoes = MatrizCorrelacao.de_precos(precos)
+    linha = precos.corr()['PETR4.SA'].drop('PETR4.SA')
+    assert [ativo for ativo, _ in correlacoes.mais_correlacionados('PETR4.SA', k=2)] == \
+        list(linha.nlargest(2).index)
+    assert [ativo for ativo, _ in correlacoes.mais_correlacionados('PETR4.SA', k=2, menos=True)] == \
+        list(linha.nsmallest(2).index)
@@ -0,0 +1,11 @@
+import pytest
+
+from fontes_dados import FonteDados
+from intradiario import FonteEventos
+
+
+def test_interfaces_exigem_o_metodo_principal():
+    with pytest.raises(TypeError):
+        type('FonteIncompleta', (FonteDados,), {})()
+    with pytest.raises(TypeError):
+        type('FluxoIncompleto', (FonteEventos,), {})()
@@ -0,0 +1,42 @@
+import sys
+
+import numpy as np
+import pytest
+
+from correlacao import MatrizCorrelacao
+from fontes_dados import FonteSintetica
+from graficos import RenderizadorGraficos, reduzir_serie, resumir_tempos
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+
+
+@pytest.fixture(scope='module')
+def dados():
+    return FonteSintetica().baixar(ATIVOS, inicio='2023-01-02', fim='2024-01-01')
+
+
+def test_reducao_preserva_extremos_e_pontas():
+    valores = np.random.default_rng(0).normal(size=10_000).cumsum()
+    indices = reduzir_serie(valores, max_pontos=200)
+    assert len(indices) <= 202
+    assert indices[0] == 0 and indices[-1] == len(valores) - 1
+    assert np.argmin(valores) in indices and np.argmax(valores) in indices
+    np.testing.assert_array_equal(reduzir_serie(valores[:100], max_pontos=200), np.arange(100))
+
+
+@pytest.mark.parametrize('trabalhadores', [1, 2])
+def test_renderiza_pares_e_ativos_sem_interface(tmp_path, dados, trabalhadores):
+    renderizador = RenderizadorGraficos(dados['Close'], dados['Volume'], trabalhadores=trabalhadores,
+                                        max_pontos=100, dpi=40)
+    correlacoes = MatrizCorrelacao.de_precos(dados['Close'])
+    trabalhos = renderizador.trabalhos_pares(correlacoes, str(tmp_path / 'pares'))
+    trabalhos += renderizador.trabalhos_ativos(str(tmp_path / 'ativos'))
+
+    tempos = renderizador.renderizar(trabalhos)
+    assert [caminho for caminho, _ in tempos] == [trabalho[-2] for trabalho in trabalhos]
+    assert len(tempos) == 3 + len(ATIVOS)
+    for caminho, _ in tempos:
+        with open(caminho, 'rb') as arquivo:
+            assert arquivo.read(8) == b'\x89PNG\r\n\x1a\n'
+    assert resumir_tempos(tempos)['graficos'] == len(tempos)
+    assert 'matplotlib.pyplot' not in sys.modules
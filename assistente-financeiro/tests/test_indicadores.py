@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assistente import SEM_PREGOES, AssistenteAtivos
+from fontes_dados import FonteSintetica
+from indicadores import Indicadores
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+
+
+@pytest.fixture(scope='module')
+def precos():
+    return FonteSintetica().baixar(ATIVOS, inicio='2022-01-03', fim='2024-01-01')['Close']
+
+
+def test_indicadores_iguais_ao_pandas(precos):
+    tabela = Indicadores(precos).tabela()
+    np.testing.assert_allclose(tabela['mm_20'], precos.rolling(20).mean().iloc[-1], rtol=1e-9)
+    np.testing.assert_allclose(tabela['mme_20'], precos.ewm(span=20, adjust=False).mean().iloc[-1], rtol=1e-9)
+    queda = (precos / precos.cummax() - 1) * 100
+    np.testing.assert_allclose(tabela['max_drawdown'], queda.min(), rtol=1e-9)
+    np.testing.assert_allclose(tabela['drawdown_atual'], queda.iloc[-1], rtol=1e-9, atol=1e-12)
+
+
+def test_tabela_sem_pregoes_volta_vazia(precos):
+    tabela = Indicadores(precos.iloc[:0]).tabela()
+    assert tabela.empty
+    assert list(tabela.columns) == list(Indicadores(precos).tabela().columns)
+
+
+@pytest.mark.parametrize('pergunta', ["drawdown em 2010", "indicadores técnicos em 2010"])
+def test_periodo_sem_pregoes(pergunta, capsys):
+    assistente = AssistenteAtivos(ATIVOS, fonte=FonteSintetica())
+    assert assistente.processar_pergunta(pergunta).endswith(SEM_PREGOES)
+    assert 'IBOVESPA' not in capsys.readouterr().out
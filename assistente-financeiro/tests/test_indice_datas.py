@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fontes_dados import FonteSintetica
+from indice_datas import IndiceDatas
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA']
+
+
+@pytest.fixture(scope='module')
+def dados():
+    dados = FonteSintetica().baixar(ATIVOS, inicio='2024-01-02', fim='2024-07-01')
+    dados.loc[dados.index[:10], ('Close', 'VALE3.SA')] = np.nan
+    return dados
+
+
+@pytest.fixture(scope='module')
+def indice(dados):
+    return IndiceDatas.de_matrizes(dados['Close'], dados['Volume'])
+
+
+@pytest.mark.parametrize('data', ['2024-03-01', '2024-03-02', '2024-03-03', '2024-06-30', '2030-01-01'])
+def test_no_dia_usa_o_ultimo_pregao_ate_a_data(dados, indice, data):
+    precos = dados['Close']['PETR4.SA'].loc[:data].dropna()
+    dia, preco, volume = indice.no_dia('PETR4.SA', data)
+    assert dia == precos.index[-1]
+    assert preco == precos.iloc[-1]
+    assert volume == dados['Volume']['PETR4.SA'].loc[dia]
+
+
+def test_no_dia_antes_do_primeiro_pregao(dados, indice):
+    assert indice.no_dia('PETR4.SA', '2023-12-31') is None
+    assert indice.no_dia('VALE3.SA', dados.index[5]) is None
+
+
+@pytest.mark.parametrize('inicio, fim', [('2024-02-03', '2024-02-29'), (None, '2024-01-20'),
+                                         ('2024-06-15', None), ('2024-03-09', '2024-03-10')])
+def test_entre_igual_ao_fatiamento_do_pandas(dados, indice, inicio, fim):
+    esperado = dados['Close']['VALE3.SA'].loc[inicio:fim].dropna()
+    datas, precos, _ = indice.entre('VALE3.SA', inicio, fim)
+    assert list(pd.DatetimeIndex(datas)) == list(esperado.index)
+    np.testing.assert_array_equal(precos, esperado.to_numpy())
+
+
+def test_entre_devolve_views_do_armazem(indice):
+    _, precos, _ = indice.entre('PETR4.SA', '2024-02-01', '2024-02-29')
+    assert np.shares_memory(precos, indice.armazem.precos)
@@ -0,0 +1,73 @@
+import json
+import logging
+import threading
+
+import pytest
+
+from instrumentacao import Instrumentacao
+
+
+def test_desligada_nao_registra_nada():
+    instrumentacao = Instrumentacao()
+    assert instrumentacao.etapa('busca') is instrumentacao.rastro('pergunta')
+    with instrumentacao.rastro('pergunta'), instrumentacao.etapa('busca'):
+        instrumentacao.contar('respostas', intencao='preco')
+        instrumentacao.anotar(intencao='preco')
+    assert instrumentacao.rastro_atual() is None
+    assert instrumentacao.resumo_etapas() == []
+    assert instrumentacao.texto_prometheus() == '\n'
+
+
+def test_contadores_e_histogramas_no_formato_prometheus():
+    instrumentacao = Instrumentacao().ativar()
+    instrumentacao.contar('respostas', intencao='preco', cache='acerto')
+    instrumentacao.contar('respostas', 2, intencao='preco', cache='acerto')
+    instrumentacao.contar('requisicoes', caminho='/perguntar', status=200)
+    for _ in range(3):
+        with instrumentacao.etapa('consulta', intencao='preco'):
+            pass
+    with pytest.raises(ValueError):
+        with instrumentacao.etapa('consulta', intencao='var'):
+            raise ValueError
+
+    linhas = instrumentacao.texto_prometheus().splitlines()
+    assert 'assistente_respostas_total{cache="acerto",intencao="preco"} 3' in linhas
+    assert 'assistente_requisicoes_total{caminho="/perguntar",status="200"} 1' in linhas
+    assert 'assistente_etapa_erros_total{erro="ValueError",etapa="consulta"} 1' in linhas
+    assert '# TYPE assistente_etapa_segundos histogram' in linhas
+    assert 'assistente_etapa_segundos_bucket{etapa="consulta",intencao="preco",le="+Inf"} 3' in linhas
+    assert 'assistente_etapa_segundos_count{etapa="consulta",intencao="var"} 1' in linhas
+    assert [linha[:2] for linha in instrumentacao.resumo_etapas()] == [('consulta', 4)]
+
+    instrumentacao.limpar()
+    assert instrumentacao.texto_prometheus() == '\n'
+
+
+def test_rastro_vira_uma_linha_json_com_as_etapas(caplog):
+    instrumentacao = Instrumentacao().ativar()
+    with caplog.at_level(logging.INFO, logger='assistente.instrumentacao'):
+        with instrumentacao.rastro('pergunta', pergunta='Preço da PETR4?') as rastro:
+            with instrumentacao.etapa('roteamento'):
+                pass
+            instrumentacao.anotar(intencao='preco')
+            assert instrumentacao.rastro_atual() is rastro
+
+            def em_outra_thread(repassado):
+                with instrumentacao.continuar_rastro(repassado), instrumentacao.etapa('consulta'):
+                    pass
+            thread = threading.Thread(target=em_outra_thread, args=(instrumentacao.rastro_atual(),))
+            thread.start()
+            thread.join()
+        assert instrumentacao.rastro_atual() is None
+
+    linha = json.loads(caplog.records[-1].getMessage())
+    assert linha['evento'] == 'pergunta' and linha['intencao'] == 'preco'
+    assert linha['pergunta'] == 'Preço da PETR4?'
+    assert set(linha['etapas_ms']) == {'roteamento', 'consulta'}
+    assert 'erro' not in linha
+
+
+def test_continuar_rastro_sem_rastro_nao_faz_nada():
+    instrumentacao = Instrumentacao().ativar()
+    with instrumentacao.continuar_rastro(None):
+        assert instrumentacao.rastro_atual() is None
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from intradiario import (FonteNegociosSintetica, IngestaoIntradiaria, Negocio, ReprodutorArquivo,
+                         ReprodutorSocket, gravar_negocios, transmitir_arquivo)
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+INICIO = '2024-03-01 13:00'
+REFERENCIAS = {'PETR4.SA': 38.0, 'VALE3.SA': 65.0}
+
+
+@pytest.fixture(scope='module')
+def negocios():
+    fonte = FonteNegociosSintetica(ATIVOS, quantidade=20_000, inicio=INICIO, espacamento=0.5,
+                                   precos_iniciais=REFERENCIAS)
+    return list(fonte)
+
+
+@pytest.fixture(scope='module')
+def ingestao(negocios):
+    ingestao = IngestaoIntradiaria(referencias=REFERENCIAS)
+    assert ingestao.consumir(negocios) == len(negocios)
+    return ingestao
+
+
+@pytest.fixture(scope='module')
+def tabela(negocios):
+    tabela = pd.DataFrame(negocios, columns=Negocio._fields)
+    tabela.index = pd.to_datetime(tabela['instante'], unit='s')
+    return tabela
+
+
+@pytest.mark.parametrize('ativo', ATIVOS)
+def test_barras_iguais_ao_resample_do_pandas(ingestao, tabela, ativo):
+    do_ativo = tabela[tabela['ativo'] == ativo]
+    esperado = do_ativo['preco'].resample('60s').ohlc().dropna()
+    esperado['volume'] = do_ativo['quantidade'].resample('60s').sum()
+    esperado['negocios'] = do_ativo['preco'].resample('60s').count()
+
+    barras = ingestao.barras(ativo)
+    np.testing.assert_array_equal(barras.index, esperado.index)
+    np.testing.assert_allclose(barras[['abertura', 'maxima', 'minima', 'fechamento', 'volume', 'negocios']],
+                               esperado[['open', 'high', 'low', 'close', 'volume', 'negocios']])
+
+
+@pytest.mark.parametrize('ativo', ATIVOS)
+def test_painel_igual_ao_calculo_em_lote(ingestao, tabela, ativo):
+    do_ativo = tabela[tabela['ativo'] == ativo]
+    fechamentos = do_ativo['preco'].resample('60s').last().dropna().iloc[:-1]  # a barra aberta fica de fora
+    referencia = REFERENCIAS.get(ativo, do_ativo['preco'].iloc[0])
+
+    linha = ingestao.painel().loc[ativo]
+    assert linha['preco_atual'] == do_ativo['preco'].iloc[-1]
+    assert linha['retorno_dia'] == pytest.approx((do_ativo['preco'].iloc[-1] / referencia - 1) * 100)
+    assert linha['volatilidade_barras'] == pytest.approx(np.log(fechamentos).diff().std() * 100)
+    assert linha['maxima'] == do_ativo['preco'].max() and linha['minima'] == do_ativo['preco'].min()
+    assert linha['volume'] == do_ativo['quantidade'].sum()
+    assert linha['negocios'] == len(do_ativo) and linha['barras'] == len(fechamentos)
+
+
+def test_atrasados_somam_volume_sem_mudar_preco():
+    ingestao = IngestaoIntradiaria()
+    base = pd.Timestamp(INICIO).timestamp()
+    ingestao.consumir([Negocio(base, 'PETR4.SA', 10.0, 100), Negocio(base + 61, 'PETR4.SA', 11.0, 100),
+                       Negocio(base + 5, 'PETR4.SA', 9.0, 100)])
+    estado = ingestao.estado('PETR4.SA')
+    assert ingestao.atrasados == 1
+    assert estado.preco_atual == 11.0 and estado.minima == 10.0
+    assert estado.volume == 300 and len(estado.barras) == 1
+
+    ingestao.processar(Negocio(base + 86_400, 'PETR4.SA', 12.0, 100))
+    estado = ingestao.estado('PETR4.SA')
+    assert estado.referencia == 11.0 and estado.volume == 100 and len(estado.barras) == 0
+    assert estado.retorno() == pytest.approx((12.0 / 11.0 - 1) * 100)
+    ingestao.processar(Negocio(base + 120, 'PETR4.SA', 8.0, 100))
+    assert ingestao.atrasados == 2 and ingestao.estado('PETR4.SA').preco_atual == 12.0
+
+
+def test_reprodutores_de_arquivo_e_socket(tmp_path, negocios):
+    caminho = str(tmp_path / 'negocios.csv')
+    gravar_negocios(caminho, negocios[:500])
+    do_arquivo = list(ReprodutorArquivo(caminho))
+    assert len(do_arquivo) == 500
+    assert [negocio.ativo for negocio in do_arquivo] == [negocio.ativo for negocio in negocios[:500]]
+    np.testing.assert_allclose([negocio.preco for negocio in do_arquivo],
+                               [negocio.preco for negocio in negocios[:500]], atol=1e-4)
+
+    servidor, porta = transmitir_arquivo(caminho)
+    try:
+        assert list(ReprodutorSocket('127.0.0.1', porta)) == do_arquivo
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_ingestao_em_segundo_plano(negocios, ingestao):
+    paralela = IngestaoIntradiaria(iter(negocios), referencias=REFERENCIAS).iniciar()
+    paralela._thread.join(10)
+    paralela.parar()
+    assert paralela.eventos == ingestao.eventos
+    pd.testing.assert_frame_equal(paralela.painel(), ingestao.painel())
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assistente import SEM_PREGOES, AssistenteAtivos
+from fontes_dados import FonteSintetica
+from janelas import JanelasMetricas
+from metricas import calcular_metricas
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+
+
+@pytest.fixture(scope='module')
+def precos():
+    dados = FonteSintetica().baixar(ATIVOS, inicio='2022-01-03', fim='2024-01-01')
+    return dados['Close'], dados['Volume']
+
+
+@pytest.fixture(scope='module')
+def assistente():
+    return AssistenteAtivos(ATIVOS, fonte=FonteSintetica())
+
+
+@pytest.mark.parametrize('inicio, fim', [
+    (None, None), ('2022-03-01', '2022-09-30'), ('2023-05-10', '2023-05-12'),
+])
+def test_janela_igual_ao_calculo_direto(precos, inicio, fim):
+    fechamentos, volumes = precos
+    janelas = JanelasMetricas(fechamentos, volumes)
+    esperado = calcular_metricas(fechamentos.loc[inicio:fim], volumes.loc[inicio:fim])
+    obtido = janelas.metricas(inicio, fim)
+    for coluna in ['retorno_total', 'volatilidade', 'preco_min', 'preco_max', 'volume_medio']:
+        np.testing.assert_allclose(obtido[coluna], esperado[coluna], rtol=1e-9)
+
+
+def test_janela_com_um_retorno_tem_volatilidade_nan(precos):
+    fechamentos, volumes = precos
+    with np.errstate(all='raise'):
+        tabela = JanelasMetricas(fechamentos, volumes).metricas('2023-05-10', '2023-05-11')
+    assert tabela['volatilidade'].isna().all()
+    assert fechamentos.loc['2023-05-10':'2023-05-11'].pct_change().std().isna().all()
+
+
+@pytest.mark.parametrize('pergunta', [
+    "melhor e pior retorno em 2010",
+    "ranking de volatilidade em 2010",
+    "retorno total em 2010",
+    "volume médio em 2010",
+    "preço máximo em 2010",
+])
+def test_periodo_sem_pregoes(assistente, pergunta):
+    assert assistente.processar_pergunta(pergunta).endswith(SEM_PREGOES)
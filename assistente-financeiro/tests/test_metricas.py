@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fontes_dados import FonteSintetica
+from metricas import adicionar_retorno_diario, calcular_metricas, calcular_metricas_longo
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+
+
+@pytest.fixture(scope='module')
+def dados():
+    dados = FonteSintetica().baixar(ATIVOS, inicio='2023-01-02', fim='2024-01-01')
+    precos, volumes = dados['Close'].copy(), dados['Volume']
+    precos.iloc[:40, 1] = np.nan  # ativo que começou a negociar depois
+    precos.iloc[100:103, 2] = np.nan  # buraco no meio da série
+    return precos, volumes
+
+
+def test_igual_ao_calculo_ativo_por_ativo(dados):
+    precos, volumes = dados
+    tabela = calcular_metricas(precos, volumes)
+    for ativo in ATIVOS:
+        serie = precos[ativo].dropna()
+        retornos = serie.pct_change()
+        esperado = {
+            'retorno_total': (serie.iloc[-1] / serie.iloc[0] - 1) * 100,
+            'volatilidade': retornos.std() * 100,
+            'melhor_dia': retornos.max() * 100,
+            'pior_dia': retornos.min() * 100,
+            'preco_min': serie.min(),
+            'volume_medio': volumes[ativo].mean(),
+        }
+        for coluna, valor in esperado.items():
+            assert tabela.loc[ativo, coluna] == pytest.approx(valor, rel=1e-12), coluna
+
+
+def test_formato_longo_igual_ao_largo(dados):
+    precos, volumes = dados
+    longo = pd.concat({'Preço': precos, 'Volume': volumes}, axis=1).stack(level=1).reset_index()
+    longo.columns = ['Data', 'Ativo', 'Preço', 'Volume']
+    longo = longo.dropna(subset=['Preço'])
+
+    pd.testing.assert_frame_equal(calcular_metricas_longo(longo, 'Preço').loc[ATIVOS],
+                                  calcular_metricas(precos, volumes.where(precos.notna())), check_names=False)
+
+    longo = adicionar_retorno_diario(longo, 'Preço', 'Retorno')
+    esperado = longo.groupby('Ativo')['Preço'].pct_change()
+    np.testing.assert_allclose(longo['Retorno'], esperado)
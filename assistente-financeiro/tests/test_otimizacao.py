@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fontes_dados import FonteSintetica, universo_sintetico
+from otimizacao import OtimizadorCarteira, projetar_simplex
+
+
+@pytest.fixture(scope='module')
+def otimizador():
+    precos = FonteSintetica().baixar(universo_sintetico(8), inicio='2022-01-03', fim='2024-01-01')['Close']
+    return OtimizadorCarteira.de_precos(precos)
+
+
+def variancia(otimizador, pesos):
+    return pesos @ otimizador.covariancia @ pesos
+
+
+def test_projecao_no_simplex():
+    valores = np.random.default_rng(1).normal(size=(6, 4))
+    projetados = projetar_simplex(valores)
+    assert (projetados >= 0).all()
+    np.testing.assert_allclose(projetados.sum(axis=0), 1.0)
+    ja_no_simplex = np.full((4, 1), 0.25)
+    np.testing.assert_allclose(projetar_simplex(ja_no_simplex), ja_no_simplex)
+
+
+def test_pesos_so_comprados_somando_um(otimizador):
+    for carteira in (otimizador.minima_variancia(), otimizador.maximo_sharpe(), otimizador.para_retorno(0.0)):
+        assert (carteira.pesos >= 0).all()
+        assert carteira.pesos.sum() == pytest.approx(1.0)
+        assert list(carteira.pesos.index) == otimizador.ativos
+
+
+def test_minima_variancia_abaixo_dos_pesos_iguais(otimizador):
+    iguais = np.full(len(otimizador.ativos), 1 / len(otimizador.ativos))
+    minima = otimizador.minima_variancia()
+    assert minima.volatilidade ** 2 <= variancia(otimizador, iguais)
+    for ativo in range(len(otimizador.ativos)):
+        assert minima.volatilidade ** 2 <= otimizador.covariancia[ativo, ativo]
+
+
+def test_maximo_sharpe_acima_da_minima_variancia(otimizador):
+    minima, tangente = otimizador.minima_variancia(), otimizador.maximo_sharpe()
+    assert tangente.sharpe >= minima.sharpe - 1e-9
+    fronteira = otimizador.fronteira(pontos=20)
+    assert tangente.sharpe >= fronteira['sharpe'].max() - 1e-6
+
+
+def test_fronteira_crescente_em_retorno_e_volatilidade(otimizador):
+    fronteira = otimizador.fronteira(pontos=20)
+    assert fronteira['volatilidade'].is_monotonic_increasing
+    assert (fronteira['retorno'].diff().dropna() > -1e-9).all()
+    np.testing.assert_allclose(fronteira[otimizador.ativos].sum(axis=1), 1.0)
+
+
+def test_para_retorno_atinge_o_alvo(otimizador):
+    minima = otimizador.minima_variancia()
+    alvo = (minima.retorno + otimizador.media.max()) / 2
+    carteira = otimizador.para_retorno(alvo)
+    assert carteira.retorno >= alvo - 1e-4
+    assert carteira.volatilidade >= minima.volatilidade
+
+
+def test_ativo_sem_dados_fica_de_fora():
+    media = pd.Series([0.1, np.nan, 0.2], index=['A', 'B', 'C'])
+    covariancia = pd.DataFrame(np.diag([0.04, np.nan, 0.09]), index=media.index, columns=media.index)
+    otimizador = OtimizadorCarteira(media, covariancia)
+    assert otimizador.ativos == ['A', 'C']
+    pesos = otimizador.minima_variancia().pesos
+    np.testing.assert_allclose(pesos.to_numpy(), [0.09 / 0.13, 0.04 / 0.13], atol=1e-4)
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from fontes_dados import FonteSintetica
+from particoes import exportar_particionado, ler_particionado
+
+PRECO = 'Preço de Fechamento'
+
+
+def formato_longo(inicio, fim):
+    dados = FonteSintetica().baixar(['PETR4.SA', 'VALE3.SA'], inicio=inicio, fim=fim)
+    dados = dados.stack(level=1).reset_index()
+    dados.columns = ['Data', 'Ativo', PRECO, 'Volume']
+    return dados
+
+
+def test_janela_deslizante_mantem_linhas_exportadas_antes(tmp_path):
+    primeira = formato_longo('2022-03-01', '2024-03-01')
+    segunda = formato_longo('2022-06-01', '2024-03-05')
+    exportar_particionado(primeira, str(tmp_path))
+
+    gravadas, _ = exportar_particionado(segunda, str(tmp_path))
+
+    lidos = ler_particionado(str(tmp_path))
+    esperados = pd.concat([primeira, segunda]).drop_duplicates(['Data', 'Ativo'])
+    assert gravadas == 2  # só o ano corrente de cada ativo
+    assert len(lidos) == len(esperados)
+    assert lidos['Data'].min() == primeira['Data'].min()
+
+
+def test_preco_revisto_na_mesma_data_regrava_a_particao(tmp_path):
+    dados = formato_longo('2023-01-01', '2024-03-01')
+    exportar_particionado(dados, str(tmp_path))
+    revistos = dados.copy()
+    linha = revistos.index[10]
+    revistos.loc[linha, PRECO] += 1.0
+
+    gravadas, _ = exportar_particionado(revistos, str(tmp_path))
+
+    lidos = ler_particionado(str(tmp_path), ativos=[revistos.loc[linha, 'Ativo']])
+    assert gravadas == 1
+    assert lidos.loc[lidos['Data'] == revistos.loc[linha, 'Data'], PRECO].item() == revistos.loc[linha, PRECO]
+    assert exportar_particionado(revistos, str(tmp_path)) == (0, 4)
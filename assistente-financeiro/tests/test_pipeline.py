@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from instrumentacao import Instrumentacao
+from pipeline import Etapa, Pipeline
+
+
+def dobro(valor):
+    return 2 * valor
+
+
+def test_ciclo_e_recusado_na_construcao(tmp_path):
+    with pytest.raises(ValueError, match='circulares'):
+        Pipeline([Etapa('a', dobro, ['c']), Etapa('b', dobro, ['a']), Etapa('c', dobro, ['b']),
+                  Etapa('d', lambda: 1)], diretorio=str(tmp_path))
+
+
+def test_segunda_execucao_sai_dos_checkpoints(tmp_path):
+    def etapas():
+        return [Etapa('base', lambda: 21, guardar=False), Etapa('dobro', dobro, ['base'])]
+
+    assert Pipeline(etapas(), diretorio=str(tmp_path)).executar()['dobro'] == 42
+    pipeline = Pipeline(etapas(), diretorio=str(tmp_path))
+    assert pipeline.executar()['dobro'] == 42
+    assert dict((nome, situacao) for nome, situacao, _ in pipeline.resumo)['dobro'] == 'cache'
+
+
+def test_etapas_em_threads_somam_ao_rastro_de_quem_chamou():
+    instrumentacao = Instrumentacao().ativar()
+
+    def em_outra_thread(rastro):
+        with instrumentacao.continuar_rastro(rastro), instrumentacao.etapa('x'):
+            pass
+        return instrumentacao.rastro_atual()
+
+    with instrumentacao.rastro('execucao') as rastro:
+        with ThreadPoolExecutor(1) as executor:
+            depois = executor.submit(em_outra_thread, instrumentacao.rastro_atual()).result()
+    assert 'x' in rastro.etapas
+    assert depois is None
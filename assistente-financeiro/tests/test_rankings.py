@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from rankings import IndiceRanking
+
+VALORES = {'A': 3.0, 'B': -1.0, 'C': 7.5, 'D': np.nan, 'E': 0.0, 'F': 3.0}
+
+
+def ordenados(valores, decrescente=True):
+    validos = [(ativo, valor) for ativo, valor in valores.items() if not np.isnan(valor)]
+    return sorted(validos, key=lambda par: (par[1], par[0]), reverse=decrescente)
+
+
+@pytest.fixture
+def indice():
+    return IndiceRanking(VALORES)
+
+
+def test_topo_base_e_paginas_iguais_a_ordenar(indice):
+    assert indice.maiores() == ordenados(VALORES)
+    assert indice.menores() == ordenados(VALORES, decrescente=False)
+    assert indice.maiores(2, 2) == ordenados(VALORES)[2:4]
+    assert indice.menores(2, 4) == ordenados(VALORES, decrescente=False)[4:6]
+    assert indice.maiores(3, 10) == []
+    assert len(indice) == 5
+
+
+def test_posicao_e_nan_fora_do_ranking(indice):
+    assert [indice.posicao(ativo) for ativo, _ in ordenados(VALORES)] == [1, 2, 3, 4, 5]
+    assert indice.posicao('C', decrescente=False) == 5
+    assert indice.posicao('D') is None
+
+
+def test_atualizar_reposiciona_so_o_ativo(indice):
+    indice.atualizar('B', 10.0)
+    indice.atualizar('D', 1.0)
+    indice.atualizar('C', np.nan)
+    esperado = {**VALORES, 'B': 10.0, 'D': 1.0, 'C': np.nan}
+    assert indice.maiores() == ordenados(esperado)
+
+
+def test_com_valores_nao_altera_o_original(indice):
+    novo = indice.com_valores({'A': -5.0, 'D': 2.0, 'G': 4.0})
+    assert novo.maiores() == ordenados({**VALORES, 'A': -5.0, 'D': 2.0, 'G': 4.0})
+    assert indice.maiores() == ordenados(VALORES)
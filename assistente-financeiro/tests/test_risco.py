@@ -0,0 +1,55 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from assistente import AssistenteAtivos
+from fontes_dados import FonteSintetica
+from risco import CARTEIRA, MINIMO_OBSERVACOES, tabela_risco, var_cvar_historico
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+
+
+@pytest.fixture(scope='module')
+def precos():
+    return FonteSintetica().baixar(ATIVOS, inicio='2022-01-03', fim='2024-01-01')['Close']
+
+
+def test_historico_igual_ao_quantil_do_pandas(precos):
+    perdas = -precos.pct_change().iloc[1:]
+    var, cvar = var_cvar_historico(perdas.to_numpy())
+    np.testing.assert_allclose(var, perdas.quantile(0.95), rtol=1e-12)
+    np.testing.assert_allclose(cvar, [perdas[a][perdas[a] >= perdas[a].quantile(0.95)].mean() for a in ATIVOS],
+                               rtol=1e-12)
+
+
+def test_monte_carlo_perto_do_parametrico(precos):
+    tabela = tabela_risco(precos, simulacoes=200_000)
+    np.testing.assert_allclose(tabela['var_monte_carlo'], tabela['var_parametrico'], rtol=0.03)
+
+
+@pytest.mark.parametrize('pregoes', [0, 1, 5, MINIMO_OBSERVACOES])
+def test_poucos_pregoes_dao_linhas_nan_sem_avisos(precos, pregoes):
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        tabela = tabela_risco(precos.iloc[:pregoes])
+    assert tabela.isna().all().all()
+
+
+def test_ativo_com_pouco_historico_nao_contamina_os_outros(precos):
+    curto = precos.copy()
+    curto.iloc[:-10, 0] = np.nan
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        tabela = tabela_risco(curto)
+    completa = tabela_risco(precos)
+    assert tabela.loc[[ATIVOS[0], CARTEIRA]].isna().all().all()
+    pd.testing.assert_series_equal(tabela.loc[ATIVOS[1], ['var_historico', 'var_parametrico']],
+                                   completa.loc[ATIVOS[1], ['var_historico', 'var_parametrico']])
+
+
+def test_resposta_de_periodo_sem_pregoes():
+    assistente = AssistenteAtivos(ATIVOS, fonte=FonteSintetica())
+    assert 'risco não estimado' in assistente.processar_pergunta("VaR em 2010")
+    assert 'nan' not in assistente.processar_pergunta("VaR da PETR4 nos últimos 10 dias")
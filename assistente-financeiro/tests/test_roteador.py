@@ -0,0 +1,68 @@
+import pytest
+
+from roteador import RoteadorIntencoes
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA', 'ABEV3.SA']
+
+
+@pytest.fixture
+def roteador():
+    return RoteadorIntencoes(ATIVOS)
+
+
+@pytest.mark.parametrize('pergunta, intencao', [
+    ("qual o preço de PETR4 hoje?", 'preco'),
+    ("Qual a volatilidade da VALE3 hoje?", 'volatilidade'),
+    ("Como estão os ativos hoje?", 'intradiario'),
+    ("Cotações ao vivo da ITUB4", 'intradiario'),
+    ("Qual o preço atual da PETR4?", 'preco'),
+])
+def test_hoje_so_pede_o_intradiario_sem_outro_tema(roteador, pergunta, intencao):
+    assert roteador.rotear(pergunta).nome == intencao
+
+
+def test_hoje_nao_entra_nos_modificadores(roteador):
+    assert roteador.rotear("qual o preço de PETR4 hoje?") == roteador.rotear("qual o preço de PETR4?")
+
+
+@pytest.mark.parametrize('pergunta, nome', [
+    ("Qual o VaR da carteira?", 'var'),
+    ("Quanto teria rendido comprar PETR4 com cruzamento de médias?", 'backtest'),
+    ("Monte uma carteira de maior Sharpe", 'carteira'),
+    ("Qual o drawdown máximo da ITUB4?", 'drawdown'),
+    ("RSI e bandas de Bollinger da VALE3", 'indicadores'),
+    ("Ranking de volatilidade", 'volatilidade'),
+    ("Qual o retorno total no ano?", 'retorno'),
+    ("Qual a cotacao da ABEV3?", 'preco'),
+    ("Volume médio de negociação", 'volume'),
+    ("Correlação entre PETR4 e VALE3", 'correlacao'),
+    ("Resumo da ITUB4", 'resumo'),
+    ("Melhor e pior ativo", 'melhor_pior'),
+    ("Olá, tudo bem?", 'ajuda'),
+    ("Qual a variação da PETR4?", 'ajuda'),
+])
+def test_intencoes(roteador, pergunta, nome):
+    assert roteador.rotear(pergunta).nome == nome
+
+
+def test_ativos_na_ordem_citada_com_ou_sem_sufixo(roteador):
+    assert roteador.rotear("correlação entre vale3.sa, PETR4 e vale3").ativos == ('VALE3.SA', 'PETR4.SA')
+    assert roteador.rotear("preço da XPTO3").ativos == ()
+
+
+@pytest.mark.parametrize('pergunta, periodo', [
+    ("retorno nos últimos 30 dias", ('dias', 30)),
+    ("volatilidade dos ultimos 6 meses", ('meses', 6)),
+    ("retorno em 2023", ('ano', 2023)),
+    ("retorno no ano", ('ytd',)),
+    ("preço da PETR4 em 01/03/2024", ('data', '2024-03-01')),
+    ("preço da PETR4 de 2024-03-10 a 2024-01-05", ('intervalo', '2024-01-05', '2024-03-10')),
+    ("preço da PETR4 em 31/02/2024", None),
+])
+def test_periodos(roteador, pergunta, periodo):
+    assert roteador.rotear(pergunta).periodo == periodo
+
+
+def test_modificadores(roteador):
+    assert roteador.rotear("menor preço da PETR4").modificadores == {'minimo'}
+    assert roteador.rotear("pior retorno").modificadores == {'pior'}
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from assistente import AssistenteAtivos
+from fontes_dados import FonteSintetica
+from servidor import ServidorAssistente, valores_json
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+
+
+@pytest.fixture
+def servidor():
+    return ServidorAssistente(lambda: AssistenteAtivos(ATIVOS, fonte=FonteSintetica()), trabalhadores=4)
+
+
+class Escritor:
+    def __init__(self):
+        self.conteudo = b''
+
+    def write(self, dados):
+        self.conteudo += dados
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def perguntar(servidor, pergunta):
+    """Corpo JSON devolvido por POST /perguntar, passando pelo tratamento da conexão"""
+    async def rodar():
+        leitor = asyncio.StreamReader()
+        corpo = json.dumps({'pergunta': pergunta}).encode()
+        leitor.feed_data(b"POST /perguntar HTTP/1.1\r\nConnection: close\r\n"
+                         b"Content-Length: %d\r\n\r\n%s" % (len(corpo), corpo))
+        leitor.feed_eof()
+        escritor = Escritor()
+        await servidor.tratar_conexao(leitor, escritor)
+        return escritor.conteudo
+
+    cabecalho, _, corpo = asyncio.run(rodar()).partition(b'\r\n\r\n')
+    assert cabecalho.startswith(b'HTTP/1.1 200')
+    return json.loads(corpo, parse_constant=lambda constante: pytest.fail(f"{constante} no JSON"))
+
+
+def test_valores_nao_finitos_viram_null():
+    assert valores_json({'a': float('nan'), 'b': [float('inf'), 1.5], 'c': (None, 'x')}) == \
+        {'a': None, 'b': [None, 1.5], 'c': [None, 'x']}
+
+
+@pytest.mark.parametrize('pergunta', [
+    "melhor e pior retorno em 2010",
+    "drawdown em 2010",
+    "VaR em 2010",
+    "backtest da PETR4 em 2010",
+    "resumo PETR4",
+])
+def test_resposta_e_json_valido(servidor, pergunta):
+    resposta = perguntar(servidor, pergunta)
+    assert resposta['resposta']
+
+
+def test_melhor_pior_sem_pregoes(servidor):
+    assert perguntar(servidor, "melhor e pior retorno em 2010")['dados'] == {'melhor': None, 'pior': None}
+
+
+def test_dados_estruturados_saem_do_cache(servidor):
+    primeira = servidor.responder("Qual o drawdown da PETR4?")
+    acertos = servidor.assistente.cache_respostas.acertos
+    segunda = servidor.responder("Qual o drawdown da PETR4?")
+    assert segunda['dados'] is primeira['dados']
+    assert servidor.assistente.cache_respostas.acertos == acertos + 2
+
+
+def test_caches_por_periodo_montados_uma_vez_com_perguntas_simultaneas(servidor, monkeypatch):
+    import assistente as modulo
+    montagens = []
+    original = modulo.tabela_risco
+    monkeypatch.setattr(modulo, 'tabela_risco', lambda precos: montagens.append(1) or original(precos))
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(servidor.assistente.tabela_risco, [('anos', 1)] * 16))
+    assert len(montagens) == 1
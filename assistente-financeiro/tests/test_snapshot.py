@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+import pytest
+
+from assistente import AssistenteAtivos
+from fontes_dados import FonteSintetica
+
+ATIVOS = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA']
+PERGUNTAS = ["Qual o retorno total?", "Qual a volatilidade da VALE3?", "Qual o preço da PETR4?",
+             "Correlação entre PETR4 e VALE3", "Resumo"]
+
+
+@pytest.mark.parametrize('compacto', [False, True])
+def test_snapshot_devolve_as_mesmas_metricas_e_respostas(tmp_path, compacto):
+    original = AssistenteAtivos(ATIVOS, fonte=FonteSintetica(), compacto=compacto)
+    original.salvar_snapshot(str(tmp_path))
+    carregado = AssistenteAtivos.de_snapshot(str(tmp_path), fonte=FonteSintetica())
+
+    assert carregado.ativos == ATIVOS and carregado.compacto == compacto
+    for ativo in ATIVOS:
+        for campo in ('retorno_total', 'volatilidade', 'preco_atual', 'volume_medio'):
+            assert carregado.metricas[ativo][campo] == original.metricas[ativo][campo]
+    pd.testing.assert_frame_equal(carregado.dados.reset_index(drop=True)[['Data', 'Preço', 'Volume']],
+                                  original.dados.reset_index(drop=True)[['Data', 'Preço', 'Volume']],
+                                  check_index_type=False, check_names=False)
+    for pergunta in PERGUNTAS:
+        assert carregado.processar_pergunta(pergunta) == original.processar_pergunta(pergunta)
+
+
+def test_sem_snapshot_devolve_none(tmp_path):
+    assert AssistenteAtivos.de_snapshot(str(tmp_path), fonte=FonteSintetica()) is None
+
+
+def test_snapshot_interrompido_e_ignorado(tmp_path):
+    AssistenteAtivos(ATIVOS, fonte=FonteSintetica()).salvar_snapshot(str(tmp_path))
+    os.remove(tmp_path / 'meta.json')
+    assert AssistenteAtivos.de_snapshot(str(tmp_path), fonte=FonteSintetica()) is None
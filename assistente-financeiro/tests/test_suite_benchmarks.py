@@ -0,0 +1,53 @@
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+
+CAMINHO_SUITE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'suite.py')
+especificacao = importlib.util.spec_from_file_location('suite_benchmarks', CAMINHO_SUITE)
+suite = importlib.util.module_from_spec(especificacao)
+especificacao.loader.exec_module(suite)
+
+
+def resultado(tempo, relativo, memoria):
+    return {'tempo': tempo, 'relativo': relativo, 'memoria': memoria}
+
+
+def test_compara_o_tempo_relativo_a_referencia():
+    base = resultado(0.100, 10.0, 50.0)
+    # máquina 2x mais lenta: tempo absoluto dobra, relativo igual
+    assert suite.comparar(resultado(0.200, 10.0, 50.0), base, 0.30, 0.20) == []
+    assert suite.comparar(resultado(0.150, 15.0, 50.0), base, 0.30, 0.20) == ['tempo']
+    assert suite.comparar(resultado(0.100, 10.0, 65.0), base, 0.30, 0.20) == ['memoria']
+
+
+def test_diferenca_abaixo_da_folga_e_ruido():
+    base = resultado(0.002, 1.0, 1.0)
+    assert suite.comparar(resultado(0.004, 2.0, 1.0), base, 0.30, 0.20) == []
+    assert suite.comparar(resultado(0.004, 2.0, 1.0), base, 0.30, 0.20, folga_ms=0.5) == ['tempo']
+
+
+def rodar(monkeypatch, arquivo_base, *argumentos):
+    monkeypatch.chdir(os.getcwd())  # a suíte volta para o diretório do projeto ao terminar
+    monkeypatch.setattr(suite, 'ARQUIVO_BASE', str(arquivo_base))
+    monkeypatch.setattr(sys, 'argv', ['suite.py', '-k', 'processar_metricas', '--repeticoes', '1', *argumentos])
+    with pytest.raises(SystemExit) as saida:
+        suite.main()
+        raise SystemExit(0)
+    return saida.value.code
+
+
+def test_codigos_de_saida(monkeypatch, tmp_path):
+    arquivo_base = tmp_path / 'linha_de_base.json'
+    assert rodar(monkeypatch, arquivo_base) == 2
+
+    assert rodar(monkeypatch, arquivo_base, '--salvar') == 0
+    bases = json.loads(arquivo_base.read_text(encoding='utf-8'))
+    assert set(bases['pequena']['casos']) == {'processar_metricas'}
+    assert rodar(monkeypatch, arquivo_base, '--limite-tempo', '100', '--limite-memoria', '100') == 0
+
+    bases['pequena']['casos']['processar_metricas'].update(relativo=1e-9, memoria=1e-9)
+    arquivo_base.write_text(json.dumps(bases), encoding='utf-8')
+    assert rodar(monkeypatch, arquivo_base) == 1